@@ -15,6 +15,11 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolb
 from matplotlib.dates import DateFormatter
 import traceback  # Add this import for error tracing
 
+try:
+    from balance_breaker.src.data_pipeline.loaders.repository_index import get_repository_index
+except ImportError:
+    get_repository_index = None
+
 def normalize_price_data(df):
     """
     Normalize price data to have consistent column names
@@ -509,6 +514,12 @@ class DataPreview:
         
         print(f"Searching for currency pairs in {directory} with extensions {file_extensions}")
         
+        # Use the shared repository index when available
+        if get_repository_index is not None:
+            currency_pairs = get_repository_index(directory).detect_pairs(file_extensions, common_pairs)
+            print(f"Found {len(currency_pairs)} currency pairs: {currency_pairs}")
+            return currency_pairs
+        
         # Look for files with pair names
         for root, _, files in os.walk(directory):
             for file in files:
@@ -12,6 +12,7 @@ import traceback
 from datetime import datetime
 
 from .repository_base import RepositoryDialog
+from .utils import scan_directory_for_files
 
 class MacroRepositoryDialog(RepositoryDialog):
     """Enhanced dialog for macroeconomic data repository configuration"""
@@ -138,32 +139,23 @@ class MacroRepositoryDialog(RepositoryDialog):
             prefix = self.prefix_var.get()
             include_all = self.include_all_var.get()
             
-            extensions = {
-                'csv': ['.csv', '.CSV', '.txt', '.TXT'],
-                'excel': ['.xlsx', '.xls', '.XLSX', '.XLS']
-            }
-            
-            file_extensions = extensions.get(format_type, ['.csv', '.CSV'])
-            
-            # Find matching files
+            # Find matching files using the shared repository index
             matching_files = []
             indicators = []
             
-            for root, _, files in os.walk(directory):
-                for file in files:
-                    if any(file.lower().endswith(ext.lower()) for ext in file_extensions):
-                        # Check prefix if not including all
-                        if include_all or not prefix or file.startswith(prefix):
-                            file_path = os.path.join(root, file)
-                            matching_files.append(file_path)
-                            
-                            # Extract indicator name
-                            if prefix and file.startswith(prefix):
-                                indicator = file[len(prefix):].split('.')[0]
-                            else:
-                                indicator = file.split('.')[0]
-                                
-                            indicators.append((indicator, file_path))
+            for file_path in scan_directory_for_files(directory, format_type):
+                file = os.path.basename(file_path)
+                # Check prefix if not including all
+                if include_all or not prefix or file.startswith(prefix):
+                    matching_files.append(file_path)
+                    
+                    # Extract indicator name
+                    if prefix and file.startswith(prefix):
+                        indicator = file[len(prefix):].split('.')[0]
+                    else:
+                        indicator = file.split('.')[0]
+                        
+                    indicators.append((indicator, file_path))
             
             if not matching_files:
                 message = f"No {format_type} files found"
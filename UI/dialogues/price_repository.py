@@ -12,6 +12,7 @@ import traceback
 from datetime import datetime
 
 from .repository_base import RepositoryDialog
+from .utils import scan_directory_for_files, detect_currency_pairs
 
 class PriceRepositoryDialog(RepositoryDialog):
     """Enhanced dialog for price data repository configuration"""
@@ -184,33 +185,12 @@ class PriceRepositoryDialog(RepositoryDialog):
         self.update_status(f"Scanning directory: {directory}...")
         
         try:
-            # Get file list
+            # Get file list from the shared repository index
             format_type = self.format_var.get()
-            extensions = {
-                'csv': ['.csv', '.CSV', '.txt', '.TXT'],
-                'excel': ['.xlsx', '.xls', '.XLSX', '.XLS']
-            }
+            found_files = scan_directory_for_files(directory, format_type)
             
-            file_extensions = extensions.get(format_type, ['.csv', '.CSV'])
-            
-            # Find all matching files
-            found_files = []
-            detected_pairs = set()
-            
-            # Common pairs to look for
-            common_pairs = ['USDJPY', 'EURUSD', 'GBPUSD', 'AUDUSD', 'USDCAD', 'USDCHF', 'NZDUSD']
-            
-            for root, _, files in os.walk(directory):
-                for file in files:
-                    if any(file.lower().endswith(ext.lower()) for ext in file_extensions):
-                        file_path = os.path.join(root, file)
-                        found_files.append(file_path)
-                        
-                        # Try to detect currency pair from filename
-                        for pair in common_pairs:
-                            if pair.lower() in file.lower():
-                                detected_pairs.add(pair)
-                                break
+            # Try to detect currency pairs from filenames
+            detected_pairs = detect_currency_pairs(found_files)
             
             if not found_files:
                 self.update_status(f"No {format_type} files found in directory", is_error=True)
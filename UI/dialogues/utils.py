@@ -7,6 +7,11 @@ import pandas as pd
 import numpy as np
 import traceback
 
+try:
+    from balance_breaker.src.data_pipeline.loaders.repository_index import get_repository_index
+except ImportError:
+    get_repository_index = None
+
 def scan_directory_for_files(directory, format_type='csv', file_pattern=None):
     """Scan directory for files matching the format type and pattern
     
@@ -34,6 +39,10 @@ def scan_directory_for_files(directory, format_type='csv', file_pattern=None):
     found_files = []
     
     try:
+        # Use the shared repository index when available
+        if get_repository_index is not None:
+            return get_repository_index(directory).files(file_extensions, pattern=file_pattern)
+        
         for root, _, files in os.walk(directory):
             for file in files:
                 if any(file.lower().endswith(ext.lower()) for ext in file_extensions):
@@ -9,6 +9,18 @@ import numpy as np
 import json
 from datetime import datetime
 
+try:
+    from balance_breaker.src.data_pipeline.loaders.price_store import PriceStore, store_directory_for
+except ImportError as e:
+    print(f"Price store not available, loading from source files only: {e}")
+    PriceStore = None
+
+try:
+    from balance_breaker.src.data_pipeline.loaders.repository_index import get_repository_index
+except ImportError as e:
+    print(f"Repository index not available, scanning directories directly: {e}")
+    get_repository_index = None
+
 class RepositoryManager:
     def __init__(self, config_path='repository_config.json'):
         self.config_path = config_path
@@ -74,34 +86,19 @@ class RepositoryManager:
         format_type = repo_config.get('format', 'csv')
         column_map = repo_config.get('columns', {})
         
-        # Determine file path based on pair and directory
-        file_path = self._find_pair_file(directory, pair, format_type)
-        if not file_path:
-            raise FileNotFoundError(f"No data file found for {pair} in repository {repo_name}")
-        
-        print(f"Loading price data from: {file_path}")
-        
-        # Load data based on format
-        if format_type == 'csv':
-            try:
-                df = pd.read_csv(file_path, index_col=0, parse_dates=True)
-            except Exception as e:
-                # Try alternative approaches if first attempt fails
-                try:
-                    print(f"First attempt failed ({e}), trying with auto-detection...")
-                    df = pd.read_csv(file_path, parse_dates=True)
-                    
-                    # Look for potential datetime column
-                    date_cols = [col for col in df.columns if any(term in col.lower() for term in ['date', 'time'])]
-                    if date_cols:
-                        print(f"Setting index to column: {date_cols[0]}")
-                        df = df.set_index(date_cols[0])
-                except Exception as e2:
-                    raise ValueError(f"Failed to load CSV file: {e2}")
-        elif format_type == 'excel':
-            df = pd.read_excel(file_path, index_col=0, parse_dates=True)
+        # Serve from the columnar price store when it is up to date
+        store = self._get_price_store(repo_config)
+        if store is not None and store.has_pair(pair):
+            print(f"Loading price data for {pair} from store: {store.store_dir}")
+            df = store.load(pair, start_date, end_date)
         else:
-            raise ValueError(f"Unsupported format: {format_type}")
+            # Determine file path based on pair and directory
+            file_path = self._find_pair_file(directory, pair, format_type)
+            if not file_path:
+                raise FileNotFoundError(f"No data file found for {pair} in repository {repo_name}")
+            
+            print(f"Loading price data from: {file_path}")
+            df = self._read_price_file(file_path, format_type)
         
         # Debug output of original data
         print(f"Original data columns: {df.columns.tolist()}")
@@ -152,6 +149,122 @@ class RepositoryManager:
         
         return df
     
+    def _read_price_file(self, file_path, format_type):
+        """Read a raw price file into a DataFrame"""
+        if format_type == 'csv':
+            try:
+                df = pd.read_csv(file_path, index_col=0, parse_dates=True)
+            except Exception as e:
+                # Try alternative approaches if first attempt fails
+                try:
+                    print(f"First attempt failed ({e}), trying with auto-detection...")
+                    df = pd.read_csv(file_path, parse_dates=True)
+                    
+                    # Look for potential datetime column
+                    date_cols = [col for col in df.columns if any(term in col.lower() for term in ['date', 'time'])]
+                    if date_cols:
+                        print(f"Setting index to column: {date_cols[0]}")
+                        df = df.set_index(date_cols[0])
+                except Exception as e2:
+                    raise ValueError(f"Failed to load CSV file: {e2}")
+        elif format_type == 'excel':
+            df = pd.read_excel(file_path, index_col=0, parse_dates=True)
+        else:
+            raise ValueError(f"Unsupported format: {format_type}")
+        
+        return df
+    
+    def _get_price_store(self, repo_config):
+        """Get the columnar price store for a repository if one is present"""
+        if PriceStore is None or not repo_config.get('use_store', True):
+            return None
+        
+        store_dir = store_directory_for(repo_config)
+        if not store_dir or not os.path.isdir(store_dir):
+            return None
+        
+        return PriceStore(store_dir)
+    
+    def build_price_store(self, repo_name, pairs=None):
+        """Build the columnar price store for a repository from its source files
+        
+        Parameters:
+        -----------
+        repo_name : str
+            Price repository name
+        pairs : list, optional
+            Pairs to store (default: all pairs detected in the repository)
+            
+        Returns:
+        --------
+        dict
+            Dictionary of pair -> whether the pair was stored
+        """
+        if PriceStore is None:
+            raise RuntimeError("Price store is not available")
+        
+        if repo_name not in self.repositories['price']:
+            raise ValueError(f"Price repository '{repo_name}' not found")
+        
+        repo_config = self.repositories['price'][repo_name]
+        directory = repo_config['directory']
+        format_type = repo_config.get('format', 'csv')
+        store = PriceStore(store_directory_for(repo_config))
+        
+        if pairs is None:
+            pairs = self._detect_pairs(directory, format_type)
+        
+        results = {}
+        for pair in pairs:
+            file_path = self._find_pair_file(directory, pair, format_type)
+            if not file_path:
+                print(f"No data file found for {pair} in repository {repo_name}")
+                results[pair] = False
+                continue
+            
+            try:
+                df = self._read_price_file(file_path, format_type)
+                if not isinstance(df.index, pd.DatetimeIndex):
+                    df.index = pd.to_datetime(df.index)
+                results[pair] = store.build(pair, df, source_path=file_path)
+            except Exception as e:
+                print(f"Error storing {pair}: {e}")
+                results[pair] = False
+        
+        print(f"Stored {sum(results.values())} of {len(results)} pairs in {store.store_dir}")
+        return results
+    
+    def _detect_pairs(self, directory, format_type):
+        """Detect currency pairs available in a repository directory"""
+        extensions = {
+            'csv': ['.csv', '.CSV', '.txt', '.TXT'],
+            'excel': ['.xlsx', '.xls', '.XLSX', '.XLS']
+        }
+        file_extensions = extensions.get(format_type, ['.csv'])
+        common_pairs = ['USDJPY', 'EURUSD', 'GBPUSD', 'AUDUSD', 'USDCAD', 'USDCHF', 'NZDUSD']
+        
+        pairs = []
+        for file_path in self._list_files(directory, file_extensions):
+            file = os.path.basename(file_path)
+            for pair in common_pairs:
+                if pair.lower() in file.lower():
+                    if pair not in pairs:
+                        pairs.append(pair)
+                    break
+        return pairs
+    
+    def _list_files(self, directory, file_extensions):
+        """List repository files with the given extensions"""
+        if get_repository_index is not None:
+            return get_repository_index(directory).files(file_extensions)
+        
+        found_files = []
+        for root, _, files in os.walk(directory):
+            for file in files:
+                if any(file.lower().endswith(ext.lower()) for ext in file_extensions):
+                    found_files.append(os.path.join(root, file))
+        return found_files
+    
     def _find_pair_file(self, directory, pair, format_type):
         """Find data file for the specified pair"""
         extensions = {
@@ -161,6 +274,13 @@ class RepositoryManager:
         
         file_extensions = extensions.get(format_type, ['.csv'])
         
+        # Use the shared repository index when available
+        if get_repository_index is not None:
+            file_path = get_repository_index(directory).find_pair_file(pair, file_extensions)
+            if file_path:
+                print(f"Found match for {pair}: {os.path.basename(file_path)}")
+            return file_path
+        
         # Track all candidate files
         candidates = []
         
@@ -325,26 +445,29 @@ class RepositoryManager:
         # Load all macro data files and merge them
         all_data = {}
         
-        for root, _, files in os.walk(directory):
-            for file in files:
-                if format_type == 'csv' and file.endswith('.csv'):
-                    file_path = os.path.join(root, file)
-                    try:
-                        # Extract indicator name from filename
-                        indicator = os.path.splitext(file)[0].split('_')[-1]
-                        
-                        # Load data
-                        df = pd.read_csv(file_path, index_col=0, parse_dates=True)
-                        
-                        # If single column, use filename as column name
-                        if len(df.columns) == 1:
-                            all_data[indicator] = df.iloc[:, 0]
-                        else:
-                            # Multiple columns, merge all
-                            for col in df.columns:
-                                all_data[f"{indicator}_{col}"] = df[col]
-                    except Exception as e:
-                        print(f"Error loading {file}: {e}")
+        if format_type == 'csv':
+            data_files = [path for path in self._list_files(directory, ['.csv']) if path.endswith('.csv')]
+        else:
+            data_files = []
+        
+        for file_path in data_files:
+            file = os.path.basename(file_path)
+            try:
+                # Extract indicator name from filename
+                indicator = os.path.splitext(file)[0].split('_')[-1]
+                
+                # Load data
+                df = pd.read_csv(file_path, index_col=0, parse_dates=True)
+                
+                # If single column, use filename as column name
+                if len(df.columns) == 1:
+                    all_data[indicator] = df.iloc[:, 0]
+                else:
+                    # Multiple columns, merge all
+                    for col in df.columns:
+                        all_data[f"{indicator}_{col}"] = df[col]
+            except Exception as e:
+                print(f"Error loading {file}: {e}")
         
         # Combine all series into a DataFrame
         if all_data:
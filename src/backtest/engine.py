@@ -1,13 +1,647 @@
 # src/backtest/engine.py
+"""
+Backtest Engine - Array-based backtesting of signal strategies
+
+Signals are computed for the whole history first (through the strategy's
+vectorized generate_signals when available). Trades are then resolved on
+arrays: for every possible entry the first bar whose high or low reaches the
+take profit or stop loss is found with a binary search over precomputed
+window maxima and minima, so finding an exit costs O(log max_hold) instead of
+a walk over the bars it is held. Only one position is open at a time; the
+next entry is the first signal after the previous exit.
+
+run_event_driven instead feeds the bars one at a time through the trading
+loop shared with live trading (strategy, risk manager and portfolio
+orchestrator), with a profile of where the time goes.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from .metrics import PerformanceMetrics
+from .event_loop import TradingLoop, LoopProfiler
+
+# Signal values and the direction of the trade they open
+SIGNAL_DIRECTIONS = {
+    "STRONG_BUY": 1,
+    "BUY": 1,
+    "NEUTRAL": 0,
+    "SELL": -1,
+    "STRONG_SELL": -1
+}
+
+# Exit reasons in the trades table
+EXIT_REASONS = ['take_profit', 'stop_loss', 'time']
+
+# Market data columns that are not macro indicators
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'pair', 'pip_factor']
+
+
+def _extrema_tables(values, levels, func, fill):
+    """Maxima (or minima) of values over windows of 1, 2, 4, ... bars
+
+    tables[k][i] covers values[i:i + 2**k]; windows running past the end are
+    padded with fill.
+    """
+    tables = [values]
+    for k in range(1, levels):
+        step = 1 << (k - 1)
+        prev = tables[-1]
+        table = np.full(len(values), fill)
+        if step < len(values):
+            table[:-step] = func(prev[:-step], prev[step:])
+        tables.append(table)
+    return tables
+
+
+def _first_hit(tables, start, count, level, above):
+    """Index of the first bar in [start, start + count) reaching level
+
+    Skips the largest bar windows that stay on the near side of the level,
+    from the widest table down. Returns -1 where no bar reaches it.
+    """
+    n = len(tables[0])
+    pos = start.copy()
+    remaining = count.copy()
+    for k in range(len(tables) - 1, -1, -1):
+        step = 1 << k
+        window = tables[k][np.minimum(pos, n - 1)]
+        clear = (step <= remaining) & ((window < level) if above else (window > level))
+        pos += step * clear
+        remaining -= step * clear
+    return np.where(remaining > 0, pos, -1)
+
+
+def _nanoseconds(index):
+    """Timestamps of a DatetimeIndex as int64 nanoseconds, whatever its unit"""
+    return index.values.astype('datetime64[ns]').view(np.int64)
+
+
+def hold_limits(index, max_hold, n_bars=None):
+    """Last bar each entry may be held to
+
+    max_hold is in hours for a DatetimeIndex and in bars otherwise. The
+    limit is the first bar at or after the hold time has passed, the bar a
+    live loop would close the trade on. Every entry except the last bar may
+    be held at least one bar.
+    """
+    n = len(index) if index is not None else n_bars
+    bars = np.arange(n)
+    if isinstance(index, pd.DatetimeIndex):
+        times = _nanoseconds(index)
+        limit = times + int(pd.Timedelta(hours=max_hold).value)
+        last = np.searchsorted(times, limit, side='left')
+    else:
+        last = bars + int(max_hold)
+    return np.clip(np.maximum(last, bars + 1), 0, n - 1)
+
+
+def simulate_trades(high, low, close, directions, pip_factor, tp_pips, sl_pips, hold_end,
+                    open_=None, start_idx=0):
+    """Resolve trades for a signal direction array
+
+    A trade is entered at the close of a bar with a non-zero direction and
+    exits at the first later bar whose range reaches the take profit or stop
+    loss (the stop is assumed to fill first when a bar reaches both), or at
+    the close of its hold_end bar. With open prices, levels gapped through at
+    the open fill at the open. The next trade is entered on the first signal
+    after the exit bar.
+
+    Args:
+        high, low, close: Price arrays
+        directions: Array of 1 (long), -1 (short) or 0 per bar
+        pip_factor: Price units per pip divisor (100 for JPY pairs, 10000 otherwise)
+        tp_pips, sl_pips: Take profit and stop loss distances in pips
+        hold_end: Last bar each entry may be held to (see hold_limits)
+        open_: Open prices (optional)
+        start_idx: First bar that may open a trade
+
+    Returns:
+        Dictionary of arrays with one entry per trade: entry_idx, exit_idx,
+        direction, entry_price, exit_price, exit_reason (index into
+        EXIT_REASONS) and pips
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    directions = np.asarray(directions)
+    n = len(close)
+
+    candidates = np.flatnonzero(directions != 0)
+    candidates = candidates[(candidates >= start_idx) & (candidates < n - 1)]
+    empty = {
+        'entry_idx': np.empty(0, dtype=np.int64),
+        'exit_idx': np.empty(0, dtype=np.int64),
+        'direction': np.empty(0, dtype=np.int8),
+        'entry_price': np.empty(0),
+        'exit_price': np.empty(0),
+        'exit_reason': np.empty(0, dtype=np.int8),
+        'pips': np.empty(0)
+    }
+    if len(candidates) == 0:
+        return empty
+
+    # Exit of every candidate entry
+    direction = directions[candidates].astype(np.int8)
+    long = direction > 0
+    entry_price = close[candidates]
+    up_level = entry_price + np.where(long, tp_pips, sl_pips) / pip_factor
+    down_level = entry_price - np.where(long, sl_pips, tp_pips) / pip_factor
+
+    start = candidates + 1
+    count = hold_end[candidates] - candidates
+    levels = max(1, int(count.max()).bit_length())
+    up_hit = _first_hit(_extrema_tables(high, levels, np.maximum, -np.inf), start, count, up_level, True)
+    down_hit = _first_hit(_extrema_tables(low, levels, np.minimum, np.inf), start, count, down_level, False)
+
+    tp_hit = np.where(long, up_hit, down_hit)
+    sl_hit = np.where(long, down_hit, up_hit)
+    no_hit = np.iinfo(np.int64).max
+    tp_at = np.where(tp_hit < 0, no_hit, tp_hit)
+    sl_at = np.where(sl_hit < 0, no_hit, sl_hit)
+
+    stopped = sl_at <= tp_at
+    exit_reason = np.where(stopped, 1, 0).astype(np.int8)
+    exit_idx = np.minimum(tp_at, sl_at)
+    timed_out = exit_idx == no_hit
+    exit_reason[timed_out] = 2
+    exit_idx = np.where(timed_out, hold_end[candidates], exit_idx)
+
+    # One position at a time: follow the chain of next entries after each exit
+    next_entry = np.searchsorted(candidates, exit_idx, side='right').tolist()
+    chosen = []
+    i = 0
+    while i < len(candidates):
+        chosen.append(i)
+        i = next_entry[i]
+    chosen = np.array(chosen)
+
+    direction = direction[chosen]
+    entry_price = entry_price[chosen]
+    exit_idx = exit_idx[chosen]
+    exit_reason = exit_reason[chosen]
+    up_exit = (direction > 0) == (exit_reason == 0)
+    exit_price = np.where(exit_reason == 2, close[exit_idx],
+                          np.where(up_exit, up_level[chosen], down_level[chosen]))
+    if open_ is not None:
+        open_at_exit = np.asarray(open_, dtype=float)[exit_idx]
+        gapped_up = (exit_reason != 2) & up_exit & (open_at_exit > exit_price)
+        gapped_down = (exit_reason != 2) & ~up_exit & (open_at_exit < exit_price)
+        exit_price = np.where(gapped_up | gapped_down, open_at_exit, exit_price)
+
+    return {
+        'entry_idx': candidates[chosen],
+        'exit_idx': exit_idx,
+        'direction': direction,
+        'entry_price': entry_price,
+        'exit_price': exit_price,
+        'exit_reason': exit_reason,
+        'pips': (exit_price - entry_price) * direction * pip_factor
+    }
+
+
+def trade_excursions(high, low, trades, pip_factor, chunk_size=4096):
+    """Largest favorable and adverse moves of each trade and the bars to the favorable one
+
+    Args:
+        high, low: Price arrays
+        trades: Result of simulate_trades
+        pip_factor: Price units per pip divisor
+        chunk_size: Trades gathered at once
+
+    Returns:
+        Tuple of (max_favorable_pips, max_adverse_pips, bars_to_max)
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    entry_idx, exit_idx = trades['entry_idx'], trades['exit_idx']
+    n_trades = len(entry_idx)
+    favorable = np.zeros(n_trades)
+    adverse = np.zeros(n_trades)
+    bars_to_max = np.zeros(n_trades, dtype=np.int64)
+
+    for start in range(0, n_trades, chunk_size):
+        stop = min(start + chunk_size, n_trades)
+        entries = entry_idx[start:stop]
+        lengths = exit_idx[start:stop] - entries
+        offsets = np.arange(1, max(1, int(lengths.max())) + 1)
+        bars = np.minimum(entries[:, None] + offsets, len(high) - 1)
+        held = offsets <= lengths[:, None]
+        long = trades['direction'][start:stop, None] > 0
+        entry_price = trades['entry_price'][start:stop, None]
+
+        gains = np.where(long, high[bars] - entry_price, entry_price - low[bars])
+        losses = np.where(long, entry_price - low[bars], high[bars] - entry_price)
+        gains = np.where(held, gains, -np.inf)
+        losses = np.where(held, losses, -np.inf)
+        best = np.argmax(gains, axis=1)
+        favorable[start:stop] = np.maximum(gains[np.arange(stop - start), best], 0) * pip_factor
+        adverse[start:stop] = np.maximum(losses.max(axis=1), 0) * pip_factor
+        bars_to_max[start:stop] = best + 1
+
+    return favorable, adverse, bars_to_max
+
+
 class BacktestEngine:
-    """Enhanced backtesting engine"""
-    
-    def __init__(self, strategies, data_repository, parameters=None):
+    """
+    Enhanced backtesting engine
+
+    Parameters:
+    -----------
+    strategies : Strategy or list, optional
+        Strategies to backtest
+    data_repository : object, optional
+        Data source kept for callers that provide one
+    parameters : dict, optional
+        Overrides of the strategy's tp_pips, sl_pips and max_hold, and
+        'pair' and 'pip_factor' when the price data does not carry them
+    strategy : Strategy, optional
+        Single strategy (used when strategies is not given)
+    price_data : pd.DataFrame, optional
+        OHLC price data with optional 'pair', 'pip_factor' and 'signal' columns
+    additional_data : pd.DataFrame, optional
+        Macro data aligned with price_data
+    """
+
+    def __init__(self, strategies=None, data_repository=None, parameters=None, strategy=None,
+                 price_data=None, additional_data=None):
+        if strategies is None:
+            strategies = [strategy] if strategy is not None else []
         self.strategies = strategies if isinstance(strategies, list) else [strategies]
+        self.strategy = strategy if strategy is not None else (self.strategies[0] if self.strategies else None)
         self.data_repository = data_repository
         self.parameters = parameters or {}
+        self.price_data = price_data
+        self.additional_data = additional_data
         self.results = {}
-        
+
+        # Results of the latest run
+        self.trades_table = pd.DataFrame()
+        self.equity_curve = pd.DataFrame()
+        self.trades = []
+        self.signals = []
+        self.performance_metrics = {}
+
     def run(self, start_date=None, end_date=None, progress_callback=None):
         """Run backtest for all strategies and instruments"""
-        # Implementation...
\ No newline at end of file
+        if self.price_data is None:
+            raise ValueError("No price data to backtest")
+
+        dates = self.price_data.index
+        start_idx = int(np.searchsorted(dates, pd.Timestamp(start_date))) if start_date is not None else 0
+        end_idx = int(np.searchsorted(dates, pd.Timestamp(end_date), side='right')) if end_date is not None else None
+
+        for strategy in self.strategies:
+            self.strategy = strategy
+            self.results[strategy.name] = self.run_backtest(
+                start_idx=start_idx, end_idx=end_idx, progress_callback=progress_callback)
+        return self.results
+
+    def run_backtest(self, start_idx=0, end_idx=None, signals=None, metrics=None, progress_callback=None):
+        """
+        Backtest the strategy over the price data.
+
+        Bars before start_idx still feed the signal generator (warmup) but do
+        not open trades.
+
+        Parameters:
+        -----------
+        start_idx : int
+            First bar that may open a trade
+        end_idx : int, optional
+            Bar after the last one used (default: all bars)
+        signals : pd.Series or array, optional
+            Precomputed signal per bar (default: the price data 'signal'
+            column, or the strategy's signals)
+        metrics : pd.DataFrame, optional
+            Cloud system metrics per bar, used for regime and setup analysis
+        progress_callback : callable, optional
+            Called as progress_callback(progress, elapsed, eta) after each stage
+
+        Returns:
+        --------
+        dict
+            'trades' (DataFrame), 'equity' (DataFrame), 'metrics' (dict) and 'signals' (Series)
+        """
+        started = time.perf_counter()
+
+        def report(progress):
+            if progress_callback is not None:
+                elapsed = time.perf_counter() - started
+                eta = elapsed / progress * (1 - progress) if progress > 0 else 0.0
+                progress_callback(progress, elapsed, eta)
+
+        price = self.price_data.iloc[:end_idx] if end_idx is not None else self.price_data
+        pair = self._pair(price)
+        pip_factor = self._pip_factor(price, pair)
+        tp_pips = self._parameter('tp_pips', 300)
+        sl_pips = self._parameter('sl_pips', 100)
+        max_hold = self._parameter('max_hold', 672)
+
+        # 1. Signals
+        if signals is None and 'signal' in price.columns:
+            signals = price['signal']
+        if signals is None:
+            signals, metrics = self._compute_signals(price, pair)
+        signals = pd.Series(np.asarray(signals, dtype=object), index=price.index, name='signal')
+        directions = signals.map(SIGNAL_DIRECTIONS).fillna(0).to_numpy(dtype=np.int8)
+        report(0.5)
+
+        # 2. Trades
+        hold_end = hold_limits(price.index, max_hold)
+        open_ = price['open'].to_numpy(dtype=float) if 'open' in price.columns else None
+        trades = simulate_trades(price['high'], price['low'], price['close'], directions, pip_factor,
+                                 tp_pips, sl_pips, hold_end, open_, start_idx)
+        report(0.8)
+
+        # 3. Trades table, equity curve and metrics
+        self.trades_table = self._trades_table(price, pair, pip_factor, trades, signals, metrics)
+        self.equity_curve = self._equity_curve(price, pip_factor, trades)
+        self.trades = self.trades_table.to_dict('records')
+        active = directions != 0
+        self.signals = [
+            {'pair': pair, 'time': t, 'signal': s, 'price': p}
+            for t, s, p in zip(price.index[active], signals.to_numpy()[active], price['close'].to_numpy()[active])
+        ]
+        self.performance_metrics = PerformanceMetrics(
+            self.trades_table, signals, {'equity_curve': self.equity_curve}).calculate_all()
+        report(1.0)
+
+        result = {
+            'trades': self.trades_table,
+            'equity': self.equity_curve,
+            'metrics': self.performance_metrics,
+            'signals': signals
+        }
+        self.results[pair] = result
+        return result
+
+    def run_event_driven(self, start_idx=0, end_idx=None, risk_manager=None, portfolio=None,
+                         profile=True, progress_callback=None):
+        """
+        Backtest the strategy bar by bar, as it would trade live.
+
+        Every bar is passed to the strategy's generate_signal; signals are
+        sized by the risk manager and executed through the portfolio
+        orchestrator when given. Without them trades use the strategy's
+        tp_pips and sl_pips and give the same trades as run_backtest.
+        A position still open at the end of the data is closed at the last
+        close.
+
+        Parameters:
+        -----------
+        start_idx : int
+            First bar that may open a trade (earlier bars warm up the strategy)
+        end_idx : int, optional
+            Bar after the last one used (default: all bars)
+        risk_manager : RiskManager, optional
+            Calculates stop loss, take profit and position size
+        portfolio : PortfolioOrchestrator, optional
+            Processes signals and holds positions (requires risk_manager)
+        profile : bool
+            Whether to time strategy, risk, portfolio and bookkeeping
+        progress_callback : callable, optional
+            Called as progress_callback(progress, elapsed, eta) every 4096 bars
+
+        Returns:
+        --------
+        dict
+            As run_backtest, plus 'profile' (time per section) when profiling
+        """
+        started = time.perf_counter()
+        price = self.price_data.iloc[:end_idx] if end_idx is not None else self.price_data
+        pair = self._pair(price)
+        pip_factor = self._pip_factor(price, pair)
+        n = len(price)
+
+        if self.additional_data is not None:
+            macro = self.additional_data.reindex(price.index)
+            macro = macro.drop(columns=[c for c in macro.columns if c in price.columns])
+            rows = price.join(macro)
+        else:
+            rows = price
+        names = [c for c in rows.columns if c not in ('pair', 'pip_factor')]
+        columns = [rows[c].tolist() for c in names]
+
+        if isinstance(price.index, pd.DatetimeIndex):
+            timestamps = price.index.to_pydatetime()
+        else:
+            timestamps = range(n)
+        open_ = price['open'].tolist() if 'open' in price.columns else [None] * n
+        high, low, close = (price[c].tolist() for c in ('high', 'low', 'close'))
+
+        profiler = LoopProfiler() if profile else None
+        balance = portfolio.portfolio.current_equity if portfolio is not None else 100000.0
+        loop = TradingLoop(self.strategy, pair, pip_factor, risk_manager=risk_manager, portfolio=portfolio,
+                           tp_pips=self._parameter('tp_pips', 300), sl_pips=self._parameter('sl_pips', 100),
+                           max_hold=self._parameter('max_hold', 672), balance=balance, profiler=profiler)
+
+        signals = np.empty(n, dtype=object)
+        realized = np.zeros(n)
+        open_pips = np.zeros(n)
+        last_entry = n - 1
+        for i, values in enumerate(zip(*columns)):
+            data = dict(zip(names, values))
+            data['pair'] = pair
+            signals[i] = loop.on_bar(i, timestamps[i], open_[i], high[i], low[i], close[i], data,
+                                     can_enter=start_idx <= i < last_entry)
+            realized[i] = loop.realized_pips
+            open_pips[i] = loop.open_pips
+            if progress_callback is not None and i & 4095 == 4095:
+                elapsed = time.perf_counter() - started
+                progress = (i + 1) / n
+                progress_callback(progress, elapsed, elapsed / progress * (1 - progress))
+
+        if loop.direction and n:
+            loop.close_position(n - 1, timestamps[n - 1], close[n - 1])
+            realized[n - 1] = loop.realized_pips
+            open_pips[n - 1] = 0.0
+
+        # Trades table, equity curve and metrics as in run_backtest
+        signals = pd.Series(signals, index=price.index, name='signal')
+        trades = loop.trade_arrays()
+        self.trades_table = self._trades_table(price, pair, pip_factor, trades, signals, None)
+        self.trades_table['size'] = [t['size'] for t in loop.trades]
+        for column in ('regime', 'precession', 'market_mood', 'instability'):
+            self.trades_table[column] = [t[column] for t in loop.trades]
+        equity = realized + open_pips
+        self.equity_curve = pd.DataFrame({
+            'realized_pips': realized,
+            'open_pips': open_pips,
+            'equity_pips': equity,
+            'drawdown_pips': equity - np.maximum.accumulate(equity) if n else equity
+        }, index=price.index)
+        self.trades = self.trades_table.to_dict('records')
+        active = signals.map(SIGNAL_DIRECTIONS).fillna(0).to_numpy() != 0
+        self.signals = [
+            {'pair': pair, 'time': t, 'signal': s, 'price': p}
+            for t, s, p in zip(price.index[active], signals.to_numpy()[active], price['close'].to_numpy()[active])
+        ]
+        self.performance_metrics = PerformanceMetrics(
+            self.trades_table, signals, {'equity_curve': self.equity_curve}).calculate_all()
+        if progress_callback is not None:
+            progress_callback(1.0, time.perf_counter() - started, 0.0)
+
+        result = {
+            'trades': self.trades_table,
+            'equity': self.equity_curve,
+            'metrics': self.performance_metrics,
+            'signals': signals
+        }
+        if profiler is not None:
+            result['profile'] = profiler.summary()
+            result['profile']['bars_per_second'] = n / (time.perf_counter() - started)
+        self.results[pair] = result
+        return result
+
+    def generate_playbook(self, min_trades=5):
+        """
+        Summarize the setups that performed best in the latest run.
+
+        Trades are grouped by pair, regime, market mood direction and
+        precession strength (above or below the median of traded bars).
+
+        Parameters:
+        -----------
+        min_trades : int
+            Smallest group reported
+
+        Returns:
+        --------
+        list
+            Setup dictionaries with pair, market_mood, precession, regime,
+            win_rate, avg_pips, sample_size and avg_time_to_max, by expected
+            pips per trade
+        """
+        trades = self.trades_table
+        if trades.empty:
+            return []
+
+        setups = pd.DataFrame({
+            'pair': trades['pair'],
+            'regime': trades['regime'] if 'regime' in trades.columns else 'ALL',
+            'market_mood': np.where(trades['direction'] > 0, 'Bullish', 'Bearish'),
+            'precession': 'Any',
+            'win': trades['pips'] > 0,
+            'pips': trades['pips'],
+            'time_to_max': trades['time_to_max']
+        })
+        if 'precession' in trades.columns:
+            strength = trades['precession'].abs()
+            setups['precession'] = np.where(strength >= strength.median(), 'Strong', 'Moderate')
+
+        grouped = setups.groupby(['pair', 'regime', 'market_mood', 'precession'], observed=True).agg(
+            win_rate=('win', 'mean'), avg_pips=('pips', 'mean'), sample_size=('pips', 'size'),
+            avg_time_to_max=('time_to_max', 'mean')).reset_index()
+        grouped = grouped[(grouped['sample_size'] >= min_trades) & (grouped['avg_pips'] > 0)]
+        grouped = grouped.assign(expected=grouped['win_rate'] * grouped['avg_pips'])
+        grouped = grouped.sort_values('expected', ascending=False).drop(columns='expected')
+        return grouped.to_dict('records')
+
+    def _parameter(self, name, default):
+        if name in self.parameters:
+            return self.parameters[name]
+        if self.strategy is not None:
+            return self.strategy.parameters.get(name, default)
+        return default
+
+    def _pair(self, price):
+        if 'pair' in price.columns and len(price):
+            return price['pair'].iloc[0]
+        if 'pair' in self.parameters:
+            return self.parameters['pair']
+        generator = getattr(self.strategy, 'signal_generator', None)
+        return getattr(generator, 'pair', 'USDJPY')
+
+    def _pip_factor(self, price, pair):
+        if 'pip_factor' in price.columns and len(price):
+            return float(price['pip_factor'].iloc[0])
+        if 'pip_factor' in self.parameters:
+            return float(self.parameters['pip_factor'])
+        return 100.0 if 'JPY' in pair else 10000.0
+
+    def _compute_signals(self, price, pair):
+        """Signals and cloud metrics for every bar from the strategy"""
+        if self.additional_data is not None:
+            macro = self.additional_data.reindex(price.index)
+        else:
+            macro = price.drop(columns=[c for c in PRICE_COLUMNS if c in price.columns])
+
+        generator = getattr(self.strategy, 'signal_generator', None)
+        if hasattr(self.strategy, 'generate_signals') and hasattr(generator, 'run_batch'):
+            metrics = generator.run_batch(macro, pair)
+            return self.strategy.generate_signals(metrics), metrics
+
+        # Strategies without a vectorized path are stepped bar by bar
+        rows = price.join(macro, rsuffix='_macro') if self.additional_data is not None else price
+        records = rows.to_dict('records')
+        signals = []
+        for record in records:
+            record['pair'] = pair
+            signal, _ = self.strategy.generate_signal(record)
+            signals.append(signal)
+        return pd.Series(signals, index=price.index), None
+
+    def _trades_table(self, price, pair, pip_factor, trades, signals, metrics):
+        """Trades as a DataFrame, one row per trade"""
+        entry_idx, exit_idx = trades['entry_idx'], trades['exit_idx']
+        index = price.index
+        favorable, adverse, bars_to_max = trade_excursions(price['high'], price['low'], trades, pip_factor)
+
+        if isinstance(index, pd.DatetimeIndex):
+            times = _nanoseconds(index)
+            hours = (times[exit_idx] - times[entry_idx]) / 3.6e12
+            time_to_max = (times[np.minimum(entry_idx + bars_to_max, len(index) - 1)] - times[entry_idx]) / 3.6e12
+        else:
+            hours = (exit_idx - entry_idx).astype(float)
+            time_to_max = bars_to_max.astype(float)
+
+        table = pd.DataFrame({
+            'pair': pair,
+            'signal': signals.to_numpy()[entry_idx],
+            'direction': trades['direction'],
+            'entry_idx': entry_idx,
+            'exit_idx': exit_idx,
+            'entry_time': index[entry_idx],
+            'exit_time': index[exit_idx],
+            'entry_price': trades['entry_price'],
+            'exit_price': trades['exit_price'],
+            'exit_reason': pd.Categorical.from_codes(trades['exit_reason'], categories=EXIT_REASONS),
+            'pips': trades['pips'],
+            'bars_held': exit_idx - entry_idx,
+            'hours_held': hours,
+            'max_favorable_pips': favorable,
+            'max_adverse_pips': adverse,
+            'time_to_max': time_to_max
+        })
+        if metrics is not None:
+            for column in ('regime', 'precession', 'market_mood', 'instability', 'lower_bound_probability'):
+                if column in metrics.columns:
+                    table[column] = metrics[column].to_numpy()[entry_idx]
+        return table
+
+    def _equity_curve(self, price, pip_factor, trades):
+        """Realized and open profit in pips at every bar's close"""
+        close = price['close'].to_numpy(dtype=float)
+        n = len(close)
+        realized = np.zeros(n)
+        np.add.at(realized, trades['exit_idx'], trades['pips'])
+        realized = np.cumsum(realized)
+
+        # Bars from each entry up to (not including) its exit
+        open_pips = np.zeros(n)
+        lengths = trades['exit_idx'] - trades['entry_idx']
+        if lengths.sum():
+            trade = np.repeat(np.arange(len(lengths)), lengths)
+            bars = trades['entry_idx'][trade] + np.arange(len(trade)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            open_pips[bars] = (close[bars] - trades['entry_price'][trade]) * trades['direction'][trade] * pip_factor
+
+        equity = realized + open_pips
+        return pd.DataFrame({
+            'realized_pips': realized,
+            'open_pips': open_pips,
+            'equity_pips': equity,
+            'drawdown_pips': equity - np.maximum.accumulate(equity)
+        }, index=price.index)
@@ -0,0 +1,378 @@
+# src/backtest/event_loop.py
+"""
+Event Loop - Per-bar trading logic shared by event-driven backtests and live trading
+
+TradingLoop.on_bar takes one bar and runs it through the same steps live
+trading does: exits of the open position are checked against the bar's
+range, the strategy's generate_signal is called, and a new signal goes
+through the risk manager's calculate_trade_parameters and the portfolio
+orchestrator's process_signals and execute_instructions. The loop keeps only
+the open position and running totals, so its state does not grow with the
+number of bars; closed trades are the only records kept.
+
+LoopProfiler attributes the loop's time to strategy, risk, portfolio and
+bookkeeping, counting time spent in the risk manager from within the
+portfolio orchestrator as risk.
+"""
+
+import time
+import datetime
+
+import numpy as np
+
+from balance_breaker.src.portfolio.models import AllocationInstruction, AllocationAction
+
+# Account currency value of one pip on a standard lot, as assumed by RiskManager
+STANDARD_LOT_PIP_VALUE = 10.0
+
+# Signals that open a position, by direction
+SIGNAL_DIRECTIONS = {"STRONG_BUY": 1, "BUY": 1, "SELL": -1, "STRONG_SELL": -1}
+
+# Exit reason codes, as in the vectorized engine's EXIT_REASONS
+TAKE_PROFIT, STOP_LOSS, TIME_EXIT = 0, 1, 2
+
+
+class LoopProfiler:
+    """
+    Exclusive time spent in each section of the trading loop
+
+    Sections may nest; time in an inner section is not counted in the
+    section that contains it.
+    """
+
+    sections = ('strategy', 'risk', 'portfolio', 'bookkeeping')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Clear all totals"""
+        self._totals = dict.fromkeys(self.sections, 0)
+        self._calls = dict.fromkeys(self.sections, 0)
+        self._stack = []
+        self.bars = 0
+
+    def enter(self, section):
+        """Start timing a section, pausing the enclosing one"""
+        now = time.perf_counter_ns()
+        if self._stack:
+            outer = self._stack[-1]
+            self._totals[outer[0]] += now - outer[1]
+        self._stack.append([section, now])
+
+    def exit(self):
+        """Stop timing the innermost section, resuming the enclosing one"""
+        now = time.perf_counter_ns()
+        section, started = self._stack.pop()
+        self._totals[section] += now - started
+        self._calls[section] += 1
+        if self._stack:
+            self._stack[-1][1] = now
+
+    def summary(self):
+        """
+        Time per section
+
+        Returns:
+        --------
+        dict
+            By section: total seconds, calls, share of the profiled time and
+            microseconds per bar
+        """
+        total = sum(self._totals.values())
+        return {
+            section: {
+                'seconds': self._totals[section] / 1e9,
+                'calls': self._calls[section],
+                'share': self._totals[section] / total if total else 0.0,
+                'us_per_bar': self._totals[section] / 1e3 / self.bars if self.bars else 0.0
+            }
+            for section in self.sections
+        }
+
+
+class _ProfiledRiskManager:
+    """Risk manager wrapper that times calculate_trade_parameters as risk"""
+
+    def __init__(self, risk_manager, profiler):
+        self._risk_manager = risk_manager
+        self._profiler = profiler
+
+    def calculate_trade_parameters(self, *args, **kwargs):
+        self._profiler.enter('risk')
+        try:
+            return self._risk_manager.calculate_trade_parameters(*args, **kwargs)
+        finally:
+            self._profiler.exit()
+
+    def __getattr__(self, name):
+        return getattr(self._risk_manager, name)
+
+
+class TradingLoop:
+    """
+    Bar-by-bar trading of one instrument
+
+    Parameters:
+    -----------
+    strategy : Strategy
+        Strategy whose generate_signal is called on every bar
+    pair : str
+        Instrument traded
+    pip_factor : float
+        Price units per pip divisor (100 for JPY pairs, 10000 otherwise)
+    risk_manager : RiskManager, optional
+        Sizes trades and sets their stop loss and take profit
+    portfolio : PortfolioOrchestrator, optional
+        Turns signals into positions (requires risk_manager)
+    tp_pips, sl_pips : float
+        Take profit and stop loss distances used without a risk manager
+    max_hold : float
+        Longest hold, in hours for datetime timestamps and bars otherwise
+    balance : float
+        Account balance used for sizing without a portfolio
+    profiler : LoopProfiler, optional
+        Records time per section
+    """
+
+    def __init__(self, strategy, pair, pip_factor, risk_manager=None, portfolio=None,
+                 tp_pips=300, sl_pips=100, max_hold=672, balance=100000.0, profiler=None):
+        if portfolio is not None and risk_manager is None:
+            raise ValueError("A portfolio orchestrator needs a risk manager")
+        self.strategy = strategy
+        self.pair = pair
+        self.pip_factor = float(pip_factor)
+        self.portfolio = portfolio
+        self.tp_pips = tp_pips
+        self.sl_pips = sl_pips
+        self.max_hold = max_hold
+        self.balance = balance
+        self.profiler = profiler
+        self.risk_manager = risk_manager
+        if risk_manager is not None and profiler is not None:
+            self.risk_manager = _ProfiledRiskManager(risk_manager, profiler)
+
+        # Open position
+        self.direction = 0
+        self.entry_index = -1
+        self.entry_price = 0.0
+        self.stop_loss = 0.0
+        self.take_profit = 0.0
+        self.size = 0.0
+        self.hold_until = None
+        self.position_id = None
+        self.entry_signal = None
+        self.entry_metrics = None
+
+        # Running totals and closed trades
+        self.realized_pips = 0.0
+        self._open_pips = 0.0
+        self.trades = []
+
+    @property
+    def open_pips(self):
+        """Profit of the open position at its last marked price"""
+        return self._open_pips
+
+    def on_bar(self, index, timestamp, open_, high, low, close, data, can_enter=True):
+        """
+        Process one bar.
+
+        Parameters:
+        -----------
+        index : int
+            Bar number
+        timestamp : datetime or int
+            Bar time (max_hold counts hours for datetimes and bars otherwise)
+        open_, high, low, close : float
+            Bar prices (open_ may be None)
+        data : dict
+            Market data passed to the strategy, including macro indicators
+        can_enter : bool
+            Whether a signal on this bar may open a position
+
+        Returns:
+        --------
+        str
+            The strategy's signal
+        """
+        profiler = self.profiler
+        exited = False
+
+        # 1. Exits of the open position
+        if self.direction:
+            if profiler is not None:
+                profiler.enter('bookkeeping')
+            exit_reason, exit_price = self._check_exit(index, timestamp, open_, high, low, close)
+            if profiler is not None:
+                profiler.exit()
+            if exit_reason is not None:
+                self.close_position(index, timestamp, exit_price, exit_reason)
+                exited = True
+
+        # 2. Strategy
+        if profiler is not None:
+            profiler.enter('strategy')
+        signal, metrics = self.strategy.generate_signal(data)
+        if profiler is not None:
+            profiler.exit()
+
+        # 3. Entry through risk management and the portfolio
+        direction = SIGNAL_DIRECTIONS.get(signal, 0)
+        if direction and can_enter and not self.direction and not exited:
+            self._open_position(index, timestamp, direction, close, signal, metrics)
+
+        # 4. Mark to market
+        if profiler is not None:
+            profiler.enter('portfolio' if self.portfolio is not None else 'bookkeeping')
+        self._open_pips = (close - self.entry_price) * self.direction * self.pip_factor if self.direction else 0.0
+        if self.portfolio is not None:
+            self.portfolio.update_portfolio_state({self.pair: close}, timestamp)
+        if profiler is not None:
+            profiler.exit()
+            profiler.bars += 1
+
+        return signal
+
+    def _check_exit(self, index, timestamp, open_, high, low, close):
+        """Exit reason and price of the open position on this bar, if any"""
+        if self.direction > 0:
+            if low <= self.stop_loss:
+                return STOP_LOSS, min(self.stop_loss, open_) if open_ is not None else self.stop_loss
+            if high >= self.take_profit:
+                return TAKE_PROFIT, max(self.take_profit, open_) if open_ is not None else self.take_profit
+        else:
+            if high >= self.stop_loss:
+                return STOP_LOSS, max(self.stop_loss, open_) if open_ is not None else self.stop_loss
+            if low <= self.take_profit:
+                return TAKE_PROFIT, min(self.take_profit, open_) if open_ is not None else self.take_profit
+        limit = timestamp if isinstance(timestamp, datetime.datetime) else index
+        if limit >= self.hold_until:
+            return TIME_EXIT, close
+        return None, None
+
+    def _open_position(self, index, timestamp, direction, price, signal, metrics):
+        """Size and open a position for a signal, if risk and portfolio accept it"""
+        profiler = self.profiler
+        stop_loss = price - direction * self.sl_pips / self.pip_factor
+        take_profit = price + direction * self.tp_pips / self.pip_factor
+        size = 1.0
+        position_id = None
+
+        if self.portfolio is not None:
+            if profiler is not None:
+                profiler.enter('portfolio')
+            signals = {self.pair: {
+                'instrument': self.pair,
+                'direction': direction,
+                'price': price,
+                'pip_factor': self.pip_factor,
+                'strategy': getattr(self.strategy, 'name', 'Unknown')
+            }}
+            instructions = self.portfolio.process_signals(signals, self.risk_manager, timestamp)
+            self.portfolio.execute_instructions(instructions, {self.pair: price}, timestamp)
+            position = self.portfolio.portfolio.positions.get(self.pair)
+            if profiler is not None:
+                profiler.exit()
+            if position is None:
+                return
+            stop_loss = position.stop_loss if position.stop_loss is not None else stop_loss
+            if position.take_profit is not None:
+                take_profit = position.take_profit[0] if isinstance(position.take_profit, (list, tuple)) else position.take_profit
+            size = position.position_size
+            position_id = position.position_id
+        elif self.risk_manager is not None:
+            params = self.risk_manager.calculate_trade_parameters(
+                instrument=self.pair, price=price, direction=direction,
+                balance=self.balance, pip_factor=self.pip_factor)
+            if params is None:
+                return
+            stop_loss = params.stop_loss
+            take_profit = params.take_profit[0] if isinstance(params.take_profit, (list, tuple)) else params.take_profit
+            size = params.position_size
+
+        if profiler is not None:
+            profiler.enter('bookkeeping')
+        self.direction = direction
+        self.entry_index = index
+        self.entry_price = price
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.size = size
+        self.position_id = position_id
+        self.entry_signal = signal
+        self.entry_metrics = metrics
+        if isinstance(timestamp, datetime.datetime):
+            self.hold_until = timestamp + datetime.timedelta(hours=self.max_hold)
+        else:
+            self.hold_until = index + self.max_hold
+        if profiler is not None:
+            profiler.exit()
+
+    def close_position(self, index, timestamp, price, reason=TIME_EXIT):
+        """Close the open position at a price and record the trade"""
+        if not self.direction:
+            return
+        profiler = self.profiler
+
+        if self.portfolio is not None:
+            if profiler is not None:
+                profiler.enter('portfolio')
+            self.portfolio.execute_instructions([AllocationInstruction(
+                instrument=self.pair,
+                action=AllocationAction.CLOSE,
+                direction=self.direction,
+                target_size=0,
+                entry_price=price,
+                position_id=self.position_id,
+                strategy_name=getattr(self.strategy, 'name', 'Unknown'),
+                timestamp=timestamp
+            )], {self.pair: price}, timestamp)
+            if profiler is not None:
+                profiler.exit()
+        if self.risk_manager is not None:
+            if profiler is not None:
+                profiler.enter('risk')
+            self.risk_manager.remove_exposure(self.pair)
+            if profiler is not None:
+                profiler.exit()
+
+        if profiler is not None:
+            profiler.enter('bookkeeping')
+        pips = (price - self.entry_price) * self.direction * self.pip_factor
+        self.realized_pips += pips
+        if self.portfolio is None:
+            self.balance += pips * self.size * STANDARD_LOT_PIP_VALUE
+        metrics = self.entry_metrics or {}
+        self.trades.append({
+            'entry_idx': self.entry_index,
+            'exit_idx': index,
+            'direction': self.direction,
+            'entry_price': self.entry_price,
+            'exit_price': price,
+            'exit_reason': reason,
+            'pips': pips,
+            'size': self.size,
+            'regime': metrics.get('regime'),
+            'precession': metrics.get('precession'),
+            'market_mood': metrics.get('market_mood'),
+            'instability': metrics.get('instability')
+        })
+        self.direction = 0
+        self.position_id = None
+        self.entry_metrics = None
+        if profiler is not None:
+            profiler.exit()
+
+    def trade_arrays(self):
+        """Closed trades as arrays in the layout of simulate_trades"""
+        trades = self.trades
+        return {
+            'entry_idx': np.array([t['entry_idx'] for t in trades], dtype=np.int64),
+            'exit_idx': np.array([t['exit_idx'] for t in trades], dtype=np.int64),
+            'direction': np.array([t['direction'] for t in trades], dtype=np.int8),
+            'entry_price': np.array([t['entry_price'] for t in trades], dtype=float),
+            'exit_price': np.array([t['exit_price'] for t in trades], dtype=float),
+            'exit_reason': np.array([t['exit_reason'] for t in trades], dtype=np.int8),
+            'pips': np.array([t['pips'] for t in trades], dtype=float)
+        }
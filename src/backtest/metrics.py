@@ -1,20 +1,115 @@
 # src/backtest/metrics.py
+import numpy as np
+import pandas as pd
+
+
 class PerformanceMetrics:
     """Calculate and store performance metrics"""
-    
+
     def __init__(self, trades, signals, parameters=None):
-        self.trades = trades
+        self.trades = trades if isinstance(trades, pd.DataFrame) else pd.DataFrame(list(trades))
         self.signals = signals
         self.parameters = parameters or {}
         self.metrics = {}
-        
+
     def calculate_all(self):
         """Calculate all performance metrics"""
         self.calculate_basic_metrics()
         self.calculate_risk_metrics()
         self.calculate_time_metrics()
         return self.metrics
-        
+
     def calculate_basic_metrics(self):
         """Calculate basic performance metrics"""
-        # Implementation...
\ No newline at end of file
+        trades = self.trades
+        pips = trades['pips'].to_numpy(dtype=float) if 'pips' in trades.columns else np.empty(0)
+        wins = pips[pips > 0]
+        losses = pips[pips <= 0]
+        gross_loss = -losses.sum()
+
+        self.metrics.update({
+            'total_trades': len(pips),
+            'win_rate': len(wins) / len(pips) if len(pips) else 0.0,
+            'total_pips': float(pips.sum()),
+            'avg_pips': float(pips.mean()) if len(pips) else 0.0,
+            'profit_factor': float(wins.sum() / gross_loss) if gross_loss > 0 else (float('inf') if len(wins) else 0.0),
+            'avg_win': float(wins.mean()) if len(wins) else 0.0,
+            'avg_loss': float(losses.mean()) if len(losses) else 0.0
+        })
+
+        if 'exit_reason' in trades.columns:
+            reasons = trades['exit_reason'].astype(str).value_counts()
+            self.metrics['tp_count'] = int(reasons.get('take_profit', 0))
+            self.metrics['sl_count'] = int(reasons.get('stop_loss', 0))
+            self.metrics['time_count'] = int(reasons.get('time', 0))
+
+        if self.signals is not None:
+            signals = pd.Series(np.asarray(self.signals, dtype=object))
+            self.metrics['signal_count'] = int((signals.notna() & (signals != "NEUTRAL")).sum())
+
+        # Breakdowns by regime and by signal type
+        for column, key in (('regime', 'regime_performance'), ('signal', 'signal_performance')):
+            if column in trades.columns and len(trades):
+                self.metrics[key] = self._group_performance(trades[column])
+
+        return self.metrics
+
+    def calculate_risk_metrics(self):
+        """Calculate drawdown and per-trade risk metrics"""
+        trades = self.trades
+        pips = trades['pips'].to_numpy(dtype=float) if 'pips' in trades.columns else np.empty(0)
+
+        # Drawdown of cumulative trade results, or of the equity curve if given
+        equity = self.parameters.get('equity_curve')
+        if equity is not None and len(equity):
+            curve = equity['equity_pips'].to_numpy(dtype=float)
+        else:
+            curve = np.cumsum(pips)
+        if len(curve):
+            drawdown = curve - np.maximum.accumulate(np.maximum(curve, 0))
+            self.metrics['max_drawdown_pips'] = float(-drawdown.min())
+        else:
+            self.metrics['max_drawdown_pips'] = 0.0
+
+        std = pips.std(ddof=1) if len(pips) > 1 else 0.0
+        self.metrics['pips_std'] = float(std)
+        self.metrics['trade_sharpe'] = float(pips.mean() / std) if std > 0 else 0.0
+        self.metrics['expectancy'] = self.metrics.get('avg_pips', float(pips.mean()) if len(pips) else 0.0)
+
+        if 'max_adverse_pips' in trades.columns and len(trades):
+            self.metrics['avg_adverse_pips'] = float(trades['max_adverse_pips'].mean())
+            self.metrics['avg_favorable_pips'] = float(trades['max_favorable_pips'].mean())
+
+        return self.metrics
+
+    def calculate_time_metrics(self):
+        """Calculate holding time and calendar metrics"""
+        trades = self.trades
+        if trades.empty:
+            self.metrics.update({'avg_hold_hours': 0.0, 'avg_time_to_max': 0.0, 'monthly_performance': {}})
+            return self.metrics
+
+        self.metrics['avg_hold_hours'] = float(trades['hours_held'].mean()) if 'hours_held' in trades.columns else 0.0
+        self.metrics['avg_time_to_max'] = float(trades['time_to_max'].mean()) if 'time_to_max' in trades.columns else 0.0
+
+        # Results by month of exit
+        monthly = {}
+        if 'exit_time' in trades.columns and pd.api.types.is_datetime64_any_dtype(trades['exit_time']):
+            months = trades['exit_time'].dt.strftime('%Y-%m')
+            grouped = trades['pips'].groupby(months)
+            for month, count, total, wins in zip(grouped.size().index, grouped.size(), grouped.sum(),
+                                                 (trades['pips'] > 0).groupby(months).sum()):
+                monthly[month] = {'count': int(count), 'pips': float(total), 'wins': int(wins)}
+        self.metrics['monthly_performance'] = monthly
+
+        return self.metrics
+
+    def _group_performance(self, keys):
+        """Count, win rate and total pips of the trades for each key"""
+        pips = self.trades['pips']
+        grouped = pd.DataFrame({'key': np.asarray(keys, dtype=object), 'pips': pips.to_numpy(), 'win': (pips > 0).to_numpy()})
+        summary = grouped.groupby('key').agg(count=('pips', 'size'), win_rate=('win', 'mean'), pips=('pips', 'sum'))
+        return {
+            key: {'count': int(row['count']), 'win_rate': float(row['win_rate']), 'pips': float(row['pips'])}
+            for key, row in summary.iterrows()
+        }
@@ -0,0 +1,456 @@
+# src/backtest/sweep.py
+"""
+Parameter Sweep - Parallel backtests over strategy parameter spaces
+
+The cloud system metrics of the price history are computed once, then each
+parameter set only reclassifies them (through the strategy's vectorized
+generate_signals) and resolves its trades with simulate_trades. Prices and
+metrics are placed in one shared memory block that the worker processes map
+read-only instead of receiving a copy each. Runs sharing signal parameters
+are batched together so a worker classifies the signals once for all their
+trade parameter variations.
+
+Results are written to a directory of columnar parts as they arrive. A sweep
+restarted on the same directory skips the runs already recorded.
+"""
+
+import copy
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from .engine import BacktestEngine, SIGNAL_DIRECTIONS, hold_limits, simulate_trades
+
+# Parameters used when resolving trades; all others change the signals
+TRADE_PARAMETERS = ('tp_pips', 'sl_pips', 'max_hold')
+
+
+def grid_space(grid):
+    """
+    All combinations of parameter values.
+
+    Parameters:
+    -----------
+    grid : dict
+        Values to try for each parameter name
+
+    Returns:
+    --------
+    list
+        Parameter dictionaries
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def random_space(ranges, n_samples, method='random', seed=None):
+    """
+    Parameter sets sampled from ranges.
+
+    Parameters:
+    -----------
+    ranges : dict
+        For each parameter a (low, high) range, sampled as integers when both
+        bounds are integers, or a list of values to choose from
+    n_samples : int
+        Number of parameter sets
+    method : str
+        'random' for independent uniform samples or 'lhs' for a Latin
+        hypercube, which places one sample in each of n_samples equal strata
+        of every range
+    seed : int, optional
+        Random seed
+
+    Returns:
+    --------
+    list
+        Parameter dictionaries
+    """
+    if method not in ('random', 'lhs'):
+        raise ValueError(f"Unknown sampling method: {method}")
+    rng = np.random.default_rng(seed)
+    samples = [{} for _ in range(n_samples)]
+    for name, spec in ranges.items():
+        if method == 'lhs':
+            u = (rng.permutation(n_samples) + rng.random(n_samples)) / n_samples
+        else:
+            u = rng.random(n_samples)
+
+        if isinstance(spec, tuple) and len(spec) == 2:
+            low, high = spec
+            if isinstance(low, (int, np.integer)) and isinstance(high, (int, np.integer)):
+                values = [int(v) for v in np.minimum(low + np.floor(u * (high - low + 1)), high)]
+            else:
+                values = [float(v) for v in low + u * (high - low)]
+        else:
+            choices = list(spec)
+            values = [choices[i] for i in np.minimum((u * len(choices)).astype(int), len(choices) - 1)]
+
+        for sample, value in zip(samples, values):
+            sample[name] = value
+    return samples
+
+
+class SharedArrays:
+    """
+    Named arrays in one shared memory block
+
+    Parameters:
+    -----------
+    arrays : dict
+        Arrays to copy into the block, by name
+    """
+
+    def __init__(self, arrays):
+        layout = []
+        offset = 0
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            layout.append((name, array.dtype.str, array.shape, offset))
+            offset += -(-array.nbytes // 64) * 64
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (name, dtype, shape, start), array in zip(layout, arrays.values()):
+            np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=start)[...] = array
+        self.spec = (self.shm.name, layout)
+
+    @staticmethod
+    def attach(spec):
+        """
+        Map a block created by another process.
+
+        Returns:
+        --------
+        tuple
+            (SharedMemory, dict of read-only array views); keep the
+            SharedMemory referenced while the views are used
+        """
+        name, layout = spec
+        shm = shared_memory.SharedMemory(name=name)
+        arrays = {}
+        for key, dtype, shape, offset in layout:
+            view = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            view.flags.writeable = False
+            arrays[key] = view
+        return shm, arrays
+
+    def release(self):
+        """Free the block"""
+        self.shm.close()
+        self.shm.unlink()
+
+
+class ResultsTable:
+    """
+    Append-only table of sweep results stored as columnar parts
+
+    Rows are buffered and written every flush_rows rows as a .npz file with
+    one array per column, so an interrupted sweep loses at most the buffered
+    rows. Parts are written to a temporary name and renamed into place.
+
+    Parameters:
+    -----------
+    directory : str, optional
+        Directory of the parts (default: keep results in memory only)
+    flush_rows : int
+        Rows buffered before a part is written
+    """
+
+    def __init__(self, directory=None, flush_rows=64):
+        self.directory = directory
+        self.flush_rows = flush_rows
+        self._parts = []
+        self._buffer = []
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            for filename in sorted(os.listdir(directory)):
+                if filename.startswith('part-') and filename.endswith('.npz'):
+                    with np.load(os.path.join(directory, filename)) as part:
+                        self._parts.append({key: part[key] for key in part.files})
+
+    @property
+    def completed(self):
+        """Run ids already recorded"""
+        ids = set()
+        for part in self._parts:
+            ids.update(part['run_id'].tolist())
+        ids.update(row['run_id'] for row in self._buffer)
+        return ids
+
+    def append(self, row):
+        """Add one result row"""
+        self._buffer.append(row)
+        if len(self._buffer) >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered rows as a new part"""
+        if not self._buffer:
+            return
+        columns = {key: np.array([row.get(key) for row in self._buffer]) for key in self._buffer[0]}
+        self._buffer = []
+        self._parts.append(columns)
+        if self.directory is not None:
+            path = os.path.join(self.directory, f"part-{len(self._parts):06d}.npz")
+            temporary = path + '.tmp'
+            with open(temporary, 'wb') as f:
+                np.savez(f, **columns)
+            os.replace(temporary, path)
+
+    def to_frame(self):
+        """All results as a DataFrame ordered by run id"""
+        parts = self._parts + ([{key: np.array([row.get(key) for row in self._buffer]) for key in self._buffer[0]}]
+                               if self._buffer else [])
+        if not parts:
+            return pd.DataFrame()
+        frame = pd.concat([pd.DataFrame(part) for part in parts], ignore_index=True)
+        return frame.sort_values('run_id', ignore_index=True)
+
+    def __len__(self):
+        return sum(len(part['run_id']) for part in self._parts) + len(self._buffer)
+
+
+def summarize_trades(trades):
+    """Performance summary of simulate_trades output as scalars"""
+    pips = trades['pips']
+    wins = pips[pips > 0]
+    gross_loss = -pips[pips <= 0].sum()
+    curve = np.cumsum(pips)
+    std = pips.std(ddof=1) if len(pips) > 1 else 0.0
+    reasons = np.bincount(trades['exit_reason'], minlength=3)
+    return {
+        'total_trades': len(pips),
+        'win_rate': len(wins) / len(pips) if len(pips) else 0.0,
+        'total_pips': float(pips.sum()),
+        'avg_pips': float(pips.mean()) if len(pips) else 0.0,
+        'profit_factor': float(wins.sum() / gross_loss) if gross_loss > 0 else (float('inf') if len(wins) else 0.0),
+        'max_drawdown_pips': float(-(curve - np.maximum.accumulate(np.maximum(curve, 0))).min()) if len(pips) else 0.0,
+        'trade_sharpe': float(pips.mean() / std) if std > 0 else 0.0,
+        'tp_count': int(reasons[0]),
+        'sl_count': int(reasons[1]),
+        'time_count': int(reasons[2])
+    }
+
+
+# State of a sweep worker process, set by _init_worker
+_worker = {}
+
+
+def _init_worker(spec, categories, strategy, pip_factor, start_idx, shared=True):
+    """Map the shared arrays and rebuild the metrics frame in a worker"""
+    if shared:
+        shm, arrays = SharedArrays.attach(spec)
+    else:
+        shm, arrays = None, spec
+    index = pd.DatetimeIndex(arrays['time'].view('datetime64[ns]')) if 'time' in arrays else None
+    metrics = pd.DataFrame({
+        name[len('metric:'):]: (pd.Categorical.from_codes(values, categories=categories[name])
+                                if name in categories else values)
+        for name, values in arrays.items() if name.startswith('metric:')
+    }, copy=False)
+    _worker.clear()
+    _worker.update({
+        'shm': shm,
+        'arrays': arrays,
+        'index': index,
+        'metrics': metrics,
+        'strategy': strategy,
+        'base_parameters': dict(strategy.parameters),
+        'pip_factor': pip_factor,
+        'start_idx': start_idx,
+        'hold_ends': {}
+    })
+
+
+def _run_batch(batch):
+    """Backtest a batch of (run_id, parameters) in a worker"""
+    arrays = _worker['arrays']
+    strategy = _worker['strategy']
+    rows = []
+    signal_key = None
+    directions = None
+    for run_id, params in batch:
+        parameters = {**_worker['base_parameters'], **params}
+        key = tuple(sorted((k, v) for k, v in parameters.items() if k not in TRADE_PARAMETERS))
+        if key != signal_key:
+            strategy.parameters = parameters
+            signals = pd.Categorical(strategy.generate_signals(_worker['metrics']))
+            # Direction of each category, with missing signals (code -1) as no trade
+            table = np.array([SIGNAL_DIRECTIONS.get(c, 0) for c in signals.categories] + [0], dtype=np.int8)
+            directions = table[signals.codes]
+            signal_key = key
+
+        max_hold = parameters.get('max_hold', 672)
+        hold_end = _worker['hold_ends'].get(max_hold)
+        if hold_end is None:
+            hold_end = hold_limits(_worker['index'], max_hold, n_bars=len(arrays['close']))
+            _worker['hold_ends'][max_hold] = hold_end
+
+        trades = simulate_trades(arrays['high'], arrays['low'], arrays['close'], directions,
+                                 _worker['pip_factor'], parameters.get('tp_pips', 300),
+                                 parameters.get('sl_pips', 100), hold_end, arrays.get('open'),
+                                 _worker['start_idx'])
+        rows.append({'run_id': run_id, **params, **summarize_trades(trades)})
+    return rows
+
+
+class ParameterSweep:
+    """
+    Backtests of one strategy and pair over many parameter sets
+
+    Parameters:
+    -----------
+    strategy : Strategy
+        Strategy with a vectorized generate_signals and a signal generator
+        with run_batch (such as BalanceBreakerStrategy)
+    price_data : pd.DataFrame
+        OHLC price data, as for BacktestEngine
+    additional_data : pd.DataFrame, optional
+        Macro data aligned with price_data
+    metrics : pd.DataFrame, optional
+        Precomputed cloud system metrics per bar (default: computed with the
+        strategy's signal generator)
+    start_idx : int
+        First bar that may open a trade
+    parameters : dict, optional
+        'pair' and 'pip_factor' when the price data does not carry them
+    """
+
+    def __init__(self, strategy, price_data, additional_data=None, metrics=None, start_idx=0, parameters=None):
+        if not hasattr(strategy, 'generate_signals'):
+            raise ValueError("Parameter sweeps need a strategy with generate_signals")
+        engine = BacktestEngine(strategy=strategy, price_data=price_data, additional_data=additional_data,
+                                parameters=parameters)
+        self.strategy = strategy
+        self.price_data = price_data
+        self.start_idx = start_idx
+        self.pair = engine._pair(price_data)
+        self.pip_factor = engine._pip_factor(price_data, self.pair)
+        if metrics is None:
+            _, metrics = engine._compute_signals(price_data, self.pair)
+            if metrics is None:
+                raise ValueError("The strategy's signal generator has no run_batch to precompute metrics")
+        self.metrics = metrics
+
+    def run(self, space, results_dir=None, max_workers=None, batch_size=16, progress_callback=None):
+        """
+        Backtest every parameter set in a space.
+
+        Parameters:
+        -----------
+        space : list
+            Parameter dictionaries (see grid_space and random_space); values
+            override the strategy's parameters
+        results_dir : str, optional
+            Directory to stream results to; a sweep of the same space and
+            data resumes from the runs already recorded there
+        max_workers : int, optional
+            Worker processes (default: one per CPU; 0 runs in this process)
+        batch_size : int
+            Runs sent to a worker at a time
+        progress_callback : callable, optional
+            Called as progress_callback(completed, total, elapsed) as batches finish
+
+        Returns:
+        --------
+        pd.DataFrame
+            One row per run: run_id, the swept parameters and summary metrics
+        """
+        started = time.perf_counter()
+        space = [dict(params) for params in space]
+        results = ResultsTable(results_dir)
+        if results_dir is not None:
+            self._check_manifest(results_dir, space)
+
+        done = results.completed
+        pending = [(run_id, params) for run_id, params in enumerate(space) if run_id not in done]
+
+        # Runs with the same signal parameters go to the same batch
+        def signal_key(item):
+            return json.dumps({k: v for k, v in item[1].items() if k not in TRADE_PARAMETERS}, sort_keys=True)
+        pending.sort(key=signal_key)
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+
+        arrays, categories = self._arrays()
+        strategy = copy.copy(self.strategy)
+        strategy.signal_generator = None
+        strategy.risk_manager = None
+        completed = len(space) - len(pending)
+
+        def record(rows):
+            nonlocal completed
+            for row in rows:
+                results.append(row)
+            completed += len(rows)
+            if progress_callback is not None:
+                progress_callback(completed, len(space), time.perf_counter() - started)
+
+        if max_workers == 0:
+            _init_worker(arrays, categories, strategy, self.pip_factor, self.start_idx, shared=False)
+            try:
+                for batch in batches:
+                    record(_run_batch(batch))
+            finally:
+                _worker.clear()
+                results.flush()
+            return results.to_frame()
+
+        shared = SharedArrays(arrays)
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                     initargs=(shared.spec, categories, strategy, self.pip_factor,
+                                               self.start_idx)) as executor:
+                futures = [executor.submit(_run_batch, batch) for batch in batches]
+                for future in as_completed(futures):
+                    record(future.result())
+        finally:
+            results.flush()
+            shared.release()
+        return results.to_frame()
+
+    def _arrays(self):
+        """Prices and metrics as flat arrays, with the categories of coded columns"""
+        price = self.price_data
+        arrays = {name: price[name].to_numpy(dtype=float) for name in ('open', 'high', 'low', 'close')
+                  if name in price.columns}
+        if isinstance(price.index, pd.DatetimeIndex):
+            arrays['time'] = price.index.values.astype('datetime64[ns]').view(np.int64)
+
+        categories = {}
+        for name in self.metrics.columns:
+            column = self.metrics[name]
+            if pd.api.types.is_numeric_dtype(column) and not isinstance(column.dtype, pd.CategoricalDtype):
+                arrays[f'metric:{name}'] = column.to_numpy(dtype=float, na_value=np.nan)
+            else:
+                coded = pd.Categorical(column)
+                arrays[f'metric:{name}'] = coded.codes
+                categories[f'metric:{name}'] = list(coded.categories)
+        return arrays, categories
+
+    def _check_manifest(self, results_dir, space):
+        """Record the sweep definition, or check that it matches the recorded one"""
+        digest = hashlib.sha1()
+        for name in ('high', 'low', 'close'):
+            digest.update(self.price_data[name].to_numpy(dtype=float).tobytes())
+        manifest = {
+            'pair': self.pair,
+            'start_idx': self.start_idx,
+            'data': digest.hexdigest(),
+            'base_parameters': self.strategy.parameters,
+            'space': space
+        }
+        path = os.path.join(results_dir, 'manifest.json')
+        if os.path.exists(path):
+            with open(path) as f:
+                recorded = json.load(f)
+            if recorded != json.loads(json.dumps(manifest)):
+                raise ValueError(f"{results_dir} holds results of a different sweep")
+        else:
+            with open(path, 'w') as f:
+                json.dump(manifest, f, indent=2)
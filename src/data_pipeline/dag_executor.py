@@ -0,0 +1,339 @@
+"""
+DAG Executor - Dependency-aware pipeline execution with stage memoization
+
+Components may declare which keys of the pipeline data they read and write
+through 'inputs' and 'outputs' attributes (for example TechnicalIndicators
+reads and writes 'price', EconomicIndicators reads and writes
+'aligned_macro'). Consecutive components with declared keys form a block in
+which each component only waits for the components it depends on, so
+independent indicator branches run concurrently. Components without
+declarations read and write the whole data object and run in order.
+
+Every stage's output is memoized under a key built from the component name,
+its parameters and the keys of the stages that produced its inputs, so
+changing one indicator's parameters reuses the loaded, validated, normalized
+and aligned data.
+"""
+
+import json
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Any, Callable, Optional, Set, Tuple
+
+import pandas as pd
+
+from .memory_cache import MemoryCache
+
+# Slot name for components that read and write the whole data object
+WHOLE_DATA = '*'
+
+# Request entries that describe pipeline composition rather than stage inputs
+_COMPOSITION_KEYS = {'indicators'}
+
+# Whether shallow frame copies are protected by copy-on-write (default from pandas 3)
+_COPY_ON_WRITE = (int(pd.__version__.split('.')[0]) >= 3
+                  or bool(getattr(pd.options.mode, 'copy_on_write', False)))
+
+
+def _stable_hash(value: Any) -> str:
+    """Hash a JSON-like value, falling back to str() for other objects"""
+    text = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.md5(text.encode()).hexdigest()
+
+
+def component_io(component: Any) -> Tuple[Optional[List[str]], Optional[List[str]]]:
+    """Get the declared data keys a component reads and writes
+
+    Returns:
+        Tuple of (inputs, outputs), or (None, None) for whole-data components
+    """
+    inputs = getattr(component, 'inputs', None)
+    outputs = getattr(component, 'outputs', None)
+    if not inputs or not outputs:
+        return None, None
+    return list(inputs), list(outputs)
+
+
+def component_parameters(component: Any) -> Any:
+    """Get the parameters that identify a component's configuration"""
+    parameters = getattr(component, 'parameters', None)
+    if parameters is None:
+        parameters = getattr(component, 'config', None)
+    return parameters
+
+
+class DAGExecutor:
+    """
+    Executes pipeline components as a dependency graph with memoized stages
+
+    Parameters:
+    -----------
+    stage_cache : MemoryCache
+        Cache for stage outputs (None disables memoization)
+    max_workers : int
+        Maximum number of components run concurrently within a block (default: 4)
+    """
+
+    def __init__(self, stage_cache: Optional[MemoryCache] = None, max_workers: int = 4):
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.stage_cache = stage_cache
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._stage_hits = 0
+        self._stage_runs = 0
+
+    def execute(self, pipeline: List[Any], request: Dict[str, Any],
+                run_component: Callable[[Any, Any, Dict[str, Any], Dict[str, float]], Any],
+                data: Any = None, data_key: Optional[str] = None
+                ) -> Tuple[Any, Dict[str, float]]:
+        """Execute a pipeline
+
+        Args:
+            pipeline: List of pipeline components in declaration order
+            request: Request parameters (updated with context written by stages)
+            run_component: Callable(component, data, request, metrics) that runs
+                one component and records its execution time
+            data: Input of the first component (default: None)
+            data_key: Memo key identifying data (default: the request key)
+
+        Returns:
+            Tuple of (data, pipeline_metrics)
+        """
+        metrics: Dict[str, float] = {}
+
+        # Memo keys of the stages that last wrote each slot
+        slot_keys: Dict[str, str] = {WHOLE_DATA: data_key or self.request_key(request)}
+
+        i = 0
+        while i < len(pipeline):
+            inputs, _ = component_io(pipeline[i])
+            if inputs is None:
+                data = self._run_stage(pipeline[i], data, request, metrics, run_component, slot_keys)
+                i += 1
+                continue
+
+            # Collect consecutive components with declared keys
+            j = i
+            while j < len(pipeline) and component_io(pipeline[j])[0] is not None:
+                j += 1
+            block = pipeline[i:j]
+            i = j
+
+            keys = {k for component in block for k in sum(component_io(component), [])}
+            if isinstance(data, dict) and keys.issubset(data.keys()):
+                data = self._run_block(block, data, request, metrics, run_component, slot_keys)
+            else:
+                # Data does not have the declared keys; run in order on the whole object
+                for component in block:
+                    data = self._run_stage(component, data, request, metrics, run_component, slot_keys)
+
+        # Callers may modify the result, frames included; keep memoized outputs intact
+        return _copy_result(data), metrics
+
+    @staticmethod
+    def request_key(request: Dict[str, Any]) -> str:
+        """Memo key of the pipeline input described by a request"""
+        return _stable_hash({k: v for k, v in request.items() if k not in _COMPOSITION_KEYS})
+
+    def run_segment(self, components: List[Any], data: Any, request: Dict[str, Any], data_key: str,
+                    run: Callable[[Any, Dict[str, Any]], Any]) -> Tuple[Any, str]:
+        """Run a segment of components as one memoized stage
+
+        Used for segments executed outside the graph (e.g. per pair on a
+        worker pool). The output is shared with the memo; pass it on to
+        execute() rather than to callers.
+
+        Args:
+            components: Components the segment runs, in order
+            data: Segment input
+            request: Request parameters (updated with context written by the segment)
+            data_key: Memo key identifying data
+            run: Callable(data, request) that runs the segment
+
+        Returns:
+            Tuple of (output, memo key of the output)
+        """
+        key = _stable_hash({
+            'components': [[component.name, component_parameters(component)] for component in components],
+            'inputs': data_key
+        })
+
+        memo = self.stage_cache.get(key) if self.stage_cache is not None else None
+        if memo is not None:
+            output, context_delta = memo
+            request.update(context_delta)
+            self._stage_hits += 1
+            self.logger.debug(f"Reused memoized output of {'-'.join(c.name for c in components)}")
+        else:
+            before = dict(request)
+            output = run(_copy_structure(data), request)
+            self._stage_runs += 1
+            if self.stage_cache is not None:
+                self.stage_cache.put(key, (output, _context_delta(before, request)))
+        return output, key
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get stage memoization counters"""
+        return {
+            'stage_runs': self._stage_runs,
+            'stage_hits': self._stage_hits,
+            'cache': self.stage_cache.get_stats() if self.stage_cache is not None else None
+        }
+
+    def clear(self) -> None:
+        """Clear memoized stage outputs"""
+        if self.stage_cache is not None:
+            self.stage_cache.clear()
+
+    def shutdown(self) -> None:
+        """Shut down the worker threads"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def _stage_key(self, component: Any, input_keys: List[Tuple[str, str]]) -> str:
+        return _stable_hash({
+            'component': component.name,
+            'parameters': component_parameters(component),
+            'inputs': input_keys
+        })
+
+    def _run_stage(self, component: Any, data: Any, request: Dict[str, Any],
+                   metrics: Dict[str, float], run_component: Callable,
+                   slot_keys: Dict[str, str]) -> Any:
+        """Run a whole-data component, or replay its memoized output"""
+        key = self._stage_key(component, sorted(slot_keys.items()))
+
+        memo = self.stage_cache.get(key) if self.stage_cache is not None else None
+        if memo is not None:
+            output, context_delta = memo
+            request.update(context_delta)
+            self._stage_hits += 1
+            self.logger.debug(f"Reused memoized output of {component.name}")
+        else:
+            before = dict(request)
+            output = run_component(component, _copy_structure(data), request, metrics)
+            self._stage_runs += 1
+            if self.stage_cache is not None:
+                self.stage_cache.put(key, (output, _context_delta(before, request)))
+
+        slot_keys.clear()
+        slot_keys[WHOLE_DATA] = key
+        return output
+
+    def _run_block(self, block: List[Any], data: Dict[str, Any], request: Dict[str, Any],
+                   metrics: Dict[str, float], run_component: Callable,
+                   slot_keys: Dict[str, str]) -> Dict[str, Any]:
+        """Run a block of components with declared keys as a dependency graph"""
+        state = dict(data)
+        io = [component_io(component) for component in block]
+
+        # A component waits for earlier components it reads from or writes after
+        deps: List[Set[int]] = []
+        for j, (inputs_j, outputs_j) in enumerate(io):
+            touched_j = set(inputs_j) | set(outputs_j)
+            deps.append({
+                i for i, (inputs_i, outputs_i) in enumerate(io[:j])
+                if set(outputs_i) & touched_j or set(inputs_i) & set(outputs_j)
+            })
+
+        lock = threading.Lock()
+        contexts: Dict[int, Dict[str, Any]] = {}
+
+        def slot_key(slot: str) -> str:
+            return slot_keys.get(slot, slot_keys.get(WHOLE_DATA, ''))
+
+        def run(j: int) -> None:
+            component = block[j]
+            inputs, outputs = io[j]
+            with lock:
+                stage_input = dict(state)
+                for slot in set(inputs) | set(outputs):
+                    stage_input[slot] = _copy_structure(state[slot])
+                key = self._stage_key(component, [(slot, slot_key(slot)) for slot in inputs])
+
+            memo = self.stage_cache.get(key) if self.stage_cache is not None else None
+            if memo is not None:
+                produced, context_delta = memo
+                self.logger.debug(f"Reused memoized output of {component.name}")
+            else:
+                context = dict(request)
+                stage_metrics: Dict[str, float] = {}
+                result = run_component(component, stage_input, context, stage_metrics)
+                produced = {slot: result[slot] for slot in outputs}
+                context_delta = _context_delta(request, context)
+                if self.stage_cache is not None:
+                    self.stage_cache.put(key, (produced, context_delta))
+
+            with lock:
+                if memo is not None:
+                    self._stage_hits += 1
+                else:
+                    self._stage_runs += 1
+                    metrics.update(stage_metrics)
+                state.update(produced)
+                for slot in outputs:
+                    slot_keys[slot] = key
+                contexts[j] = context_delta
+
+        if len(block) == 1 or self.max_workers <= 1:
+            for j in range(len(block)):
+                run(j)
+        else:
+            executor = self._get_executor()
+            pending = {}
+            done: Set[int] = set()
+            while len(done) < len(block):
+                for j in range(len(block)):
+                    if j not in done and j not in pending.values() and deps[j] <= done:
+                        pending[executor.submit(run, j)] = j
+                finished, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    j = pending.pop(future)
+                    future.result()
+                    done.add(j)
+
+        # Apply context updates in declaration order
+        for j in range(len(block)):
+            request.update(contexts[j])
+
+        return state
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='pipeline-stage')
+            return self._executor
+
+
+def _copy_structure(data: Any) -> Any:
+    """Copy nested dicts so a stage can reassign entries without affecting others
+
+    DataFrames are not copied; components copy frames before modifying them.
+    """
+    if isinstance(data, dict):
+        return {k: _copy_structure(v) for k, v in data.items()}
+    return data
+
+
+def _copy_result(data: Any) -> Any:
+    """Copy nested dicts and the frames in them for handing to a caller
+
+    With copy-on-write, frames are copied shallowly and their data is only
+    copied if the caller modifies it; otherwise the data is copied now.
+    """
+    if isinstance(data, dict):
+        return {k: _copy_result(v) for k, v in data.items()}
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        return data.copy(deep=not _COPY_ON_WRITE)
+    return data
+
+
+def _context_delta(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    """Get request entries added or replaced by a stage"""
+    return {k: v for k, v in after.items() if k not in before or before[k] is not v}
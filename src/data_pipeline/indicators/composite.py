@@ -34,6 +34,10 @@ class CompositeIndicators(BaseIndicator):
         VIX-inflation correlation threshold (default: -0.2)
     """
     
+    # Data keys read and written (see DAGExecutor)
+    inputs = ['price', 'aligned_macro']
+    outputs = ['aligned_macro']
+    
     def __init__(self, parameters=None):
         # Define default parameters
         default_params = {
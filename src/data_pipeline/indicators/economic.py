@@ -32,6 +32,10 @@ class EconomicIndicators(BaseIndicator):
         Lookback period for natural rate estimation in days (default: 365)
     """
     
+    # Data keys read and written (see DAGExecutor)
+    inputs = ['aligned_macro']
+    outputs = ['aligned_macro']
+    
     def __init__(self, parameters=None):
         # Define default parameters
         default_params = {
@@ -36,6 +36,10 @@ class TechnicalIndicators(BaseIndicator):
         Whether to generate all indicators (default: False)
     """
     
+    # Data keys read and written (see DAGExecutor)
+    inputs = ['price']
+    outputs = ['price']
+    
     def __init__(self, parameters=None):
         # Define default parameters
         default_params = {
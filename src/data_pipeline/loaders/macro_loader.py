@@ -11,6 +11,7 @@ from typing import Dict, Any, Optional
 
 from balance_breaker.src.core.interface_registry import implements
 from balance_breaker.src.data_pipeline.base import BaseLoader
+from balance_breaker.src.data_pipeline.loaders.repository_index import get_repository_index
 
 @implements("DataLoader")
 class MacroLoader(BaseLoader):
@@ -107,32 +108,30 @@ class MacroLoader(BaseLoader):
             all_data = {}
             file_prefix = self.parameters.get('file_prefix', 'macro_')
             
-            for root, _, files in os.walk(repo_path):
-                for file in files:
-                    if file.endswith('.csv') and file_prefix in file:
-                        file_path = os.path.join(root, file)
-                        try:
-                            # Extract indicator name from filename
-                            indicator = os.path.splitext(file)[0].split('_')[-1]
-                            
-                            # Load data
-                            self.logger.debug(f"Loading macro data from {file_path}")
-                            df = pd.read_csv(file_path, index_col=0, parse_dates=True)
-                            
-                            # If single column, use indicator as column name
-                            if len(df.columns) == 1:
-                                all_data[indicator] = df.iloc[:, 0]
-                            else:
-                                # Multiple columns, merge all
-                                for col in df.columns:
-                                    all_data[f"{indicator}_{col}"] = df[col]
-                        except Exception as e:
-                            self.error_handler.handle_error(
-                                e,
-                                context={'file': file},
-                                subsystem='data_pipeline',
-                                component='MacroLoader'
-                            )
+            for file_path in get_repository_index(repo_path).files(['.csv'], pattern=file_prefix):
+                file = os.path.basename(file_path)
+                try:
+                    # Extract indicator name from filename
+                    indicator = os.path.splitext(file)[0].split('_')[-1]
+                    
+                    # Load data
+                    self.logger.debug(f"Loading macro data from {file_path}")
+                    df = pd.read_csv(file_path, index_col=0, parse_dates=True)
+                    
+                    # If single column, use indicator as column name
+                    if len(df.columns) == 1:
+                        all_data[indicator] = df.iloc[:, 0]
+                    else:
+                        # Multiple columns, merge all
+                        for col in df.columns:
+                            all_data[f"{indicator}_{col}"] = df[col]
+                except Exception as e:
+                    self.error_handler.handle_error(
+                        e,
+                        context={'file': file},
+                        subsystem='data_pipeline',
+                        component='MacroLoader'
+                    )
             
             # Combine all series into a DataFrame
             if all_data:
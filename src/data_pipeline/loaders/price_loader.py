@@ -11,6 +11,10 @@ from datetime import datetime
 
 from balance_breaker.src.core.interface_registry import implements
 from balance_breaker.src.data_pipeline.base import BaseLoader
+from balance_breaker.src.data_pipeline.loaders.price_store import (
+    PriceStore, default_store_directory, store_directory_for
+)
+from balance_breaker.src.data_pipeline.loaders.repository_index import get_repository_index
 
 @implements("DataLoader")
 class PriceLoader(BaseLoader):
@@ -23,17 +27,29 @@ class PriceLoader(BaseLoader):
         Path to the repository directory (default: None)
     file_extensions : List[str]
         List of file extensions to search for (default: ['.csv', '.CSV', '.txt', '.TXT'])
+    use_store : bool
+        Read from the columnar price store when one is present (default: True)
+    build_store : bool
+        Add pairs read from CSV to the price store (default: False)
+    store_directory : str
+        Path to the price store (default: None, uses the repository's store)
     """
     
     def __init__(self, parameters=None):
         # Define default parameters
         default_params = {
             'repository_path': None,
-            'file_extensions': ['.csv', '.CSV', '.txt', '.TXT']
+            'file_extensions': ['.csv', '.CSV', '.txt', '.TXT'],
+            'use_store': True,
+            'build_store': False,
+            'store_directory': None
         }
         
         # Initialize with parameters
         super().__init__(parameters or default_params)
+        
+        # Price stores by directory
+        self._stores: Dict[str, PriceStore] = {}
     
     def load_data(self, context: Dict[str, Any]) -> Dict[str, pd.DataFrame]:
         """Load price data from repository
@@ -60,6 +76,7 @@ class PriceLoader(BaseLoader):
             
             # Determine repository path
             repo_path = self.parameters.get('repository_path')
+            repo_config = None
             if repository:
                 # Use repository from context if specified
                 if 'repository_config' in context and repository in context['repository_config'].get('price', {}):
@@ -82,10 +99,19 @@ class PriceLoader(BaseLoader):
                 )
                 return {}
             
+            store = self._get_store(repo_path, repo_config)
+            
             # Load each pair
             data = {}
             for pair in pairs:
                 try:
+                    # Serve from the columnar store when it is up to date
+                    if store is not None and store.has_pair(pair):
+                        self.logger.info(f"Loading price data for {pair} from store {store.store_dir}")
+                        data[pair] = store.load(pair, start_date, end_date)
+                        self.logger.info(f"Loaded {len(data[pair])} rows for {pair}")
+                        continue
+                    
                     # Find file for pair
                     file_path = self._find_pair_file(repo_path, pair)
                     if not file_path:
@@ -96,6 +122,9 @@ class PriceLoader(BaseLoader):
                     self.logger.info(f"Loading price data for {pair} from {file_path}")
                     df = pd.read_csv(file_path, index_col=0, parse_dates=True)
                     
+                    if self.parameters.get('build_store', False):
+                        self._build_store_entry(repo_path, repo_config, pair, df, file_path)
+                    
                     # Apply date filtering
                     if start_date:
                         df = df[df.index >= start_date]
@@ -125,6 +154,75 @@ class PriceLoader(BaseLoader):
             )
             raise
     
+    def build_store(self, repo_path: str, pairs: List[str],
+                    repo_config: Optional[Dict[str, Any]] = None) -> Dict[str, bool]:
+        """Build the columnar price store for a repository from its CSV files
+        
+        Args:
+            repo_path: Repository directory
+            pairs: Currency pairs to store
+            repo_config: Repository configuration entry (optional)
+            
+        Returns:
+            Dictionary of pair -> whether the pair was stored
+        """
+        results = {}
+        for pair in pairs:
+            file_path = self._find_pair_file(repo_path, pair)
+            if not file_path:
+                self.logger.warning(f"No file found for pair {pair} in {repo_path}")
+                results[pair] = False
+                continue
+            
+            df = pd.read_csv(file_path, index_col=0, parse_dates=True)
+            results[pair] = self._build_store_entry(repo_path, repo_config, pair, df, file_path)
+        
+        return results
+    
+    def _store_directory(self, repo_path: str, repo_config: Optional[Dict[str, Any]]) -> str:
+        """Resolve the price store directory for a repository"""
+        return (self.parameters.get('store_directory')
+                or store_directory_for(repo_config)
+                or default_store_directory(repo_path))
+    
+    def _get_store(self, repo_path: str, repo_config: Optional[Dict[str, Any]]) -> Optional[PriceStore]:
+        """Get the price store for a repository if one is present
+        
+        Args:
+            repo_path: Repository directory
+            repo_config: Repository configuration entry (optional)
+            
+        Returns:
+            PriceStore instance or None if the store is disabled or missing
+        """
+        if not self.parameters.get('use_store', True):
+            return None
+        
+        store_dir = self._store_directory(repo_path, repo_config)
+        if store_dir not in self._stores:
+            self._stores[store_dir] = PriceStore(store_dir)
+        
+        store = self._stores[store_dir]
+        return store if store.exists() else None
+    
+    def _build_store_entry(self, repo_path: str, repo_config: Optional[Dict[str, Any]],
+                           pair: str, df: pd.DataFrame, file_path: str) -> bool:
+        """Write a pair to the repository's price store"""
+        store_dir = self._store_directory(repo_path, repo_config)
+        if store_dir not in self._stores:
+            self._stores[store_dir] = PriceStore(store_dir)
+        
+        try:
+            return self._stores[store_dir].build(pair, df, source_path=file_path)
+        except Exception as e:
+            self.error_handler.handle_error(
+                e,
+                context={'pair': pair, 'store_dir': store_dir},
+                subsystem='data_pipeline',
+                component='PriceLoader'
+            )
+            return False
+    
     def _find_pair_file(self, directory: str, pair: str) -> Optional[str]:
         """Find data file for the specified pair
         
@@ -142,26 +240,9 @@ class PriceLoader(BaseLoader):
             self.logger.error(f"Repository directory not found: {directory}")
             return None
         
-        # Track all candidate files
-        candidates = []
-        
-        for root, _, files in os.walk(directory):
-            for file in files:
-                file_path = os.path.join(root, file)
-                
-                # Check if filename contains pair name and has correct extension
-                if pair.lower() in file.lower() and any(file.lower().endswith(ext.lower()) for ext in extensions):
-                    candidates.append(file_path)
-                    
-                    # Exact match prioritization
-                    if file.lower() == f"{pair.lower()}.csv" or file.lower() == f"{pair.lower()}_h1.csv":
-                        self.logger.debug(f"Found exact match for {pair}: {file}")
-                        return file_path
-        
-        # Return first candidate if any found
-        if candidates:
-            self.logger.debug(f"Found candidate match for {pair}: {os.path.basename(candidates[0])}")
-            return candidates[0]
+        # Look up the pair in the shared repository index
+        file_path = get_repository_index(directory).find_pair_file(pair, extensions)
+        if file_path:
+            self.logger.debug(f"Found match for {pair}: {os.path.basename(file_path)}")
         
-        # No candidates found
-        return None
\ No newline at end of file
+        return file_path
\ No newline at end of file
@@ -0,0 +1,334 @@
+"""
+Price Store - Columnar on-disk store for price data
+
+This module stores price data as memory-mapped NumPy column blocks partitioned
+by year. Date-range requests only open the partitions overlapping the range and
+only read the rows inside it, instead of re-parsing the full source CSV.
+
+Layout:
+    <store_dir>/<PAIR>/manifest.json
+    <store_dir>/<PAIR>/<YEAR>/index.npy     (int64 nanosecond timestamps)
+    <store_dir>/<PAIR>/<YEAR>/c<N>.npy      (one file per column)
+"""
+
+import os
+import json
+import shutil
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional
+
+STORE_VERSION = 1
+DEFAULT_STORE_DIRNAME = '.price_store'
+
+
+def default_store_directory(repo_directory: str) -> str:
+    """Get the default store directory for a repository directory
+
+    Args:
+        repo_directory: Repository directory containing the source files
+
+    Returns:
+        Path to the store directory
+    """
+    return os.path.join(repo_directory, DEFAULT_STORE_DIRNAME)
+
+
+def store_directory_for(repo_config: Dict[str, Any]) -> Optional[str]:
+    """Resolve the store directory from a repository configuration entry
+
+    Uses the optional 'store_directory' key, falling back to the default
+    location inside the repository 'directory'.
+
+    Args:
+        repo_config: Repository configuration (as in repository_config.json)
+
+    Returns:
+        Path to the store directory or None if it cannot be determined
+    """
+    if not repo_config:
+        return None
+    if repo_config.get('store_directory'):
+        return repo_config['store_directory']
+    if repo_config.get('directory'):
+        return default_store_directory(repo_config['directory'])
+    return None
+
+
+class PriceStore:
+    """
+    Year-partitioned columnar store for price data
+
+    Parameters:
+    -----------
+    store_dir : str
+        Directory holding the store
+    """
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self._manifests: Dict[str, Dict[str, Any]] = {}
+
+    def exists(self) -> bool:
+        """Check whether the store directory exists"""
+        return os.path.isdir(self.store_dir)
+
+    def pairs(self) -> List[str]:
+        """List pairs available in the store"""
+        if not self.exists():
+            return []
+        return sorted(
+            name for name in os.listdir(self.store_dir)
+            if os.path.exists(self._manifest_path(name))
+        )
+
+    def has_pair(self, pair: str, source_path: Optional[str] = None) -> bool:
+        """Check whether an up-to-date entry exists for a pair
+
+        Args:
+            pair: Currency pair
+            source_path: Source file to check freshness against. If omitted,
+                the source recorded at build time is checked instead.
+
+        Returns:
+            True if the pair can be served from the store
+        """
+        manifest = self._get_manifest(pair)
+        if manifest is None:
+            return False
+
+        source = manifest.get('source') or {}
+        path = source_path or source.get('path')
+        if not path:
+            # Built from an in-memory frame, nothing to compare against
+            return True
+
+        if source_path and source.get('path') and \
+                os.path.abspath(source_path) != os.path.abspath(source['path']):
+            return False
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+
+        return stat.st_size == source.get('size') and stat.st_mtime_ns == source.get('mtime_ns')
+
+    def build(self, pair: str, df: pd.DataFrame, source_path: Optional[str] = None) -> bool:
+        """Build (or rebuild) the store entry for a pair
+
+        Args:
+            pair: Currency pair
+            df: Price data with a DatetimeIndex and numeric columns
+            source_path: Source file the data was read from (for invalidation)
+
+        Returns:
+            True if the entry was written, False if the data cannot be stored
+        """
+        if not isinstance(df.index, pd.DatetimeIndex):
+            self.logger.warning(f"Cannot store {pair}: index is not a DatetimeIndex")
+            return False
+
+        non_numeric = [col for col in df.columns
+                       if not isinstance(df[col].dtype, np.dtype) or df[col].dtype.kind not in 'biuf']
+        if non_numeric:
+            self.logger.warning(f"Cannot store {pair}: non-numeric columns {non_numeric}")
+            return False
+
+        if df.index.hasnans:
+            df = df[df.index.notna()]
+        df = df.sort_index()
+
+        tz = str(df.index.tz) if df.index.tz is not None else None
+        naive_index = df.index.tz_convert('UTC').tz_localize(None) if tz else df.index
+        index_ns = np.asarray(naive_index.values, dtype='datetime64[ns]').view('int64')
+
+        pair_dir = self._pair_dir(pair)
+        tmp_dir = f"{pair_dir}.tmp"
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+        os.makedirs(tmp_dir)
+
+        partitions = {}
+        years = df.index.year
+        for year in np.unique(years):
+            mask = years == year
+            year_dir = os.path.join(tmp_dir, str(year))
+            os.makedirs(year_dir)
+
+            year_index = index_ns[mask]
+            np.save(os.path.join(year_dir, 'index.npy'), year_index)
+            for i, col in enumerate(df.columns):
+                np.save(os.path.join(year_dir, f"c{i}.npy"), np.ascontiguousarray(df[col].to_numpy()[mask]))
+
+            partitions[str(year)] = {
+                'start': int(year_index[0]),
+                'end': int(year_index[-1]),
+                'rows': int(len(year_index))
+            }
+
+        manifest = {
+            'version': STORE_VERSION,
+            'pair': pair,
+            'index_name': df.index.name,
+            'tz': tz,
+            'columns': [{'name': str(col), 'dtype': str(df[col].dtype)} for col in df.columns],
+            'partitions': partitions,
+            'source': None
+        }
+        if source_path:
+            stat = os.stat(source_path)
+            manifest['source'] = {
+                'path': os.path.abspath(source_path),
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns
+            }
+
+        with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        # Swap the new entry in place of the old one
+        if os.path.exists(pair_dir):
+            shutil.rmtree(pair_dir)
+        os.replace(tmp_dir, pair_dir)
+        self._manifests.pop(pair.upper(), None)
+
+        self.logger.info(f"Stored {len(df)} rows for {pair} in {len(partitions)} partitions")
+        return True
+
+    def build_from_file(self, pair: str, file_path: str) -> bool:
+        """Build the store entry for a pair from a CSV file
+
+        Args:
+            pair: Currency pair
+            file_path: Path to the source CSV file
+
+        Returns:
+            True if the entry was written
+        """
+        df = pd.read_csv(file_path, index_col=0, parse_dates=True)
+        return self.build(pair, df, source_path=file_path)
+
+    def load(self, pair: str, start_date=None, end_date=None,
+             columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Load price data for a pair and date range
+
+        Only partitions overlapping the range are opened, and only the rows
+        inside the range are read from the memory-mapped column files.
+
+        Args:
+            pair: Currency pair
+            start_date: Start date (inclusive)
+            end_date: End date (inclusive)
+            columns: Subset of columns to load (default: all)
+
+        Returns:
+            DataFrame with the requested rows
+        """
+        manifest = self._get_manifest(pair)
+        if manifest is None:
+            raise KeyError(f"Pair {pair} not found in price store {self.store_dir}")
+
+        tz = manifest.get('tz')
+        start_ns = self._to_ns(start_date, tz)
+        end_ns = self._to_ns(end_date, tz)
+
+        all_columns = manifest['columns']
+        if columns is None:
+            selected = list(enumerate(all_columns))
+        else:
+            selected = [(i, col) for i, col in enumerate(all_columns) if col['name'] in columns]
+
+        index_parts = []
+        column_parts = {col['name']: [] for _, col in selected}
+        pair_dir = self._pair_dir(pair)
+
+        for year in sorted(manifest['partitions'], key=int):
+            info = manifest['partitions'][year]
+            # Partition pruning
+            if start_ns is not None and info['end'] < start_ns:
+                continue
+            if end_ns is not None and info['start'] > end_ns:
+                continue
+
+            year_dir = os.path.join(pair_dir, year)
+            index = np.load(os.path.join(year_dir, 'index.npy'), mmap_mode='r')
+            lo = 0 if start_ns is None else int(np.searchsorted(index, start_ns, side='left'))
+            hi = len(index) if end_ns is None else int(np.searchsorted(index, end_ns, side='right'))
+            if hi <= lo:
+                continue
+
+            index_parts.append(np.array(index[lo:hi]))
+            for i, col in selected:
+                values = np.load(os.path.join(year_dir, f"c{i}.npy"), mmap_mode='r')
+                column_parts[col['name']].append(np.array(values[lo:hi]))
+
+        if index_parts:
+            index = pd.DatetimeIndex(np.concatenate(index_parts).view('datetime64[ns]'))
+            data = {name: np.concatenate(parts) for name, parts in column_parts.items()}
+        else:
+            index = pd.DatetimeIndex(np.array([], dtype='datetime64[ns]'))
+            data = {col['name']: np.array([], dtype=col['dtype']) for _, col in selected}
+
+        if tz:
+            index = index.tz_localize('UTC').tz_convert(tz)
+        index.name = manifest.get('index_name')
+
+        return pd.DataFrame(data, index=index, columns=[col['name'] for _, col in selected])
+
+    def remove(self, pair: str) -> bool:
+        """Remove the store entry for a pair"""
+        self._manifests.pop(pair.upper(), None)
+        pair_dir = self._pair_dir(pair)
+        if os.path.exists(pair_dir):
+            shutil.rmtree(pair_dir)
+            return True
+        return False
+
+    def _pair_dir(self, pair: str) -> str:
+        return os.path.join(self.store_dir, pair.upper())
+
+    def _manifest_path(self, pair: str) -> str:
+        return os.path.join(self._pair_dir(pair), 'manifest.json')
+
+    def _get_manifest(self, pair: str) -> Optional[Dict[str, Any]]:
+        """Get the manifest for a pair, re-reading it if it changed on disk"""
+        path = self._manifest_path(pair)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            self._manifests.pop(pair.upper(), None)
+            return None
+
+        cached = self._manifests.get(pair.upper())
+        if cached is not None and cached.get('_mtime_ns') == mtime_ns:
+            return cached
+
+        try:
+            with open(path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not read price store manifest {path}: {e}")
+            return None
+
+        if manifest.get('version') != STORE_VERSION:
+            return None
+
+        manifest['_mtime_ns'] = mtime_ns
+        self._manifests[pair.upper()] = manifest
+        return manifest
+
+    @staticmethod
+    def _to_ns(value, tz: Optional[str]) -> Optional[int]:
+        """Convert a date bound to nanoseconds since epoch (UTC for tz-aware data)"""
+        if value is None or value == '':
+            return None
+        ts = pd.Timestamp(value)
+        if tz:
+            ts = ts.tz_localize(tz) if ts.tzinfo is None else ts.tz_convert(tz)
+            ts = ts.tz_convert('UTC').tz_localize(None)
+        elif ts.tzinfo is not None:
+            ts = ts.tz_convert('UTC').tz_localize(None)
+        return int(ts.value)
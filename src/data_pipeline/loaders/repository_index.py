@@ -0,0 +1,281 @@
+"""
+Repository Index - Persistent file index for data repositories
+
+This module scans a repository directory once and keeps the file listing in
+memory and in a small JSON file next to the repository. Directory modification
+times are recorded so the index can be invalidated by stat-ing directories
+instead of walking every file again. Pair lookups are memoized, so repeated
+requests for the same pair are O(1).
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from balance_breaker.src.data_pipeline.loaders.price_store import DEFAULT_STORE_DIRNAME
+
+INDEX_VERSION = 1
+INDEX_FILENAME = '.repository_index.json'
+
+# Directories that belong to the pipeline rather than the repository contents
+IGNORED_DIRS = {DEFAULT_STORE_DIRNAME}
+
+COMMON_PAIRS = ['USDJPY', 'EURUSD', 'GBPUSD', 'AUDUSD', 'USDCAD', 'USDCHF', 'NZDUSD']
+
+_indexes: Dict[str, 'RepositoryIndex'] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_repository_index(directory: str) -> 'RepositoryIndex':
+    """Get the shared index for a repository directory
+
+    Args:
+        directory: Repository directory
+
+    Returns:
+        RepositoryIndex instance shared by all callers in this process
+    """
+    key = os.path.abspath(directory)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = RepositoryIndex(key)
+        return _indexes[key]
+
+
+class RepositoryIndex:
+    """
+    Persistent file index for a repository directory
+
+    Parameters:
+    -----------
+    directory : str
+        Repository directory to index
+    persist : bool
+        Whether to save the index next to the repository (default: True)
+    check_interval : float
+        Minimum seconds between directory mtime checks (default: 1.0)
+    """
+
+    def __init__(self, directory: str, persist: bool = True, check_interval: float = 1.0):
+        self.directory = os.path.abspath(directory)
+        self.persist = persist
+        self.check_interval = check_interval
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+        self._lock = threading.RLock()
+        self._files: List[str] = []
+        self._dir_mtimes: Dict[str, int] = {}
+        self._pair_files: Dict[Tuple[str, Tuple[str, ...]], Optional[str]] = {}
+        self._loaded = False
+        self._last_check = 0.0
+
+    @property
+    def index_path(self) -> str:
+        """Path of the persisted index file"""
+        return os.path.join(self.directory, INDEX_FILENAME)
+
+    def files(self, extensions: Optional[List[str]] = None, pattern: Optional[str] = None) -> List[str]:
+        """List indexed files
+
+        Args:
+            extensions: File extensions to include (case-insensitive)
+            pattern: Substring that must appear in the filename
+
+        Returns:
+            List of file paths in directory walk order
+        """
+        self._ensure_current()
+        exts = tuple(ext.lower() for ext in extensions) if extensions else None
+
+        result = []
+        for rel_path in self._files:
+            name = os.path.basename(rel_path)
+            if exts and not name.lower().endswith(exts):
+                continue
+            if pattern is not None and pattern not in name:
+                continue
+            result.append(os.path.join(self.directory, rel_path))
+        return result
+
+    def find_pair_file(self, pair: str, extensions: List[str]) -> Optional[str]:
+        """Find the data file for a currency pair
+
+        Files named '<pair><ext>' or '<pair>_h1<ext>' take priority, otherwise
+        the first file containing the pair name is returned.
+
+        Args:
+            pair: Currency pair
+            extensions: Accepted file extensions; the first one is used for
+                exact-match prioritization
+
+        Returns:
+            Path to data file or None if not found
+        """
+        self._ensure_current()
+        key = (pair.lower(), tuple(ext.lower() for ext in extensions))
+
+        with self._lock:
+            if key in self._pair_files:
+                return self._pair_files[key]
+
+            pair_lower, exts = key
+            exact_names = {f"{pair_lower}{exts[0]}", f"{pair_lower}_h1{exts[0]}"} if exts else set()
+            first_candidate = None
+            match = None
+
+            for rel_path in self._files:
+                name = os.path.basename(rel_path).lower()
+                if pair_lower not in name or not name.endswith(exts):
+                    continue
+                if name in exact_names:
+                    match = rel_path
+                    break
+                if first_candidate is None:
+                    first_candidate = rel_path
+
+            match = match or first_candidate
+            result = os.path.join(self.directory, match) if match else None
+            self._pair_files[key] = result
+            return result
+
+    def detect_pairs(self, extensions: Optional[List[str]] = None,
+                     known_pairs: Optional[List[str]] = None) -> List[str]:
+        """Detect currency pairs from indexed filenames
+
+        Args:
+            extensions: File extensions to include
+            known_pairs: Pairs to look for (default: common major pairs)
+
+        Returns:
+            List of detected pairs in order of first appearance
+        """
+        known_pairs = known_pairs or COMMON_PAIRS
+        pairs = []
+        for file_path in self.files(extensions):
+            name = os.path.basename(file_path).lower()
+            for pair in known_pairs:
+                if pair.lower() in name:
+                    if pair not in pairs:
+                        pairs.append(pair)
+                    break
+        return pairs
+
+    def refresh(self) -> None:
+        """Rescan the repository directory and persist the result"""
+        with self._lock:
+            files = []
+            dir_mtimes = {}
+
+            for root, dirs, filenames in os.walk(self.directory):
+                dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
+                rel_root = os.path.relpath(root, self.directory)
+                try:
+                    dir_mtimes[rel_root] = os.stat(root).st_mtime_ns
+                except OSError:
+                    continue
+                for filename in filenames:
+                    if filename == INDEX_FILENAME:
+                        continue
+                    files.append(os.path.normpath(os.path.join(rel_root, filename)))
+
+            self._files = files
+            self._dir_mtimes = dir_mtimes
+            self._pair_files = {}
+            self._loaded = True
+            self._last_check = time.time()
+
+            self.logger.debug(f"Indexed {len(files)} files in {len(dir_mtimes)} directories under {self.directory}")
+            self._save()
+
+    def invalidate(self) -> None:
+        """Force a rescan on next access"""
+        with self._lock:
+            self._dir_mtimes = {}
+            self._pair_files = {}
+            self._last_check = 0.0
+
+    def is_stale(self) -> bool:
+        """Check whether any indexed directory changed since the last scan"""
+        for rel_dir, mtime_ns in self._dir_mtimes.items():
+            try:
+                if os.stat(os.path.join(self.directory, rel_dir)).st_mtime_ns != mtime_ns:
+                    return True
+            except OSError:
+                return True
+        return not self._dir_mtimes
+
+    def _ensure_current(self) -> None:
+        """Load or rebuild the index if it is missing or out of date"""
+        with self._lock:
+            if not self._loaded:
+                if not self._load():
+                    self.refresh()
+                    return
+
+            now = time.time()
+            if now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+
+            if self.is_stale():
+                self.logger.debug(f"Repository changed, rebuilding index for {self.directory}")
+                self.refresh()
+
+    def _load(self) -> bool:
+        """Load the persisted index if it is still valid
+
+        Returns:
+            True if a valid index was loaded
+        """
+        if not self.persist or not os.path.exists(self.index_path):
+            return False
+
+        try:
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.debug(f"Could not read repository index {self.index_path}: {e}")
+            return False
+
+        if data.get('version') != INDEX_VERSION:
+            return False
+
+        self._files = data.get('files', [])
+        self._dir_mtimes = data.get('dirs', {})
+        self._pair_files = {}
+
+        if self.is_stale():
+            return False
+
+        self._loaded = True
+        self._last_check = time.time()
+        return True
+
+    def _save(self) -> None:
+        """Persist the index next to the repository"""
+        if not self.persist:
+            return
+
+        data: Dict[str, Any] = {
+            'version': INDEX_VERSION,
+            'directory': self.directory,
+            'files': self._files,
+            'dirs': self._dir_mtimes
+        }
+
+        # Writing into an existing file leaves the directory mtime unchanged;
+        # only creating the file does, so record the new mtime and write again
+        created = not os.path.exists(self.index_path)
+        try:
+            with open(self.index_path, 'w') as f:
+                json.dump(data, f)
+            if created:
+                self._dir_mtimes['.'] = os.stat(self.directory).st_mtime_ns
+                with open(self.index_path, 'w') as f:
+                    json.dump(data, f)
+        except OSError as e:
+            # Read-only repositories still get the in-memory index
+            self.logger.debug(f"Could not save repository index {self.index_path}: {e}")
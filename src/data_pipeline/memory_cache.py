@@ -0,0 +1,287 @@
+"""
+Memory Cache - Bounded in-memory cache for pipeline results
+
+This module provides the in-memory result cache used by the orchestrator.
+Entries are sized with DataFrame.memory_usage(deep=True) and evicted by an
+LRU or LFU policy once the byte or entry budget is exceeded. Expired entries
+are removed on read and by an optional background sweeper thread.
+"""
+
+import sys
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Hashable
+
+import numpy as np
+import pandas as pd
+
+
+def estimate_size(obj: Any, _seen: Optional[set] = None) -> int:
+    """Estimate the memory footprint of a pipeline result in bytes
+
+    DataFrames and Series are measured with memory_usage(deep=True), NumPy
+    arrays with nbytes, and containers are measured recursively.
+
+    Args:
+        obj: Object to measure
+
+    Returns:
+        Estimated size in bytes
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(estimate_size(v, _seen) for v in obj)
+    return sys.getsizeof(obj)
+
+
+class _CacheEntry:
+    """Cached value with bookkeeping"""
+
+    __slots__ = ('value', 'size', 'created', 'hits')
+
+    def __init__(self, value: Any, size: int):
+        self.value = value
+        self.size = size
+        self.created = time.time()
+        self.hits = 0
+
+
+class MemoryCache:
+    """
+    Thread-safe, size-bounded in-memory cache
+
+    Parameters:
+    -----------
+    max_bytes : int
+        Maximum total size of cached values in bytes (default: 512 MB, None for no limit)
+    max_entries : int
+        Maximum number of entries (default: None, no limit)
+    ttl : float
+        Time-to-live for entries in seconds (default: 3600, None for no expiry)
+    policy : str
+        Eviction policy, 'lru' or 'lfu' (default: 'lru')
+    sweep_interval : float
+        Seconds between background TTL sweeps (default: 60, 0 disables the sweeper)
+    """
+
+    def __init__(self, max_bytes: Optional[int] = 512 * 1024 * 1024,
+                 max_entries: Optional[int] = None,
+                 ttl: Optional[float] = 3600,
+                 policy: str = 'lru',
+                 sweep_interval: float = 60):
+        if policy not in ('lru', 'lfu'):
+            raise ValueError(f"Unknown cache policy: {policy}")
+
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.policy = policy
+        self.sweep_interval = sweep_interval
+
+        # Entries in recency order (least recently used first)
+        self._entries: 'OrderedDict[Hashable, _CacheEntry]' = OrderedDict()
+        self._lock = threading.RLock()
+        self._current_bytes = 0
+
+        # Counters
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._rejections = 0
+
+        # Background sweeper
+        self._stop_event = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        if self.ttl and self.sweep_interval and self.sweep_interval > 0:
+            self._start_sweeper()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a value from the cache
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            if self._is_expired(entry, time.time()):
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            entry.hits += 1
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry.value
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None) -> bool:
+        """Store a value in the cache, evicting entries as needed
+
+        Args:
+            key: Cache key
+            value: Value to store
+            size: Size in bytes (estimated if omitted)
+
+        Returns:
+            True if the value was cached, False if it exceeds the byte budget
+        """
+        if size is None:
+            size = estimate_size(value)
+
+        if self.max_bytes is not None and size > self.max_bytes:
+            with self._lock:
+                self._rejections += 1
+            self.logger.debug(f"Not caching {key}: {size} bytes exceeds budget of {self.max_bytes}")
+            return False
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = _CacheEntry(value, size)
+            self._current_bytes += size
+            self._evict(protect=key)
+            return True
+
+    def contains(self, key: Hashable) -> bool:
+        """Check whether a non-expired entry exists without counting a hit"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._is_expired(entry, time.time())
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Remove an entry and return its value"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._remove(key)
+            return entry.value
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+    def expire(self) -> int:
+        """Remove all expired entries
+
+        Returns:
+            Number of entries removed
+        """
+        if not self.ttl:
+            return 0
+
+        now = time.time()
+        with self._lock:
+            expired = [key for key, entry in self._entries.items() if self._is_expired(entry, now)]
+            for key in expired:
+                self._remove(key)
+            self._expirations += len(expired)
+
+        if expired:
+            self.logger.debug(f"Expired {len(expired)} cache entries")
+        return len(expired)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics
+
+        Returns:
+            Dictionary with hit/miss/eviction counters and current usage
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'policy': self.policy,
+                'entries': len(self._entries),
+                'bytes': self._current_bytes,
+                'max_bytes': self.max_bytes,
+                'max_entries': self.max_entries,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'rejections': self._rejections
+            }
+
+    def close(self) -> None:
+        """Stop the background sweeper"""
+        self._stop_event.set()
+        if self._sweeper is not None and self._sweeper is not threading.current_thread():
+            self._sweeper.join(timeout=1.0)
+        self._sweeper = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.contains(key)
+
+    def _is_expired(self, entry: _CacheEntry, now: float) -> bool:
+        return bool(self.ttl) and now - entry.created > self.ttl
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._current_bytes -= entry.size
+
+    def _over_budget(self) -> bool:
+        if self.max_bytes is not None and self._current_bytes > self.max_bytes:
+            return True
+        if self.max_entries is not None and len(self._entries) > self.max_entries:
+            return True
+        return False
+
+    def _evict(self, protect: Optional[Hashable] = None) -> None:
+        """Evict entries until the cache is within budget"""
+        while self._over_budget() and len(self._entries) > 1:
+            if self.policy == 'lru':
+                victim = next(iter(self._entries))
+                if victim == protect:
+                    victim = next(k for k in self._entries if k != protect)
+            else:
+                # Least frequently used; ties go to the least recently used.
+                # Linear scan is fine for the tens to hundreds of frames cached here.
+                victim = min((k for k in self._entries if k != protect),
+                             key=lambda k: self._entries[k].hits)
+            self._remove(victim)
+            self._evictions += 1
+
+    def _start_sweeper(self) -> None:
+        """Start the background TTL sweeper thread"""
+        def sweep():
+            while not self._stop_event.wait(self.sweep_interval):
+                try:
+                    self.expire()
+                except Exception as e:
+                    self.logger.error(f"Error sweeping cache: {str(e)}")
+
+        self._sweeper = threading.Thread(target=sweep, name='memory-cache-sweeper', daemon=True)
+        self._sweeper.start()
@@ -8,10 +8,19 @@ of data through various processing stages.
 import logging
 import hashlib
 import json
-from typing import Dict, List, Any, Callable, Optional, Type, Union
+from typing import Dict, List, Any, Callable, Optional, Type, Union, Tuple
 from abc import ABC, abstractmethod
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Executor
 import time
+import pandas as pd
+
+from .memory_cache import MemoryCache
+from .single_flight import SingleFlight
+from .dag_executor import DAGExecutor
+from .profiling import StageProfiler, begin_stage, end_stage
+from .range_cache import (
+    RangeCacheIndex, to_ns, from_ns, is_range_sliceable, slice_result, combine_results
+)
 
 # Define component interfaces
 
@@ -41,6 +50,12 @@ class PipelineComponent(ABC):
     def name(self) -> str:
         """Return component name"""
         return self.__class__.__name__
+    
+    # Keys of the pipeline data this component reads and writes. None means
+    # the whole data object; components that declare keys can run
+    # concurrently with components they do not depend on.
+    inputs: Optional[List[str]] = None
+    outputs: Optional[List[str]] = None
 
 class PipelineError(Exception):
     """Base exception for pipeline errors"""
@@ -51,6 +66,43 @@ class PipelineError(Exception):
         self.context = context or {}
         super().__init__(self.message)
 
+# Component types that can run independently for each pair
+PER_PAIR_STAGES = ['loader', 'validator', 'processor', 'indicator']
+
+# Ordering used when merging per-pair statuses (worst wins)
+_STATUS_ORDER = {'pass': 0, 'unknown': 1, 'warning': 2, 'fail': 3, 'error': 4}
+
+
+def _run_pair_stages(components: List[PipelineComponent], data: Any,
+                     request: Dict[str, Any]) -> Tuple[Any, Dict[str, Any], Dict[str, float]]:
+    """Run a sequence of components for a single pair
+
+    Module-level so it can be sent to a process pool.
+
+    Args:
+        components: Components to execute in order
+        data: Input data for the pair
+        request: Request parameters restricted to the pair
+
+    Returns:
+        Tuple of (data, request, profiling records by component)
+    """
+    records = []
+    for component in components:
+        record = begin_stage(component, data)
+        try:
+            data = component.process(data, request)
+        except Exception as e:
+            raise PipelineError(
+                message=f"Pipeline error in {component.name} for {request.get('pairs')}: {str(e)}",
+                component=component,
+                stage=component.component_type,
+                context=request
+            ) from e
+        records.append(end_stage(record, data))
+    return data, request, records
+
+
 class DataPipelineOrchestrator:
     """Central coordinator for data pipeline operations"""
     
@@ -75,14 +127,53 @@ class DataPipelineOrchestrator:
             'serializer': {}
         }
         
-        # Cache for pipeline results
-        self.cache: Dict[str, Any] = {}
+        # Cache for pipeline results, bounded by total DataFrame size
         self.cache_ttl = self.config.get('cache_ttl', 3600)  # Default: 1 hour
         self.cache_enabled = self.config.get('cache_enabled', True)
-        
-        # Pipeline execution metrics
+        self.cache = MemoryCache(
+            max_bytes=self.config.get('cache_max_bytes', 512 * 1024 * 1024),  # Default: 512 MB
+            max_entries=self.config.get('cache_max_entries'),
+            ttl=self.cache_ttl,
+            policy=self.config.get('cache_policy', 'lru'),
+            sweep_interval=self.config.get('cache_sweep_interval', 60) if self.cache_enabled else 0
+        )
+        
+        # Concurrent identical requests share one pipeline run
+        self.coalesce_requests = self.config.get('coalesce_requests', True)
+        self._in_flight = SingleFlight()
+        
+        # Serve date sub-ranges from cached results covering a larger range
+        self.range_cache_enabled = self.config.get('range_cache', True)
+        self.range_warmup = pd.Timedelta(self.config.get('range_warmup', '365D'))
+        self.range_index = RangeCacheIndex()
+        
+        # Execution times of the latest run of each pipeline
         self.metrics: Dict[str, Dict[str, float]] = {}
         
+        # Per-stage profiling records (bounded)
+        self.profiler = StageProfiler(
+            capacity=self.config.get('profile_capacity', 10000),
+            trace_memory=self.config.get('profile_memory', False)
+        )
+        
+        # Per-pair parallel execution ('serial', 'thread' or 'process')
+        self.parallel_mode = self.config.get('parallel_mode', 'serial')
+        self.max_workers = self.config.get('max_workers')
+        self.parallel_stages = set(self.config.get('parallel_stages', PER_PAIR_STAGES))
+        self._executor: Optional[Executor] = None
+        
+        # Dependency-graph execution with memoized stage outputs
+        self.dag_enabled = self.config.get('dag_execution', True)
+        stage_cache = None
+        if self.cache_enabled and self.config.get('stage_cache', True):
+            stage_cache = MemoryCache(
+                max_bytes=self.config.get('stage_cache_max_bytes', 512 * 1024 * 1024),
+                ttl=self.cache_ttl,
+                policy=self.config.get('cache_policy', 'lru'),
+                sweep_interval=self.config.get('cache_sweep_interval', 60)
+            )
+        self.dag_executor = DAGExecutor(stage_cache, max_workers=self.config.get('stage_workers', 4))
+        
         self.logger.info("Data Pipeline Orchestrator initialized")
     
     def register_component(self, component: PipelineComponent) -> None:
@@ -176,61 +267,426 @@ class DataPipelineOrchestrator:
         Returns:
             Processed data
         """
+        cache_key = self._generate_cache_key(request)
+        
         # Check cache if enabled
         if self.cache_enabled:
-            cache_key = self._generate_cache_key(request)
             cached_data = self._get_from_cache(cache_key)
             if cached_data is not None:
                 self.logger.info(f"Cache hit for key: {cache_key}")
                 return cached_data
         
-        # Execute pipeline components in sequence
+        if not self.coalesce_requests:
+            return self._run_pipeline(pipeline, request, cache_key)
+        
+        # Wait for an identical request already running instead of repeating it
+        data, shared = self._in_flight.do(
+            cache_key, lambda: self._run_pipeline(pipeline, request, cache_key)
+        )
+        if shared:
+            self.logger.info(f"Shared in-flight result for key: {cache_key}")
+        return data
+    
+    def _run_pipeline(self, pipeline: List[PipelineComponent], request: Dict[str, Any],
+                      cache_key: str) -> Any:
+        """Run pipeline components and cache the result
+        
+        Args:
+            pipeline: List of pipeline components
+            request: Request parameters
+            cache_key: Cache key for the request
+            
+        Returns:
+            Processed data
+        """
+        # Another caller may have finished this request since the cache check
+        if self.cache_enabled:
+            cached_data = self.cache.get(cache_key) if self.cache.contains(cache_key) else None
+            if cached_data is not None:
+                return cached_data
+        
         data = None
-        pipeline_metrics = {}
+        if self.cache_enabled and self.range_cache_enabled:
+            data = self._execute_from_ranges(pipeline, request)
+        if data is None:
+            data = self._compute(pipeline, request)
+        
+        # Cache result if enabled
+        if self.cache_enabled:
+            self._store_in_cache(cache_key, data)
+            self._register_range(request, cache_key, data)
+        
+        return data
+    
+    def _compute(self, pipeline: List[PipelineComponent], request: Dict[str, Any]) -> Any:
+        """Run pipeline components without consulting the result cache
+        
+        Components run as a dependency graph with memoized stage outputs
+        unless 'dag_execution' is disabled. In parallel mode, per-pair stages
+        run on the worker pool (memoized as a whole) and the stages from the
+        first one that needs all pairs on go through the dependency graph.
         
-        for component in pipeline:
-            start_time = time.time()
-            self.logger.debug(f"Executing component: {component.name}")
+        Args:
+            pipeline: List of pipeline components
+            request: Request parameters
             
-            try:
-                # Process data through this component
-                data = component.process(data, request)
-                
-                # Record metrics
-                end_time = time.time()
-                execution_time = end_time - start_time
-                pipeline_metrics[component.name] = execution_time
-                
-                self.logger.debug(f"Completed {component.name} in {execution_time:.4f} seconds")
-                
-            except Exception as e:
-                # Handle component error
-                self.logger.error(f"Error in component {component.name}: {str(e)}")
-                
-                # Create detailed error
-                error = PipelineError(
-                    message=f"Pipeline error in {component.name}: {str(e)}",
-                    component=component,
-                    stage=component.component_type,
-                    context=request
-                )
-                
-                # Add error handling logic here (retry, fallback, etc.)
-                self._handle_error(error, component, request)
-                
-                # Re-raise the error
-                raise error
+        Returns:
+            Processed data
+        """
+        pairs = request.get('pairs', [])
+        if self.parallel_mode != 'serial' and len(pairs) > 1 and request.get('data_type', 'price') == 'price':
+            data, pipeline_metrics = self._execute_per_pair(pipeline, request)
+        elif self.dag_enabled:
+            data, pipeline_metrics = self.dag_executor.execute(pipeline, request, self._execute_component)
+        else:
+            # Execute pipeline components in sequence
+            data = None
+            pipeline_metrics = {}
+            for component in pipeline:
+                data = self._execute_component(component, data, request, pipeline_metrics)
         
         # Store pipeline metrics
         pipeline_id = self._generate_pipeline_id(pipeline)
         self.metrics[pipeline_id] = pipeline_metrics
         
-        # Cache result if enabled
-        if self.cache_enabled:
-            self._store_in_cache(cache_key, data)
+        return data
+    
+    def _execute_from_ranges(self, pipeline: List[PipelineComponent],
+                             request: Dict[str, Any]) -> Optional[Any]:
+        """Build a result from cached results of overlapping date ranges
+        
+        Cached parts of the requested range are sliced from earlier results and
+        the pipeline only runs for the missing edges. Each edge is computed
+        with 'range_warmup' of extra history so rolling indicators and fills
+        match a single run over the whole range.
+        
+        Args:
+            pipeline: List of pipeline components
+            request: Request parameters
+            
+        Returns:
+            Combined data, or None if no cached result overlaps the range
+        """
+        start_ns = to_ns(request.get('start_date'))
+        end_ns = to_ns(request.get('end_date'))
+        if start_ns is None or end_ns is None or start_ns > end_ns:
+            return None
+        
+        range_key = self._generate_cache_key(request, include_dates=False)
+        warmup_ns = self.range_warmup.value
+        segments = self.range_index.plan(range_key, start_ns, end_ns, self.cache.contains, warmup_ns)
+        if not segments:
+            return None
+        
+        parts = []
+        edge_contexts = []
+        
+        for kind, lo, hi, key in segments:
+            if kind == 'cached':
+                cached_data = self.cache.get(key)
+                if cached_data is None:
+                    # Evicted since planning
+                    return None
+                parts.append(slice_result(cached_data, lo, hi))
+                continue
+            
+            # Whole days, widened outward; the result is trimmed to the edge below
+            edge_request = dict(request)
+            edge_request['start_date'] = from_ns(lo - warmup_ns).floor('D').strftime('%Y-%m-%d')
+            edge_request['end_date'] = from_ns(hi).ceil('D').strftime('%Y-%m-%d')
+            edge_data = self._compute(pipeline, edge_request)
+            if not is_range_sliceable(edge_data):
+                return None
+            
+            parts.append(slice_result(edge_data, lo, hi))
+            edge_contexts.append({k: v for k, v in edge_request.items()
+                                  if k not in ('start_date', 'end_date')})
+        
+        self._merge_pair_contexts(request, edge_contexts)
+        
+        computed = sum(1 for segment in segments if segment[0] == 'missing')
+        self.logger.info(f"Range cache hit: {len(segments) - computed} cached segments, "
+                         f"{computed} computed")
+        return combine_results(parts)
+    
+    def _register_range(self, request: Dict[str, Any], cache_key: str, data: Any) -> None:
+        """Record the date range covered by a cached result
+        
+        Args:
+            request: Request parameters
+            cache_key: Cache key the result is stored under
+            data: Cached result
+        """
+        if not self.range_cache_enabled or not self.cache.contains(cache_key):
+            return
+        
+        start_ns = to_ns(request.get('start_date'))
+        end_ns = to_ns(request.get('end_date'))
+        if start_ns is None or end_ns is None or not is_range_sliceable(data):
+            return
+        
+        range_key = self._generate_cache_key(request, include_dates=False)
+        self.range_index.register(range_key, start_ns, end_ns, cache_key)
+    
+    def _execute_component(self, component: PipelineComponent, data: Any,
+                           request: Dict[str, Any], pipeline_metrics: Dict[str, float]) -> Any:
+        """Execute a single component, recording its execution profile
+        
+        Args:
+            component: Component to execute
+            data: Input data
+            request: Request parameters
+            pipeline_metrics: Metrics dictionary to record into
+            
+        Returns:
+            Processed data
+        """
+        record = begin_stage(component, data)
+        self.logger.debug(f"Executing component: {component.name}")
+        
+        try:
+            # Process data through this component
+            data = component.process(data, request)
+            
+            # Record metrics
+            self.profiler.add(end_stage(record, data))
+            execution_time = record['wall_time']
+            pipeline_metrics[component.name] = execution_time
+            
+            self.logger.debug(f"Completed {component.name} in {execution_time:.4f} seconds "
+                              f"({record['rows_per_sec']:.0f} rows/s)")
+            return data
+            
+        except Exception as e:
+            self.profiler.add(end_stage(record, error=e))
+            
+            # Handle component error
+            self.logger.error(f"Error in component {component.name}: {str(e)}")
+            
+            # Create detailed error
+            error = PipelineError(
+                message=f"Pipeline error in {component.name}: {str(e)}",
+                component=component,
+                stage=component.component_type,
+                context=request
+            )
+            
+            # Add error handling logic here (retry, fallback, etc.)
+            self._handle_error(error, component, request)
+            
+            # Re-raise the error
+            raise error
+    
+    def _execute_per_pair(self, pipeline: List[PipelineComponent],
+                          request: Dict[str, Any]) -> Tuple[Any, Dict[str, float]]:
+        """Execute a pipeline with per-pair stages running concurrently
+        
+        Consecutive per-pair stages (loading, validation, normalization,
+        indicators) run as one task per pair on the executor. Results are
+        merged before stages that need all pairs at once, such as alignment
+        and serialization.
         
+        With DAG execution enabled, each per-pair segment is memoized as one
+        stage, and the rest of the pipeline from the first stage that needs
+        all pairs runs through the DAG executor, so changing an indicator
+        reuses the loaded and aligned data.
+        
+        Args:
+            pipeline: List of pipeline components
+            request: Request parameters
+            
+        Returns:
+            Tuple of (processed data, pipeline metrics)
+        """
+        pairs = list(request.get('pairs', []))
+        data = None
+        pipeline_metrics: Dict[str, float] = {}
+        data_key = self.dag_executor.request_key(request) if self.dag_enabled else None
+        
+        i = 0
+        while i < len(pipeline):
+            # Collect the next run of per-pair stages
+            segment = []
+            while i + len(segment) < len(pipeline) and \
+                    pipeline[i + len(segment)].component_type in self.parallel_stages:
+                segment.append(pipeline[i + len(segment)])
+            
+            split = self._split_by_pair(data, pairs) if segment else None
+            if split is None and self.dag_enabled:
+                # Stage needs all pairs (or data cannot be split); run the rest as a graph
+                data, graph_metrics = self.dag_executor.execute(
+                    pipeline[i:], request, self._execute_component, data=data, data_key=data_key)
+                pipeline_metrics.update(graph_metrics)
+                return data, pipeline_metrics
+            if split is None:
+                # Stage needs all pairs (or data cannot be split)
+                data = self._execute_component(pipeline[i], data, request, pipeline_metrics)
+                i += 1
+                continue
+            
+            run = lambda segment_data, segment_request, segment=segment: self._run_pair_segment(
+                segment, segment_data, segment_request, pairs, pipeline_metrics)
+            if self.dag_enabled:
+                data, data_key = self.dag_executor.run_segment(segment, data, request, data_key, run)
+            else:
+                data = run(data, request)
+            i += len(segment)
+        
+        if self.dag_enabled:
+            # Hand out a copy of the memoized output
+            data, _ = self.dag_executor.execute([], request, self._execute_component,
+                                                data=data, data_key=data_key)
+        return data, pipeline_metrics
+    
+    def _run_pair_segment(self, segment: List[PipelineComponent], data: Any, request: Dict[str, Any],
+                          pairs: List[str], pipeline_metrics: Dict[str, float]) -> Any:
+        """Run a segment of per-pair stages as one task per pair and merge the results
+        
+        Args:
+            segment: Per-pair components
+            data: Segment input
+            request: Request parameters (updated with the pairs' context)
+            pairs: Requested pairs
+            pipeline_metrics: Pipeline metrics to add stage times to
+            
+        Returns:
+            Merged output of the pairs
+        """
+        split = self._split_by_pair(data, pairs)
+        start_time = time.time()
+        executor = self._get_executor()
+        futures = {}
+        for pair in pairs:
+            pair_request = {k: (dict(v) if isinstance(v, dict) else v) for k, v in request.items()}
+            pair_request['pairs'] = [pair]
+            futures[pair] = executor.submit(_run_pair_stages, segment, split[pair], pair_request)
+        
+        pair_results = {}
+        pair_contexts = []
+        for pair in pairs:
+            try:
+                pair_data, pair_request, records = futures[pair].result()
+            except PipelineError as error:
+                self._handle_error(error, error.component or segment[0], request)
+                raise
+            pair_results[pair] = pair_data
+            pair_contexts.append(pair_request)
+            for record in records:
+                record['pair'] = pair
+                self.profiler.add(record)
+                name = record['component']
+                pipeline_metrics[name] = pipeline_metrics.get(name, 0.0) + record['wall_time']
+        
+        data = self._merge_pair_results(pair_results)
+        self._merge_pair_contexts(request, pair_contexts)
+        
+        self.logger.debug(f"Completed {'-'.join(c.name for c in segment)} for {len(pairs)} pairs "
+                          f"in {time.time() - start_time:.4f} seconds")
         return data
     
+    def _get_executor(self) -> Executor:
+        """Get (or create) the executor used for per-pair stages"""
+        if self._executor is None:
+            if self.parallel_mode == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='pipeline')
+        return self._executor
+    
+    def shutdown(self) -> None:
+        """Shut down the worker pools and the cache sweepers"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.dag_executor.shutdown()
+        if self.dag_executor.stage_cache is not None:
+            self.dag_executor.stage_cache.close()
+        self.cache.close()
+    
+    def _split_by_pair(self, data: Any, pairs: List[str]) -> Optional[Dict[str, Any]]:
+        """Split pipeline data into per-pair inputs
+        
+        Args:
+            data: Pipeline data (None, {pair: df} or {'price': ..., 'aligned_macro': ...})
+            pairs: Requested pairs
+            
+        Returns:
+            Dictionary of pair -> input data, or None if data cannot be split
+        """
+        if data is None:
+            return {pair: None for pair in pairs}
+        
+        if not isinstance(data, dict):
+            return None
+        
+        if 'price' in data or 'aligned_macro' in data:
+            if not all(isinstance(v, dict) for v in data.values()):
+                return None
+            return {pair: {key: ({pair: values[pair]} if pair in values else {})
+                           for key, values in data.items()}
+                    for pair in pairs}
+        
+        if set(data.keys()) <= set(pairs):
+            return {pair: ({pair: data[pair]} if pair in data else {}) for pair in pairs}
+        
+        return None
+    
+    def _merge_pair_results(self, pair_results: Dict[str, Any]) -> Any:
+        """Merge per-pair outputs back into a single data structure
+        
+        Args:
+            pair_results: Dictionary of pair -> output data
+            
+        Returns:
+            Merged data
+        """
+        merged: Dict[str, Any] = {}
+        for pair_data in pair_results.values():
+            if not isinstance(pair_data, dict):
+                continue
+            for key, value in pair_data.items():
+                if isinstance(value, dict) and key in ('price', 'aligned_macro'):
+                    merged.setdefault(key, {}).update(value)
+                else:
+                    merged[key] = value
+        return merged
+    
+    def _merge_pair_contexts(self, request: Dict[str, Any], pair_contexts: List[Dict[str, Any]]) -> None:
+        """Merge context entries written by per-pair stages into the request
+        
+        Nested dictionaries are merged, lists are concatenated and 'status'
+        values keep the most severe status.
+        
+        Args:
+            request: Request parameters to update
+            pair_contexts: Per-pair request copies after execution
+        """
+        def merge(target: Dict[str, Any], source: Dict[str, Any]) -> None:
+            for key, value in source.items():
+                if key not in target:
+                    target[key] = value
+                elif isinstance(target[key], dict) and isinstance(value, dict):
+                    merge(target[key], value)
+                elif isinstance(target[key], list) and isinstance(value, list):
+                    target[key].extend(v for v in value if v not in target[key])
+                elif key == 'status':
+                    if _STATUS_ORDER.get(value, 0) > _STATUS_ORDER.get(target[key], 0):
+                        target[key] = value
+                else:
+                    target[key] = value
+        
+        original = {k: (dict(v) if isinstance(v, dict) else v) for k, v in request.items()}
+        for pair_context in pair_contexts:
+            for key, value in pair_context.items():
+                if key == 'pairs':
+                    continue
+                if key not in original or value != original[key]:
+                    if isinstance(value, dict) and isinstance(request.get(key), dict):
+                        merge(request[key], value)
+                    else:
+                        request[key] = value
+    
     def get_data(self, pairs: List[str], start_date: str, end_date: str, 
                 data_type: str = 'price', indicators: List[str] = None, 
                 options: Dict[str, Any] = None) -> Any:
@@ -263,7 +719,9 @@ class DataPipelineOrchestrator:
     
     def clear_cache(self) -> None:
         """Clear the cache"""
-        self.cache = {}
+        self.cache.clear()
+        self.range_index.clear()
+        self.dag_executor.clear()
         self.logger.info("Cache cleared")
     
     def get_performance_metrics(self) -> Dict[str, Any]:
@@ -274,41 +732,45 @@ class DataPipelineOrchestrator:
         """
         return {
             'pipelines': self.metrics,
-            'components': self._aggregate_component_metrics()
+            'components': self._aggregate_component_metrics(),
+            'cache': self.cache.get_stats(),
+            'requests': self._in_flight.get_stats(),
+            'stages': self.dag_executor.get_stats()
         }
     
-    def _aggregate_component_metrics(self) -> Dict[str, Dict[str, float]]:
+    def _aggregate_component_metrics(self) -> Dict[str, Dict[str, Any]]:
         """Aggregate metrics by component
         
         Returns:
-            Dictionary of component metrics
+            Dictionary of component metrics (call counts, total and average
+            time, wall/CPU time and throughput percentiles, memory growth)
+        """
+        return self.profiler.summary()
+    
+    def export_profile(self, path: Optional[str] = None, format: str = 'json') -> Dict[str, Any]:
+        """Export per-stage profiling records
+        
+        Args:
+            path: File to write (optional)
+            format: 'json' for records with a per-component summary, or
+                'chrome' for Chrome trace format (chrome://tracing, Perfetto)
+            
+        Returns:
+            Exported dictionary
         """
-        component_metrics = {}
-        
-        for pipeline_metrics in self.metrics.values():
-            for component_name, execution_time in pipeline_metrics.items():
-                if component_name not in component_metrics:
-                    component_metrics[component_name] = {
-                        'total_time': 0.0,
-                        'call_count': 0,
-                        'avg_time': 0.0
-                    }
-                
-                component_metrics[component_name]['total_time'] += execution_time
-                component_metrics[component_name]['call_count'] += 1
-        
-        # Calculate averages
-        for metrics in component_metrics.values():
-            if metrics['call_count'] > 0:
-                metrics['avg_time'] = metrics['total_time'] / metrics['call_count']
-        
-        return component_metrics
+        if format == 'chrome':
+            return self.profiler.to_chrome_trace(path)
+        if format == 'json':
+            return self.profiler.to_json(path)
+        raise ValueError(f"Unknown profile format: {format}")
     
-    def _generate_cache_key(self, request: Dict[str, Any]) -> str:
+    def _generate_cache_key(self, request: Dict[str, Any], include_dates: bool = True) -> str:
         """Generate a cache key from request
         
         Args:
             request: Request parameters
+            include_dates: Whether the date range is part of the key; without
+                it the key identifies the range cache entry for the request
             
         Returns:
             Cache key string
@@ -316,20 +778,24 @@ class DataPipelineOrchestrator:
         # Create a serializable copy of the request
         cache_dict = {
             'pairs': sorted(request.get('pairs', [])),
-            'start_date': request.get('start_date', ''),
-            'end_date': request.get('end_date', ''),
             'data_type': request.get('data_type', ''),
             'indicators': sorted(request.get('indicators', [])),
             'options': {k: v for k, v in request.get('options', {}).items()
                       if isinstance(v, (str, bool, int, float))}
         }
+        if include_dates:
+            cache_dict['start_date'] = request.get('start_date', '')
+            cache_dict['end_date'] = request.get('end_date', '')
         
         # Convert to JSON and hash
         json_str = json.dumps(cache_dict, sort_keys=True)
         return hashlib.md5(json_str.encode()).hexdigest()
     
     def _generate_pipeline_id(self, pipeline: List[PipelineComponent]) -> str:
-        """Generate a unique ID for a pipeline
+        """Generate an ID identifying a pipeline's components
+        
+        The ID is stable across runs, so self.metrics holds one entry per
+        distinct pipeline rather than one per run.
         
         Args:
             pipeline: List of components
@@ -337,8 +803,7 @@ class DataPipelineOrchestrator:
         Returns:
             Pipeline ID string
         """
-        component_names = [component.name for component in pipeline]
-        return f"{'-'.join(component_names)}-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        return '-'.join(component.name for component in pipeline)
     
     def _get_from_cache(self, key: str) -> Optional[Any]:
         """Get data from cache
@@ -349,18 +814,7 @@ class DataPipelineOrchestrator:
         Returns:
             Cached data or None
         """
-        if key not in self.cache:
-            return None
-        
-        cache_entry = self.cache[key]
-        timestamp = cache_entry.get('timestamp', 0)
-        
-        # Check if entry has expired
-        if time.time() - timestamp > self.cache_ttl:
-            del self.cache[key]
-            return None
-        
-        return cache_entry.get('data')
+        return self.cache.get(key)
     
     def _store_in_cache(self, key: str, data: Any) -> None:
         """Store data in cache
@@ -369,11 +823,8 @@ class DataPipelineOrchestrator:
             key: Cache key
             data: Data to cache
         """
-        self.cache[key] = {
-            'data': data,
-            'timestamp': time.time()
-        }
-        self.logger.debug(f"Cached data with key: {key}")
+        if self.cache.put(key, data):
+            self.logger.debug(f"Cached data with key: {key}")
     
     def _handle_error(self, error: PipelineError, component: PipelineComponent, request: Dict[str, Any]) -> None:
         """Handle pipeline errors
@@ -0,0 +1,268 @@
+"""
+Profiling - Per-stage instrumentation for pipeline execution
+
+Each component execution produces a record with wall and CPU time, memory
+growth, rows and columns in and out, and throughput. Records are kept in a
+bounded ring buffer, aggregated per component with p50/p95/p99 percentiles,
+and can be exported as JSON or in Chrome trace format (chrome://tracing,
+Perfetto).
+
+Records are plain dictionaries so worker processes can build them and send
+them back with their results.
+"""
+
+import os
+import json
+import time
+import threading
+import tracemalloc
+from collections import deque
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+PERCENTILES = (50, 95, 99)
+
+
+def data_shape(data: Any) -> Tuple[int, int]:
+    """Count rows and columns across all frames in a pipeline result
+
+    Args:
+        data: DataFrame, Series, array, or nested dicts/lists of them
+
+    Returns:
+        Tuple of (total rows, total columns)
+    """
+    if isinstance(data, pd.DataFrame):
+        return data.shape
+    if isinstance(data, pd.Series):
+        return len(data), 1
+    if isinstance(data, np.ndarray):
+        return (data.shape[0], data.shape[1] if data.ndim > 1 else 1) if data.ndim else (0, 0)
+    if isinstance(data, dict):
+        data = list(data.values())
+    if isinstance(data, (list, tuple)):
+        rows, cols = 0, 0
+        for item in data:
+            r, c = data_shape(item)
+            rows += r
+            cols += c
+        return rows, cols
+    return 0, 0
+
+
+def _peak_rss_kb() -> Optional[int]:
+    """Peak resident set size of this process in KB"""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def begin_stage(component: Any, data: Any) -> Dict[str, Any]:
+    """Start measuring a component execution
+
+    Args:
+        component: Component about to run
+        data: Its input data
+
+    Returns:
+        Partial record to pass to end_stage
+    """
+    rows, cols = data_shape(data)
+    record = {
+        'component': component.name,
+        'type': component.component_type,
+        'pid': os.getpid(),
+        'thread': threading.get_ident(),
+        'start': time.time(),
+        'rows_in': int(rows),
+        'cols_in': int(cols),
+        '_wall': time.perf_counter(),
+        '_cpu': time.thread_time(),
+        '_rss': _peak_rss_kb()
+    }
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        record['_traced'] = tracemalloc.get_traced_memory()[0]
+    return record
+
+
+def end_stage(record: Dict[str, Any], data: Any = None, error: Optional[BaseException] = None) -> Dict[str, Any]:
+    """Finish measuring a component execution
+
+    Memory figures are process-wide, so they include other stages running
+    concurrently in the same process.
+
+    Args:
+        record: Record returned by begin_stage
+        data: Output data (None if the component failed)
+        error: Exception raised by the component, if any
+
+    Returns:
+        Completed record
+    """
+    wall = time.perf_counter() - record.pop('_wall')
+    cpu = time.thread_time() - record.pop('_cpu')
+    rss_before = record.pop('_rss')
+    traced_before = record.pop('_traced', None)
+
+    rows, cols = data_shape(data) if error is None else (0, 0)
+    record.update({
+        'wall_time': wall,
+        'cpu_time': cpu,
+        'rows_out': int(rows),
+        'cols_out': int(cols),
+        'rows_per_sec': max(record['rows_in'], rows) / wall if wall > 0 else 0.0,
+        'rss_growth_kb': None,
+        'traced_peak_bytes': None,
+        'error': str(error) if error is not None else None
+    })
+
+    rss_after = _peak_rss_kb()
+    if rss_before is not None and rss_after is not None:
+        record['rss_growth_kb'] = rss_after - rss_before
+    if traced_before is not None and tracemalloc.is_tracing():
+        record['traced_peak_bytes'] = tracemalloc.get_traced_memory()[1] - traced_before
+
+    return record
+
+
+class StageProfiler:
+    """
+    Bounded store of stage records with per-component aggregation
+
+    Parameters:
+    -----------
+    capacity : int
+        Maximum number of records kept; older records are dropped (default: 10000)
+    trace_memory : bool
+        Start tracemalloc to record peak Python allocations per stage. This
+        slows execution noticeably (default: False)
+    """
+
+    def __init__(self, capacity: int = 10000, trace_memory: bool = False):
+        self.capacity = capacity
+        self._records: deque = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._total = 0
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def add(self, record: Dict[str, Any]) -> None:
+        """Store a completed record"""
+        with self._lock:
+            self._records.append(record)
+            self._total += 1
+
+    def records(self, component: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get stored records, oldest first
+
+        Args:
+            component: Only return records for this component
+        """
+        with self._lock:
+            records = list(self._records)
+        if component is not None:
+            records = [r for r in records if r['component'] == component]
+        return records
+
+    def clear(self) -> None:
+        """Remove all records"""
+        with self._lock:
+            self._records.clear()
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Aggregate stored records per component
+
+        Returns:
+            Dictionary by component name with call and error counts, total and
+            mean wall time, wall/CPU time and throughput percentiles, and the
+            largest memory growth observed
+        """
+        by_component: Dict[str, List[Dict[str, Any]]] = {}
+        for record in self.records():
+            by_component.setdefault(record['component'], []).append(record)
+
+        summary = {}
+        for name, records in by_component.items():
+            wall = np.array([r['wall_time'] for r in records])
+            cpu = np.array([r['cpu_time'] for r in records])
+            throughput = np.array([r['rows_per_sec'] for r in records])
+            rss = [r['rss_growth_kb'] for r in records if r.get('rss_growth_kb') is not None]
+            traced = [r['traced_peak_bytes'] for r in records if r.get('traced_peak_bytes') is not None]
+
+            stats = {
+                'type': records[-1]['type'],
+                'call_count': len(records),
+                'error_count': sum(1 for r in records if r.get('error')),
+                'total_time': float(wall.sum()),
+                'avg_time': float(wall.mean()),
+                'max_rss_growth_kb': max(rss) if rss else None,
+                'max_traced_peak_bytes': max(traced) if traced else None,
+                'rows_in': int(sum(r['rows_in'] for r in records)),
+                'rows_out': int(sum(r['rows_out'] for r in records))
+            }
+            for label, values in (('wall', wall), ('cpu', cpu), ('rows_per_sec', throughput)):
+                for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+                    stats[f"{label}_p{q}"] = float(value)
+            summary[name] = stats
+
+        return summary
+
+    def to_json(self, path: Optional[str] = None) -> Dict[str, Any]:
+        """Export records and the per-component summary as JSON
+
+        Args:
+            path: File to write (optional)
+
+        Returns:
+            Exported dictionary
+        """
+        with self._lock:
+            dropped = self._total - len(self._records)
+        export = {
+            'capacity': self.capacity,
+            'dropped': dropped,
+            'summary': self.summary(),
+            'records': self.records()
+        }
+        if path:
+            with open(path, 'w') as f:
+                json.dump(export, f, indent=2, default=str)
+        return export
+
+    def to_chrome_trace(self, path: Optional[str] = None) -> Dict[str, Any]:
+        """Export records in Chrome trace event format
+
+        Args:
+            path: File to write (optional)
+
+        Returns:
+            Trace dictionary with a 'traceEvents' list
+        """
+        events = []
+        for record in self.records():
+            args = {k: v for k, v in record.items()
+                    if k not in ('component', 'type', 'pid', 'thread', 'start', 'wall_time') and v is not None}
+            events.append({
+                'name': record['component'],
+                'cat': record['type'],
+                'ph': 'X',
+                'ts': record['start'] * 1e6,
+                'dur': record['wall_time'] * 1e6,
+                'pid': record['pid'],
+                'tid': record['thread'],
+                'args': args
+            })
+
+        trace = {'traceEvents': events, 'displayTimeUnit': 'ms'}
+        if path:
+            with open(path, 'w') as f:
+                json.dump(trace, f, default=str)
+        return trace
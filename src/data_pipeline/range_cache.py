@@ -0,0 +1,196 @@
+"""
+Range Cache - Date-interval index over cached pipeline results
+
+Cached results are registered under a range key (the request without its
+dates) together with the date interval they cover. A request whose interval
+is covered by cached results can then be served by slicing them, and a
+request that only partly overlaps needs the pipeline to run for the missing
+edges only. Results must be (nested dicts/lists of) DataFrames and Series
+with a DatetimeIndex for this to apply.
+"""
+
+import threading
+from typing import Dict, Any, List, Optional, Tuple, Callable, Hashable
+
+import pandas as pd
+
+# (kind, start_ns, end_ns, cache_key) with inclusive nanosecond bounds;
+# kind is 'cached' or 'missing'
+Segment = Tuple[str, int, int, Optional[Hashable]]
+
+
+def to_ns(value: Any) -> Optional[int]:
+    """Convert a date bound to nanoseconds, or None if it is empty"""
+    if value is None or value == '':
+        return None
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert('UTC').tz_localize(None)
+    return int(ts.value)
+
+
+def from_ns(value: int) -> pd.Timestamp:
+    """Convert nanoseconds back to a naive timestamp"""
+    return pd.Timestamp(value)
+
+
+def is_range_sliceable(data: Any) -> bool:
+    """Check whether a result can be sliced by date
+
+    Every DataFrame and Series in the result must have a DatetimeIndex, and
+    there must be at least one of them.
+    """
+    found = []
+
+    def visit(obj: Any) -> bool:
+        if isinstance(obj, (pd.DataFrame, pd.Series)):
+            found.append(True)
+            return isinstance(obj.index, pd.DatetimeIndex)
+        if isinstance(obj, dict):
+            return all(visit(v) for v in obj.values())
+        if isinstance(obj, (list, tuple)):
+            return all(visit(v) for v in obj)
+        return True
+
+    return visit(data) and bool(found)
+
+
+def slice_result(data: Any, start_ns: int, end_ns: int) -> Any:
+    """Slice every frame in a result to an inclusive date interval
+
+    Args:
+        data: Result structure
+        start_ns: Start bound in nanoseconds (inclusive)
+        end_ns: End bound in nanoseconds (inclusive)
+
+    Returns:
+        Structure of the same shape with sliced frames
+    """
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        index = data.index
+        start, end = from_ns(start_ns), from_ns(end_ns)
+        if index.tz is not None:
+            start = start.tz_localize('UTC').tz_convert(index.tz)
+            end = end.tz_localize('UTC').tz_convert(index.tz)
+        return data[(index >= start) & (index <= end)]
+    if isinstance(data, dict):
+        return {k: slice_result(v, start_ns, end_ns) for k, v in data.items()}
+    if isinstance(data, list):
+        return [slice_result(v, start_ns, end_ns) for v in data]
+    if isinstance(data, tuple):
+        return tuple(slice_result(v, start_ns, end_ns) for v in data)
+    return data
+
+
+def combine_results(parts: List[Any]) -> Any:
+    """Concatenate result structures covering consecutive intervals
+
+    Args:
+        parts: Results in date order
+
+    Returns:
+        Combined result; non-frame values are taken from the last part
+    """
+    parts = [p for p in parts if p is not None]
+    if not parts:
+        return None
+
+    first = parts[0]
+    if isinstance(first, (pd.DataFrame, pd.Series)):
+        frames = [p for p in parts if isinstance(p, type(first)) and len(p) > 0]
+        if not frames:
+            return first
+        combined = pd.concat(frames) if len(frames) > 1 else frames[0]
+        if not combined.index.is_monotonic_increasing:
+            combined = combined.sort_index()
+        return combined[~combined.index.duplicated(keep='last')]
+    if isinstance(first, dict):
+        keys = list(first)
+        for part in parts[1:]:
+            if isinstance(part, dict):
+                keys.extend(k for k in part if k not in keys)
+        return {
+            k: combine_results([p[k] for p in parts if isinstance(p, dict) and k in p])
+            for k in keys
+        }
+    if isinstance(first, (list, tuple)) and all(
+            isinstance(p, type(first)) and len(p) == len(first) for p in parts):
+        combined = [combine_results([p[i] for p in parts]) for i in range(len(first))]
+        return combined if isinstance(first, list) else tuple(combined)
+    return parts[-1]
+
+
+class RangeCacheIndex:
+    """Thread-safe index of cached date intervals per range key"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._intervals: Dict[Hashable, List[Tuple[int, int, Hashable]]] = {}
+
+    def register(self, range_key: Hashable, start_ns: int, end_ns: int, cache_key: Hashable) -> None:
+        """Record that cache_key holds the result for an interval
+
+        Intervals contained in the new one are dropped from the index.
+        """
+        with self._lock:
+            intervals = [
+                iv for iv in self._intervals.get(range_key, [])
+                if not (start_ns <= iv[0] and iv[1] <= end_ns) and iv[2] != cache_key
+            ]
+            intervals.append((start_ns, end_ns, cache_key))
+            self._intervals[range_key] = intervals
+
+    def plan(self, range_key: Hashable, start_ns: int, end_ns: int,
+             is_cached: Callable[[Hashable], bool], warmup_ns: int = 0) -> Optional[List[Segment]]:
+        """Split an interval into cached and missing segments
+
+        The first warmup_ns of a cached interval that starts after the request
+        does not count as covered, since its rolling values were computed
+        without the history the combined result has.
+
+        Args:
+            range_key: Range key of the request
+            start_ns: Start bound in nanoseconds (inclusive)
+            end_ns: End bound in nanoseconds (inclusive)
+            is_cached: Returns whether a cache key is still cached
+            warmup_ns: History needed before a value is complete
+
+        Returns:
+            Segments in date order, or None if no part of the interval is cached
+        """
+        with self._lock:
+            live = [iv for iv in self._intervals.get(range_key, []) if is_cached(iv[2])]
+            if live:
+                self._intervals[range_key] = live
+            else:
+                self._intervals.pop(range_key, None)
+
+        candidates = []
+        for lo, hi, key in live:
+            if lo > start_ns:
+                lo += warmup_ns
+            if lo <= hi and lo <= end_ns and hi >= start_ns:
+                candidates.append((lo, hi, key))
+        if not candidates:
+            return None
+
+        segments: List[Segment] = []
+        cursor = start_ns
+        while cursor <= end_ns:
+            covering = [iv for iv in candidates if iv[0] <= cursor <= iv[1]]
+            if covering:
+                best = max(covering, key=lambda iv: iv[1])
+                hi = min(best[1], end_ns)
+                segments.append(('cached', cursor, hi, best[2]))
+            else:
+                next_start = min((iv[0] for iv in candidates if iv[0] > cursor), default=end_ns + 1)
+                hi = min(next_start - 1, end_ns)
+                segments.append(('missing', cursor, hi, None))
+            cursor = hi + 1
+
+        return segments
+
+    def clear(self) -> None:
+        """Remove all intervals"""
+        with self._lock:
+            self._intervals.clear()
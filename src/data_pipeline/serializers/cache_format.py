@@ -0,0 +1,277 @@
+"""
+Cache Format - Memory-mappable file format for cached pipeline data
+
+A cache file is a small JSON header followed by raw NumPy blocks:
+
+    [8 bytes magic][8 bytes header length][JSON header][padding][blocks...]
+
+The header holds the metadata (timestamp, TTL, key) and a schema describing
+how to rebuild the cached structure (dicts of DataFrames, Series, arrays and
+JSON scalars) from the blocks. Blocks are aligned to 64 bytes, so loading
+memory-maps the file and wraps the blocks as arrays without copying them,
+so loaded arrays and frames are read-only unless a writable copy is asked
+for. Reading the header alone is enough to check an entry's age.
+
+Data that cannot be described this way (object columns, extension dtypes,
+non-string keys, arbitrary objects) is stored as a pickle payload after the
+same header.
+"""
+
+import os
+import json
+import struct
+import pickle
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Tuple
+
+MAGIC = b'BBCACHE1'
+ALIGNMENT = 64
+_PREFIX = struct.Struct('<8sQ')
+
+# Array kinds that can be stored as raw blocks
+_BLOCK_KINDS = 'biufcmM'
+
+
+class UnsupportedCacheData(Exception):
+    """Raised when data cannot be stored as raw blocks"""
+    pass
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _json_value(value: Any) -> Any:
+    """Convert a scalar to a JSON-compatible value"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    raise UnsupportedCacheData(f"Unsupported value type: {type(value).__name__}")
+
+
+class _Encoder:
+    """Builds the schema and block list for a cached structure"""
+
+    def __init__(self):
+        self.blocks: List[np.ndarray] = []
+
+    def add_block(self, array: np.ndarray) -> int:
+        if not isinstance(array.dtype, np.dtype) or array.dtype.kind not in _BLOCK_KINDS:
+            raise UnsupportedCacheData(f"Unsupported dtype: {array.dtype}")
+        self.blocks.append(np.ascontiguousarray(array))
+        return len(self.blocks) - 1
+
+    def encode(self, obj: Any) -> Dict[str, Any]:
+        if isinstance(obj, pd.DataFrame):
+            return self.encode_frame(obj)
+        if isinstance(obj, pd.Series):
+            return {
+                'type': 'series',
+                'name': _json_value(obj.name),
+                'index': self.encode_index(obj.index),
+                'block': self.add_block(obj.to_numpy())
+            }
+        if isinstance(obj, np.ndarray):
+            return {'type': 'ndarray', 'block': self.add_block(obj)}
+        if isinstance(obj, dict):
+            if not all(isinstance(k, str) for k in obj):
+                raise UnsupportedCacheData("Dictionary keys must be strings")
+            return {'type': 'dict', 'items': [[k, self.encode(v)] for k, v in obj.items()]}
+        if isinstance(obj, (list, tuple)):
+            return {'type': 'tuple' if isinstance(obj, tuple) else 'list',
+                    'items': [self.encode(v) for v in obj]}
+        return {'type': 'value', 'value': _json_value(obj)}
+
+    def encode_frame(self, df: pd.DataFrame) -> Dict[str, Any]:
+        if isinstance(df.columns, pd.MultiIndex):
+            raise UnsupportedCacheData("MultiIndex columns are not supported")
+        return {
+            'type': 'frame',
+            'index': self.encode_index(df.index),
+            'columns': [_json_value(col) for col in df.columns],
+            'blocks': [self.add_block(df.iloc[:, i].to_numpy()) for i in range(df.shape[1])]
+        }
+
+    def encode_index(self, index: pd.Index) -> Dict[str, Any]:
+        name = _json_value(index.name)
+        if isinstance(index, pd.RangeIndex):
+            return {'type': 'range', 'name': name,
+                    'start': index.start, 'stop': index.stop, 'step': index.step}
+        if isinstance(index, pd.DatetimeIndex):
+            tz = str(index.tz) if index.tz is not None else None
+            values = index.tz_convert('UTC').tz_localize(None) if tz else index
+            return {'type': 'datetime', 'name': name, 'tz': tz,
+                    'block': self.add_block(np.asarray(values.values))}
+        if isinstance(index, pd.MultiIndex):
+            raise UnsupportedCacheData("MultiIndex is not supported")
+        if isinstance(index.dtype, np.dtype) and index.dtype.kind in _BLOCK_KINDS:
+            return {'type': 'array', 'name': name, 'block': self.add_block(index.to_numpy())}
+        return {'type': 'values', 'name': name, 'values': [_json_value(v) for v in index]}
+
+
+class _Decoder:
+    """Rebuilds a cached structure from memory-mapped blocks"""
+
+    def __init__(self, blocks: List[np.ndarray]):
+        self.blocks = blocks
+
+    def decode(self, node: Dict[str, Any]) -> Any:
+        node_type = node['type']
+        if node_type == 'frame':
+            index = self.decode_index(node['index'])
+            data = {i: self.blocks[b] for i, b in enumerate(node['blocks'])}
+            df = pd.DataFrame(data, index=index, copy=False)
+            df.columns = pd.Index(node['columns'])
+            return df
+        if node_type == 'series':
+            return pd.Series(self.blocks[node['block']], index=self.decode_index(node['index']),
+                             name=node['name'], copy=False)
+        if node_type == 'ndarray':
+            return self.blocks[node['block']]
+        if node_type == 'dict':
+            return {k: self.decode(v) for k, v in node['items']}
+        if node_type == 'list':
+            return [self.decode(v) for v in node['items']]
+        if node_type == 'tuple':
+            return tuple(self.decode(v) for v in node['items'])
+        return node['value']
+
+    def decode_index(self, node: Dict[str, Any]) -> pd.Index:
+        node_type = node['type']
+        if node_type == 'range':
+            return pd.RangeIndex(node['start'], node['stop'], node['step'], name=node['name'])
+        if node_type == 'datetime':
+            index = pd.DatetimeIndex(self.blocks[node['block']], name=node['name'])
+            if node.get('tz'):
+                index = index.tz_localize('UTC').tz_convert(node['tz'])
+            return index
+        if node_type == 'array':
+            return pd.Index(self.blocks[node['block']], name=node['name'], copy=False)
+        return pd.Index(node['values'], name=node['name'])
+
+
+def write_cache_file(path: str, data: Any, metadata: Dict[str, Any], use_pickle: bool = False) -> str:
+    """Write data to a cache file
+
+    Args:
+        path: Destination path
+        data: Data to cache
+        metadata: Header metadata (timestamp, ttl, key, ...)
+        use_pickle: Store as pickle payload even if blocks are possible
+
+    Returns:
+        Storage format used ('blocks' or 'pickle')
+    """
+    blocks: List[np.ndarray] = []
+    payload = None
+    header = dict(metadata)
+
+    try:
+        if use_pickle:
+            raise UnsupportedCacheData("Pickle format requested")
+        encoder = _Encoder()
+        header['schema'] = encoder.encode(data)
+        blocks = encoder.blocks
+        header['format'] = 'blocks'
+    except UnsupportedCacheData:
+        payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        header['schema'] = None
+        header['format'] = 'pickle'
+        blocks = []
+
+    # Lay out blocks relative to the start of the data section
+    layout = []
+    offset = 0
+    for block in blocks:
+        offset = _align(offset)
+        layout.append({'offset': offset, 'dtype': block.dtype.str, 'shape': list(block.shape)})
+        offset += block.nbytes
+    header['blocks'] = layout
+    if payload is not None:
+        header['payload'] = {'offset': 0, 'size': len(payload)}
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = _align(_PREFIX.size + len(header_bytes))
+
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREFIX.pack(MAGIC, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b'\0' * (data_start - f.tell()))
+
+        if payload is not None:
+            f.write(payload)
+        for block, info in zip(blocks, layout):
+            f.write(b'\0' * (data_start + info['offset'] - f.tell()))
+            f.write(block.reshape(-1).view(np.uint8).data)
+
+    os.replace(tmp_path, path)
+    return header['format']
+
+
+def read_cache_header(path: str) -> Optional[Dict[str, Any]]:
+    """Read only the JSON header of a cache file
+
+    Args:
+        path: Cache file path
+
+    Returns:
+        Header dictionary, or None if the file is not in this format
+    """
+    with open(path, 'rb') as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            return None
+        magic, header_len = _PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            return None
+        header = json.loads(f.read(header_len).decode('utf-8'))
+
+    header['_data_start'] = _align(_PREFIX.size + header_len)
+    return header
+
+
+def read_cache_file(path: str, header: Optional[Dict[str, Any]] = None,
+                    writable: bool = False) -> Tuple[Dict[str, Any], Any]:
+    """Read a cache file, memory-mapping its blocks
+
+    Args:
+        path: Cache file path
+        header: Previously read header (optional)
+        writable: Copy the blocks into memory so the data can be modified
+
+    Returns:
+        Tuple of (header, data). Unless writable, arrays in the returned data
+        (including DataFrame and Series values) are read-only views into the
+        memory-mapped file, and assigning into them raises ValueError.
+    """
+    if header is None:
+        header = read_cache_header(path)
+        if header is None:
+            raise ValueError(f"Not a cache file: {path}")
+
+    data_start = header['_data_start']
+
+    if header.get('format') == 'pickle':
+        with open(path, 'rb') as f:
+            f.seek(data_start + header['payload']['offset'])
+            return header, pickle.loads(f.read(header['payload']['size']))
+
+    if header['blocks'] and os.path.getsize(path) > data_start:
+        mm = np.memmap(path, dtype=np.uint8, mode='r')
+    else:
+        mm = None
+
+    blocks = []
+    for info in header['blocks']:
+        dtype = np.dtype(info['dtype'])
+        shape = tuple(info['shape'])
+        if mm is None or int(np.prod(shape)) == 0:
+            blocks.append(np.empty(shape, dtype=dtype))
+        else:
+            block = np.ndarray(shape, dtype=dtype, buffer=mm, offset=data_start + info['offset'])
+            blocks.append(block.copy() if writable else block)
+
+    return header, _Decoder(blocks).decode(header['schema'])
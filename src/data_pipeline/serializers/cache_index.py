@@ -0,0 +1,242 @@
+"""
+Cache Index - SQLite manifest of cache entries
+
+This module keeps a small SQLite database next to the cache files recording
+each entry's key, size, creation time, last access time and expiry. Pruning,
+TTL expiry and size queries run against indexed columns instead of listing
+and stat-ing the cache directory, and never open payload files. Entry count
+and total size are maintained by triggers so they are O(1) to read.
+
+SQLite's file locking (in WAL mode) makes the index safe to share between
+processes writing to the same cache directory.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+INDEX_FILENAME = '.cache_index.sqlite'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    expires REAL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE INDEX IF NOT EXISTS entries_created ON entries (created);
+CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires);
+
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals (id, entries, bytes) VALUES (0, 0, 0);
+
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE totals SET entries = entries + 1, bytes = bytes + NEW.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE totals SET entries = entries - 1, bytes = bytes - OLD.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+    UPDATE totals SET bytes = bytes - OLD.size + NEW.size WHERE id = 0;
+END;
+"""
+
+
+class CacheIndex:
+    """
+    SQLite-backed manifest of the entries in a cache directory
+
+    Parameters:
+    -----------
+    cache_dir : str
+        Cache directory the index describes
+    timeout : float
+        Seconds to wait for another process holding the write lock (default: 30)
+    """
+
+    def __init__(self, cache_dir: str, timeout: float = 30.0):
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = None
+
+    @property
+    def index_path(self) -> str:
+        """Path of the index database"""
+        return os.path.join(self.cache_dir, INDEX_FILENAME)
+
+    def record(self, key: str, size: int, created: Optional[float] = None,
+               ttl: Optional[float] = None) -> None:
+        """Add or replace an entry
+
+        Args:
+            key: Cache key
+            size: Payload size in bytes
+            created: Creation time (default: now)
+            ttl: Time-to-live in seconds (None for no expiry)
+        """
+        created = time.time() if created is None else created
+        expires = created + ttl if ttl is not None else None
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO entries (key, size, created, accessed, expires) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET size = excluded.size, created = excluded.created, "
+                "accessed = excluded.accessed, expires = excluded.expires",
+                (key, int(size), created, created, expires)
+            )
+
+    def touch(self, key: str) -> None:
+        """Update the last access time of an entry"""
+        with self._transaction() as conn:
+            conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+
+    def remove(self, keys: List[str]) -> None:
+        """Remove entries from the index"""
+        if not keys:
+            return
+        with self._transaction() as conn:
+            conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in keys])
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get the index record for a key
+
+        Returns:
+            Dictionary with size, created, accessed and expires, or None
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT size, created, accessed, expires FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'key': key, 'size': row[0], 'created': row[1], 'accessed': row[2], 'expires': row[3]}
+
+    def totals(self) -> Tuple[int, int]:
+        """Get the number of entries and their total size in bytes"""
+        with self._lock:
+            row = self._connection().execute("SELECT entries, bytes FROM totals WHERE id = 0").fetchone()
+        return (row[0], row[1]) if row else (0, 0)
+
+    def take_expired(self, now: Optional[float] = None) -> List[str]:
+        """Remove and return the keys of entries past their expiry time"""
+        now = time.time() if now is None else now
+        return self._take("SELECT key FROM entries WHERE expires < ?", (now,))
+
+    def take_created_before(self, cutoff: Optional[float] = None) -> List[str]:
+        """Remove and return the keys of entries created before a cutoff (all if None)"""
+        if cutoff is None:
+            return self._take("SELECT key FROM entries", ())
+        return self._take("SELECT key FROM entries WHERE created < ?", (cutoff,))
+
+    def take_excess(self, max_entries: Optional[int] = None,
+                    max_bytes: Optional[int] = None) -> List[str]:
+        """Remove and return least recently accessed entries until within budget
+
+        Args:
+            max_entries: Maximum number of entries to keep
+            max_bytes: Maximum total size to keep
+
+        Returns:
+            Keys of the removed entries
+        """
+        with self._transaction() as conn:
+            count, total = conn.execute("SELECT entries, bytes FROM totals WHERE id = 0").fetchone()
+            over_count = max(0, count - max_entries) if max_entries is not None else 0
+            over_bytes = total - max_bytes if max_bytes is not None else 0
+            if over_count <= 0 and over_bytes <= 0:
+                return []
+
+            victims = []
+            freed = 0
+            for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+                if len(victims) >= over_count and freed >= over_bytes:
+                    break
+                victims.append(key)
+                freed += size
+
+            conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in victims])
+            return victims
+
+    def rebuild(self, entries: List[Dict[str, Any]]) -> None:
+        """Replace the index contents
+
+        Args:
+            entries: Dictionaries with key, size, created and optional ttl
+        """
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM entries")
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, size, created, accessed, expires) VALUES (?, ?, ?, ?, ?)",
+                [(e['key'], int(e['size']), e['created'], e['created'],
+                  e['created'] + e['ttl'] if e.get('ttl') is not None else None) for e in entries]
+            )
+
+    def is_new(self) -> bool:
+        """Check whether the index database has not been created yet"""
+        return not os.path.exists(self.index_path)
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+    def _take(self, query: str, params: Tuple) -> List[str]:
+        """Select keys and delete them in one transaction"""
+        with self._transaction() as conn:
+            keys = [row[0] for row in conn.execute(query, params)]
+            conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in keys])
+            return keys
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the connection for this process, opening it if needed"""
+        # Connections must not be shared with forked children
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(self.cache_dir, exist_ok=True)
+            conn = sqlite3.connect(self.index_path, timeout=self.timeout,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _transaction(self) -> '_Transaction':
+        return _Transaction(self)
+
+
+class _Transaction:
+    """Write transaction holding the database write lock"""
+
+    def __init__(self, index: CacheIndex):
+        self.index = index
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.index._lock.acquire()
+        try:
+            self.conn = self.index._connection()
+            self.conn.execute("BEGIN IMMEDIATE")
+        except Exception:
+            self.index._lock.release()
+            raise
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            self.conn.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        finally:
+            self.index._lock.release()
@@ -2,6 +2,8 @@
 Cache Manager - Component for caching pipeline data
 
 This component manages caching of pipeline data for performance optimization.
+Entries are tracked in a SQLite index in the cache directory, so pruning,
+expiry and size queries do not need to list or open the cache files.
 """
 
 import os
@@ -14,6 +16,10 @@ from datetime import datetime
 
 from balance_breaker.src.core.interface_registry import implements
 from balance_breaker.src.data_pipeline.base import BaseSerializer
+from balance_breaker.src.data_pipeline.serializers.cache_format import (
+    write_cache_file, read_cache_header, read_cache_file
+)
+from balance_breaker.src.data_pipeline.serializers.cache_index import CacheIndex
 
 @implements("DataSerializer")
 class CacheManager(BaseSerializer):
@@ -32,6 +38,18 @@ class CacheManager(BaseSerializer):
         Whether to use compression for cache files (default: True)
     max_cache_size : int
         Maximum number of cache entries to keep (default: 1000)
+    max_cache_bytes : int
+        Maximum total size of cache files in bytes (default: None, no limit)
+    auto_prune : bool
+        Whether to prune least recently used entries when saving exceeds the
+        limits above (default: True)
+    cache_format : str
+        'blocks' to store DataFrames as memory-mappable NumPy blocks, or
+        'pickle' to always pickle (default: 'blocks')
+    cache_writable : bool
+        Whether loaded 'blocks' entries are copied into memory so they can be
+        modified; otherwise their arrays and frames are read-only views of the
+        cache file (default: False)
     """
     
     def __init__(self, parameters=None):
@@ -41,7 +59,11 @@ class CacheManager(BaseSerializer):
             'cache_ttl': 3600,  # 1 hour
             'use_hash': True,
             'compression': True,
-            'max_cache_size': 1000
+            'max_cache_size': 1000,
+            'max_cache_bytes': None,
+            'auto_prune': True,
+            'cache_format': 'blocks',
+            'cache_writable': False
         }
         
         # Initialize with parameters
@@ -51,6 +73,9 @@ class CacheManager(BaseSerializer):
         cache_dir = self.parameters.get('cache_dir')
         if cache_dir and not os.path.exists(cache_dir):
             os.makedirs(cache_dir)
+        
+        # Cache indexes by directory
+        self._indexes: Dict[str, CacheIndex] = {}
     
     def serialize(self, data: Any, context: Dict[str, Any]) -> Any:
         """Cache data or retrieve from cache
@@ -61,6 +86,7 @@ class CacheManager(BaseSerializer):
                 - cache_key: Custom cache key
                 - cache_ttl: Custom TTL for this cache entry
                 - cache_operation: 'save', 'load', or 'check'
+                - cache_writable: Load a modifiable copy instead of read-only views
                 
         Returns:
             Cached data if loading, original data if saving or checking
@@ -83,13 +109,14 @@ class CacheManager(BaseSerializer):
             # Handle different operations
             if operation == 'save':
                 # Save data to cache
-                success = self._save_to_cache(data, cache_key, cache_dir)
+                success = self._save_to_cache(data, cache_key, cache_dir, cache_ttl)
                 context['cache_saved'] = success
                 return data
                 
             elif operation == 'load':
                 # Try to load data from cache
-                cached_data = self._load_from_cache(cache_key, cache_dir, cache_ttl)
+                writable = context.get('cache_writable', self.parameters.get('cache_writable', False))
+                cached_data = self._load_from_cache(cache_key, cache_dir, cache_ttl, writable)
                 if cached_data is not None:
                     context['cache_hit'] = True
                     return cached_data
@@ -196,13 +223,17 @@ class CacheManager(BaseSerializer):
         """
         return os.path.join(cache_dir, f"{cache_key}.cache")
     
-    def _save_to_cache(self, data: Any, cache_key: str, cache_dir: str) -> bool:
+    def _save_to_cache(self, data: Any, cache_key: str, cache_dir: str, ttl: Optional[int] = None) -> bool:
         """Save data to cache
         
+        DataFrames, Series and arrays are written as raw NumPy blocks behind a
+        JSON header so they can be memory-mapped on load; other data is pickled.
+        
         Args:
             data: Data to cache
             cache_key: Cache key
             cache_dir: Cache directory
+            ttl: Time-to-live recorded in the header (optional)
             
         Returns:
             True if successful, False otherwise
@@ -214,25 +245,24 @@ class CacheManager(BaseSerializer):
             metadata = {
                 'timestamp': time.time(),
                 'key': cache_key,
-                'created': datetime.now().isoformat()
-            }
-            
-            # Create cache entry with data and metadata
-            cache_entry = {
-                'metadata': metadata,
-                'data': data
+                'created': datetime.now().isoformat(),
+                'ttl': ttl if ttl is not None else self.parameters.get('cache_ttl')
             }
             
             # Save to file
-            with open(cache_path, 'wb') as f:
-                # Use pickle with highest protocol for better compression
-                if self.parameters.get('compression', True):
-                    # Use highest protocol for better compression
-                    pickle.dump(cache_entry, f, protocol=pickle.HIGHEST_PROTOCOL)
-                else:
-                    pickle.dump(cache_entry, f)
+            use_pickle = self.parameters.get('cache_format', 'blocks') == 'pickle'
+            storage_format = write_cache_file(cache_path, data, metadata, use_pickle=use_pickle)
+            
+            # Record in index
+            index = self._get_index(cache_dir)
+            index.record(cache_key, os.path.getsize(cache_path), metadata['timestamp'], metadata['ttl'])
                 
-            self.logger.info(f"Saved data to cache: {cache_path}")
+            self.logger.info(f"Saved data to cache ({storage_format}): {cache_path}")
+            
+            if self.parameters.get('auto_prune', True):
+                self._prune_index(index, cache_dir,
+                                  self.parameters.get('max_cache_size'),
+                                  self.parameters.get('max_cache_bytes'))
             return True
             
         except Exception as e:
@@ -244,13 +274,19 @@ class CacheManager(BaseSerializer):
             )
             return False
     
-    def _load_from_cache(self, cache_key: str, cache_dir: str, ttl: int) -> Optional[Any]:
+    def _load_from_cache(self, cache_key: str, cache_dir: str, ttl: int,
+                         writable: bool = False) -> Optional[Any]:
         """Load data from cache
         
+        The header is checked first, so expired entries are never read.
+        Blocks are memory-mapped and returned without copying (read-only)
+        unless writable is set.
+        
         Args:
             cache_key: Cache key
             cache_dir: Cache directory
             ttl: Time-to-live in seconds
+            writable: Copy the blocks so the data can be modified
             
         Returns:
             Cached data if valid, None otherwise
@@ -260,25 +296,25 @@ class CacheManager(BaseSerializer):
         # Check if cache file exists
         if not os.path.exists(cache_path):
             self.logger.debug(f"Cache file not found: {cache_path}")
+            if os.path.isdir(cache_dir):
+                self._get_index(cache_dir).remove([cache_key])
             return None
         
         try:
-            # Load cache entry
-            with open(cache_path, 'rb') as f:
-                cache_entry = pickle.load(f)
-            
-            # Get metadata and data
-            metadata = cache_entry.get('metadata', {})
-            data = cache_entry.get('data')
-            
+            header = read_cache_header(cache_path)
+            if header is None:
+                # Cache file written by an older version
+                return self._load_legacy_entry(cache_path, ttl)
+        
             # Check TTL
-            timestamp = metadata.get('timestamp', 0)
-            age = time.time() - timestamp
-            
+            age = time.time() - header.get('timestamp', 0)
             if age > ttl:
                 self.logger.debug(f"Cache expired: {cache_path} (age: {age:.1f}s, ttl: {ttl}s)")
                 return None
             
+            _, data = read_cache_file(cache_path, header, writable=writable)
+            self._get_index(cache_dir).touch(cache_key)
+            
             self.logger.info(f"Loaded data from cache: {cache_path}")
             return data
             
@@ -291,9 +327,32 @@ class CacheManager(BaseSerializer):
             )
             return None
     
+    def _load_legacy_entry(self, cache_path: str, ttl: int) -> Optional[Any]:
+        """Load a pickled cache entry written by an older version
+        
+        Args:
+            cache_path: Cache file path
+            ttl: Time-to-live in seconds
+            
+        Returns:
+            Cached data if valid, None otherwise
+        """
+        with open(cache_path, 'rb') as f:
+            cache_entry = pickle.load(f)
+        
+        metadata = cache_entry.get('metadata', {})
+        age = time.time() - metadata.get('timestamp', 0)
+        if age > ttl:
+            self.logger.debug(f"Cache expired: {cache_path} (age: {age:.1f}s, ttl: {ttl}s)")
+            return None
+        
+        return cache_entry.get('data')
+    
     def _check_cache(self, cache_key: str, cache_dir: str, ttl: int) -> bool:
         """Check if valid cache entry exists
         
+        Only the file header is read.
+        
         Args:
             cache_key: Cache key
             cache_dir: Cache directory
@@ -309,17 +368,13 @@ class CacheManager(BaseSerializer):
             return False
         
         try:
-            # Load metadata only
-            with open(cache_path, 'rb') as f:
-                # Read just the first part to get metadata
-                cache_entry = pickle.load(f)
-            
-            # Get timestamp
-            metadata = cache_entry.get('metadata', {})
-            timestamp = metadata.get('timestamp', 0)
+            header = read_cache_header(cache_path)
+            if header is None:
+                # Cache file written by an older version
+                return self._load_legacy_entry(cache_path, ttl) is not None
             
             # Check TTL
-            age = time.time() - timestamp
+            age = time.time() - header.get('timestamp', 0)
             return age <= ttl
             
         except Exception as e:
@@ -344,41 +399,19 @@ class CacheManager(BaseSerializer):
         if not cache_dir or not os.path.exists(cache_dir):
             return 0
         
-        count = 0
-        current_time = time.time()
-        
-        for filename in os.listdir(cache_dir):
-            if filename.endswith('.cache'):
-                filepath = os.path.join(cache_dir, filename)
-                
-                # Check file age if specified
-                if older_than is not None:
-                    file_mtime = os.path.getmtime(filepath)
-                    age = current_time - file_mtime
-                    
-                    if age <= older_than:
-                        continue
-                
-                # Remove file
-                try:
-                    os.remove(filepath)
-                    count += 1
-                except Exception as e:
-                    self.error_handler.handle_error(
-                        e,
-                        context={'filepath': filepath},
-                        subsystem='data_pipeline',
-                        component='CacheManager'
-                    )
+        cutoff = time.time() - older_than if older_than is not None else None
+        keys = self._get_index(cache_dir).take_created_before(cutoff)
+        count = self._remove_files(keys, cache_dir)
         
         self.logger.info(f"Cleared {count} cache files from {cache_dir}")
         return count
     
-    def prune_cache(self, max_entries: Optional[int] = None) -> int:
-        """Prune cache to keep only the most recent entries
+    def prune_cache(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None) -> int:
+        """Prune cache to keep only the most recently used entries
         
         Args:
             max_entries: Maximum number of entries to keep
+            max_bytes: Maximum total size of cache files to keep
             
         Returns:
             Number of files removed
@@ -387,30 +420,151 @@ class CacheManager(BaseSerializer):
         if not cache_dir or not os.path.exists(cache_dir):
             return 0
         
-        # Use parameter if not provided
+        # Use parameters if not provided
         if max_entries is None:
             max_entries = self.parameters.get('max_cache_size', 1000)
+        if max_bytes is None:
+            max_bytes = self.parameters.get('max_cache_bytes')
+        
+        return self._prune_index(self._get_index(cache_dir), cache_dir, max_entries, max_bytes)
+    
+    def expire_cache(self) -> int:
+        """Remove cache entries past their time-to-live
+        
+        Returns:
+            Number of files removed
+        """
+        cache_dir = self.parameters.get('cache_dir')
+        if not cache_dir or not os.path.exists(cache_dir):
+            return 0
+        
+        keys = self._get_index(cache_dir).take_expired()
+        count = self._remove_files(keys, cache_dir)
         
-        # Get list of cache files with modification times
-        cache_files = []
+        if count > 0:
+            self.logger.info(f"Expired {count} cache files from {cache_dir}")
+        return count
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get the number of cache entries and their total size
+        
+        Returns:
+            Dictionary with entries, bytes and the configured limits
+        """
+        cache_dir = self.parameters.get('cache_dir')
+        entries, size = (0, 0)
+        if cache_dir and os.path.exists(cache_dir):
+            entries, size = self._get_index(cache_dir).totals()
+        
+        return {
+            'entries': entries,
+            'bytes': size,
+            'max_entries': self.parameters.get('max_cache_size'),
+            'max_bytes': self.parameters.get('max_cache_bytes')
+        }
+    
+    def rebuild_index(self, cache_dir: Optional[str] = None) -> int:
+        """Rebuild the cache index by scanning the cache directory
+        
+        Only needed when cache files were added or removed outside of
+        CacheManager; the index is built automatically the first time a
+        directory is used.
+        
+        Args:
+            cache_dir: Cache directory (default: configured cache_dir)
+            
+        Returns:
+            Number of entries indexed
+        """
+        cache_dir = cache_dir or self.parameters.get('cache_dir')
+        index = self._indexes.get(cache_dir) or CacheIndex(cache_dir)
+        self._indexes[cache_dir] = index
+        
+        entries = []
         for filename in os.listdir(cache_dir):
-            if filename.endswith('.cache'):
-                filepath = os.path.join(cache_dir, filename)
-                mtime = os.path.getmtime(filepath)
-                cache_files.append((filepath, mtime))
+            if not filename.endswith('.cache'):
+                continue
+            filepath = os.path.join(cache_dir, filename)
+            try:
+                stat = os.stat(filepath)
+                header = read_cache_header(filepath)
+            except OSError:
+                continue
+            
+            if header is not None:
+                created, ttl = header.get('timestamp', stat.st_mtime), header.get('ttl')
+            else:
+                # Legacy pickle file; avoid unpickling just to index it
+                created, ttl = stat.st_mtime, None
+            
+            entries.append({
+                'key': filename[:-len('.cache')],
+                'size': stat.st_size,
+                'created': created,
+                'ttl': ttl
+            })
         
-        # Sort by modification time (newest first)
-        cache_files.sort(key=lambda x: x[1], reverse=True)
+        index.rebuild(entries)
+        self.logger.info(f"Indexed {len(entries)} cache files in {cache_dir}")
+        return len(entries)
+    
+    def _get_index(self, cache_dir: str) -> CacheIndex:
+        """Get the index for a cache directory, building it on first use
         
-        # Keep only the most recent entries
-        files_to_remove = cache_files[max_entries:]
+        Args:
+            cache_dir: Cache directory
+            
+        Returns:
+            CacheIndex instance
+        """
+        index = self._indexes.get(cache_dir)
+        if index is None:
+            index = CacheIndex(cache_dir)
+            self._indexes[cache_dir] = index
+            if index.is_new() and os.path.isdir(cache_dir):
+                self.rebuild_index(cache_dir)
+        return index
+    
+    def _prune_index(self, index: CacheIndex, cache_dir: str,
+                     max_entries: Optional[int], max_bytes: Optional[int]) -> int:
+        """Remove least recently used entries beyond the given limits
         
-        # Remove excess files
+        Args:
+            index: Cache index
+            cache_dir: Cache directory
+            max_entries: Maximum number of entries to keep
+            max_bytes: Maximum total size to keep
+            
+        Returns:
+            Number of files removed
+        """
+        keys = index.take_excess(max_entries, max_bytes)
+        count = self._remove_files(keys, cache_dir)
+        
+        if count > 0:
+            self.logger.info(f"Pruned {count} cache files from {cache_dir}")
+        
+        return count
+    
+    def _remove_files(self, keys: List[str], cache_dir: str) -> int:
+        """Delete the cache files for keys already removed from the index
+        
+        Args:
+            keys: Cache keys
+            cache_dir: Cache directory
+            
+        Returns:
+            Number of files removed
+        """
         count = 0
-        for filepath, _ in files_to_remove:
+        for key in keys:
+            filepath = self._get_cache_path(key, cache_dir)
             try:
                 os.remove(filepath)
                 count += 1
+            except FileNotFoundError:
+                # Already removed by another process
+                continue
             except Exception as e:
                 self.error_handler.handle_error(
                     e,
@@ -418,8 +572,4 @@ class CacheManager(BaseSerializer):
                     subsystem='data_pipeline',
                     component='CacheManager'
                 )
-        
-        if count > 0:
-            self.logger.info(f"Pruned {count} cache files from {cache_dir}")
-        
-        return count
\ No newline at end of file
+        return count
@@ -0,0 +1,91 @@
+"""
+Single Flight - Coalescing of concurrent identical computations
+
+When several threads ask for the same key at once, only the first runs the
+computation; the others wait for it and receive the same result (or the same
+exception). Used by the orchestrator so that concurrent identical requests
+run the pipeline once.
+"""
+
+import threading
+from typing import Dict, Any, Callable, Hashable, Tuple
+
+
+class _Call:
+    """In-flight computation shared by all callers of one key"""
+
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Run at most one computation per key at a time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._executions = 0
+        self._coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run fn for key, or wait for the call already in flight
+
+        Args:
+            key: Key identifying the computation
+            fn: Computation to run if no call for key is in flight
+
+        Returns:
+            Tuple of (result, shared), where shared is True if the result
+            came from another caller's computation
+
+        Raises:
+            Any exception raised by fn, in every caller waiting on it
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, False
+
+    def in_flight(self) -> int:
+        """Number of computations currently running"""
+        with self._lock:
+            return len(self._calls)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get execution and coalescing counters"""
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'executions': self._executions,
+                'coalesced': self._coalesced
+            }
@@ -7,15 +7,17 @@ including portfolio allocation, risk constraints, rebalancing, and performance t
 
 # Core models and orchestrator
 from balance_breaker.src.portfolio.models import (
-    Portfolio, PortfolioPosition, AllocationInstruction, 
+    Portfolio, PortfolioPosition, PositionBook, AllocationInstruction, 
     AllocationAction, PortfolioMetrics
 )
+from balance_breaker.src.portfolio.journal import TransactionJournal
 from balance_breaker.src.portfolio.orchestrator import PortfolioOrchestrator
 
 # Allocation components
 from balance_breaker.src.portfolio.allocation.base import Allocator
 from balance_breaker.src.portfolio.allocation.equal_weight import EqualWeightAllocator
 from balance_breaker.src.portfolio.allocation.risk_parity import RiskParityAllocator
+from balance_breaker.src.portfolio.allocation.risk_parity_solver import RiskParitySolver
 
 # Constraint components
 from balance_breaker.src.portfolio.constraints.base import Constraint
@@ -102,11 +104,11 @@ def create_orchestrator(config=None) -> PortfolioOrchestrator:
 # Define package exports
 __all__ = [
     # Core models and orchestrator
-    'Portfolio', 'PortfolioPosition', 'AllocationInstruction', 
-    'AllocationAction', 'PortfolioMetrics', 'PortfolioOrchestrator',
+    'Portfolio', 'PortfolioPosition', 'PositionBook', 'AllocationInstruction', 
+    'AllocationAction', 'PortfolioMetrics', 'PortfolioOrchestrator', 'TransactionJournal',
     
     # Allocation components
-    'Allocator', 'EqualWeightAllocator', 'RiskParityAllocator',
+    'Allocator', 'EqualWeightAllocator', 'RiskParityAllocator', 'RiskParitySolver',
     
     # Constraint components
     'Constraint', 'CorrelationConstraint', 'MaxExposureConstraint',
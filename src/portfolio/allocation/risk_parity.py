@@ -8,10 +8,10 @@ from typing import Dict, Any, Optional, List
 import logging
 import numpy as np
 import pandas as pd
-from scipy import optimize
 
 from balance_breaker.src.portfolio.models import Portfolio
 from balance_breaker.src.portfolio.allocation.base import Allocator
+from balance_breaker.src.portfolio.allocation.risk_parity_solver import RiskParitySolver
 
 
 class RiskParityAllocator(Allocator):
@@ -20,6 +20,8 @@ class RiskParityAllocator(Allocator):
     
     This allocator distributes risk rather than capital equally across instruments.
     It aims to achieve equal risk contribution from each instrument in the portfolio.
+    Weights are solved with RiskParitySolver, warm started from the previous
+    solution when the instruments are unchanged.
     
     Parameters:
     -----------
@@ -33,6 +35,10 @@ class RiskParityAllocator(Allocator):
         Maximum weight for any instrument (0.0 to 1.0)
     risk_target : float
         Target portfolio risk level
+    solver : str
+        Risk parity solver method ('newton' or 'ccd')
+    tolerance : float
+        Solver tolerance on the relative risk contribution error
     """
     
     def __init__(self, parameters: Dict[str, Any] = None):
@@ -47,7 +53,9 @@ class RiskParityAllocator(Allocator):
             'correlation_lookback': 120, # 120 periods for correlation
             'min_weight': 0.05,          # Minimum 5% allocation
             'max_weight': 0.25,          # Maximum 25% allocation
-            'risk_target': 0.1           # 10% annualized risk target
+            'risk_target': 0.1,          # 10% annualized risk target
+            'solver': 'newton',          # Newton steps on the log-barrier problem
+            'tolerance': 1e-10           # Relative risk contribution error
         }
         
         if parameters:
@@ -60,6 +68,10 @@ class RiskParityAllocator(Allocator):
         self.volatility_cache = {}
         self.correlation_matrix = None
         self.historical_data = {}
+        
+        self.solver = RiskParitySolver(self.parameters['solver'], self.parameters['tolerance'])
+        # Previous solution for warm starts: (instruments, weights)
+        self.last_solution = None
     
     def allocate(self, signals: Dict[str, Dict[str, Any]], portfolio: Portfolio) -> Dict[str, float]:
         """
@@ -192,10 +204,11 @@ class RiskParityAllocator(Allocator):
     def _calculate_risk_parity_weights(self, instruments: List[str], 
                                       cov_matrix: np.ndarray) -> Dict[str, float]:
         """
-        Calculate risk parity weights using numerical optimization
+        Calculate risk parity weights
         
-        This implements a simplified risk parity algorithm that aims to equalize
-        risk contribution from each asset in the portfolio.
+        Solves for equal risk contributions, starting from the previous
+        solution when the instruments are unchanged, then applies the
+        weight bounds.
         """
         n = len(instruments)
         
@@ -205,66 +218,107 @@ class RiskParityAllocator(Allocator):
         if n == 1:
             return {instruments[0]: 1.0}
         
-        # Initial guess: equal weight
-        initial_weights = np.ones(n) / n
-        
-        # Ensure covariance matrix is positive definite
-        cov_matrix = np.clip(cov_matrix, 1e-8, None)
-        
-        # Define risk contribution function
-        def risk_contribution(weights):
-            # Portfolio variance
-            portfolio_var = weights.T @ cov_matrix @ weights
-            
-            # Risk contribution of each asset
-            marginal_risk = cov_matrix @ weights
-            risk_contrib = weights * marginal_risk / np.sqrt(portfolio_var)
-            
-            # Target: equal risk contribution
-            target_risk = np.sqrt(portfolio_var) / n
-            
-            # Squared error between actual and target risk contribution
-            error = np.sum((risk_contrib - target_risk) ** 2)
-            
-            return error
+        cov_matrix = self._regularize_covariance(cov_matrix)
         
-        # Constraint: weights sum to 1
-        constraint = {'type': 'eq', 'fun': lambda w: np.sum(w) - 1}
+        initial_weights = None
+        if self.last_solution is not None and self.last_solution[0] == tuple(instruments):
+            initial_weights = self.last_solution[1]
         
-        # Weight bounds
-        min_weight = self.parameters['min_weight']
-        max_weight = self.parameters['max_weight']
-        bounds = [(min_weight, max_weight) for _ in range(n)]
+        optimal_weights = self.solver.solve(cov_matrix, initial_weights=initial_weights)
+        self.last_solution = (tuple(instruments), optimal_weights)
         
-        # Solve optimization problem
-        result = optimize.minimize(
-            risk_contribution, 
-            initial_weights, 
-            method='SLSQP',
-            constraints=constraint,
-            bounds=bounds
-        )
-        
-        # Get optimized weights
-        optimal_weights = result.x
-        
-        # Normalize weights to sum to 1 (in case of numerical issues)
-        optimal_weights = optimal_weights / np.sum(optimal_weights)
+        optimal_weights = self._apply_weight_bounds(optimal_weights[None])[0]
         
         # Create weights dictionary
         weights = {instruments[i]: float(optimal_weights[i]) for i in range(n)}
         
         # Log risk contributions
-        portfolio_var = optimal_weights.T @ cov_matrix @ optimal_weights
-        portfolio_vol = np.sqrt(portfolio_var)
+        if self.logger.isEnabledFor(logging.INFO):
+            portfolio_vol = np.sqrt(optimal_weights @ cov_matrix @ optimal_weights)
+            risk_contrib = optimal_weights * (cov_matrix @ optimal_weights) / portfolio_vol
+            risk_contributions = {instruments[i]: float(risk_contrib[i]) for i in range(n)}
+            
+            self.logger.info(f"Portfolio volatility: {portfolio_vol:.2%} "
+                             f"({self.solver.iterations} solver iterations)")
+            self.logger.info(f"Risk contributions: {risk_contributions}")
+        
+        return weights
+    
+    def calculate_weights_batch(self, instruments: List[str], cov_matrices: np.ndarray,
+                                index: Optional[pd.Index] = None) -> pd.DataFrame:
+        """
+        Calculate risk parity weights for many covariance matrices at once
         
-        marginal_risk = cov_matrix @ optimal_weights
-        risk_contrib = optimal_weights * marginal_risk / portfolio_vol
+        Args:
+            instruments: Instruments in covariance matrix order
+            cov_matrices: Covariance matrices (k x n x n), e.g. one per rebalance date
+            index: Optional index for the rows (e.g. rebalance dates)
+            
+        Returns:
+            DataFrame of weights with one row per covariance matrix
+        """
+        cov_matrices = self._regularize_covariance(np.asarray(cov_matrices, dtype=float))
+        weights = self.solver.solve_batch(cov_matrices)
+        weights = self._apply_weight_bounds(weights)
+        return pd.DataFrame(weights, index=index, columns=instruments)
+    
+    @staticmethod
+    def _regularize_covariance(cov_matrix: np.ndarray) -> np.ndarray:
+        """
+        Make covariance matrices symmetric positive definite
         
-        risk_contributions = {instruments[i]: float(risk_contrib[i]) for i in range(n)}
+        Matrices that are not (e.g. correlations estimated over different
+        lookbacks) get their eigenvalues floored at a small fraction of the
+        average variance, which keeps the sign of every correlation.
+        """
+        cov_matrix = (cov_matrix + np.swapaxes(cov_matrix, -1, -2)) / 2
+        eigenvalues, eigenvectors = np.linalg.eigh(cov_matrix)
+        floor = 1e-8 * np.trace(cov_matrix, axis1=-2, axis2=-1) / cov_matrix.shape[-1]
+        floor = np.asarray(floor)[..., None]
+        if np.all(eigenvalues > floor):
+            return cov_matrix
+        eigenvalues = np.maximum(eigenvalues, floor)
+        return (eigenvectors * eigenvalues[..., None, :]) @ np.swapaxes(eigenvectors, -1, -2)
+    
+    def _apply_weight_bounds(self, weights: np.ndarray) -> np.ndarray:
+        """
+        Apply the minimum and maximum weights to rows of weights summing to 1
         
-        self.logger.info(f"Portfolio volatility: {portfolio_vol:.2%}")
-        self.logger.info(f"Risk contributions: {risk_contributions}")
+        Weights above the maximum, then weights below the minimum, are set to
+        the bound and the others rescaled to keep the sum, until no weight is
+        outside the bounds. A bound that no weights summing to 1 can meet is
+        not applied.
+        """
+        n = weights.shape[1]
+        low, high = self.parameters['min_weight'], self.parameters['max_weight']
+        if low * n > 1:
+            self.logger.warning(f"Minimum weight {low} is infeasible for {n} instruments, not applied")
+            low = 0.0
+        if high * n < 1:
+            self.logger.warning(f"Maximum weight {high} is infeasible for {n} instruments, not applied")
+            high = 1.0
+        
+        weights = weights.copy()
+        at_low = np.zeros(weights.shape, dtype=bool)
+        at_high = np.zeros(weights.shape, dtype=bool)
+        for _ in range(2 * n):
+            free = ~(at_low | at_high)
+            above = free & (weights > high + 1e-12)
+            below = free & (weights < low - 1e-12)
+            if not (above.any() or below.any()):
+                break
+            # Capping large weights raises the others, so settle those first
+            if above.any():
+                at_high |= above
+            else:
+                at_low |= below
+            
+            free = ~(at_low | at_high)
+            fixed_total = low * at_low.sum(axis=1) + high * at_high.sum(axis=1)
+            free_total = np.where(free, weights, 0.0).sum(axis=1)
+            scale = np.divide(1.0 - fixed_total, free_total,
+                              out=np.ones_like(free_total), where=free_total > 0)
+            weights = np.where(at_low, low, np.where(at_high, high, weights * scale[:, None]))
         
         return weights
     
@@ -0,0 +1,156 @@
+"""
+Risk Parity Solver
+
+This module implements the solver for risk budgeting portfolios used by the
+risk parity allocator. It minimizes the log-barrier formulation
+
+    f(y) = 1/2 y'Σy - Σ b_i log(y_i),   y > 0
+
+whose minimizer has risk contributions y_i (Σy)_i equal to the budgets b_i,
+so the weights y / sum(y) give each instrument its budgeted share of risk.
+The problem is strictly convex for any positive semidefinite covariance,
+including negative correlations.
+"""
+
+from typing import Optional
+import numpy as np
+
+
+class RiskParitySolver:
+    """
+    Risk budgeting solver on the log-barrier formulation
+
+    'newton' takes damped Newton steps with the analytic gradient Σy - b/y
+    and Hessian Σ + diag(b/y²), and converges in a handful of iterations
+    (one or two from a warm start). 'ccd' uses cyclical coordinate descent,
+    where each coordinate update has a closed form; it avoids the linear
+    solve and suits very large instrument counts.
+
+    Both methods solve a stack of covariance matrices at once (for example
+    one per rebalance date) with the per-matrix work vectorized.
+
+    Parameters:
+    -----------
+    method : str
+        Solver method ('newton' or 'ccd')
+    tolerance : float
+        Convergence tolerance on the relative risk contribution error
+    max_iterations : int
+        Maximum Newton iterations or coordinate descent sweeps
+    """
+
+    def __init__(self, method: str = 'newton', tolerance: float = 1e-10, max_iterations: int = 100):
+        if method not in ('newton', 'ccd'):
+            raise ValueError(f"Unknown risk parity solver method: {method}")
+        self.method = method
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.iterations = 0   # Iterations used by the last solve
+
+    def solve(self, cov_matrix: np.ndarray, budgets: Optional[np.ndarray] = None,
+              initial_weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Solve for the risk budgeting weights of one covariance matrix
+
+        Args:
+            cov_matrix: Covariance matrix (n x n)
+            budgets: Risk budgets (default: equal)
+            initial_weights: Starting weights, e.g. the previous solution
+
+        Returns:
+            Weights summing to 1
+        """
+        cov_matrix = np.asarray(cov_matrix, dtype=float)
+        return self.solve_batch(
+            cov_matrix[None],
+            None if budgets is None else np.asarray(budgets, dtype=float)[None],
+            None if initial_weights is None else np.asarray(initial_weights, dtype=float)[None]
+        )[0]
+
+    def solve_batch(self, cov_matrices: np.ndarray, budgets: Optional[np.ndarray] = None,
+                    initial_weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Solve for the risk budgeting weights of a stack of covariance matrices
+
+        Args:
+            cov_matrices: Covariance matrices (k x n x n)
+            budgets: Risk budgets (n or k x n, default: equal)
+            initial_weights: Starting weights (n or k x n)
+
+        Returns:
+            Weights (k x n), each row summing to 1
+        """
+        cov = np.asarray(cov_matrices, dtype=float)
+        k, n = cov.shape[0], cov.shape[-1]
+        if cov.shape != (k, n, n):
+            raise ValueError(f"Expected a stack of square covariance matrices, got shape {cov.shape}")
+
+        # Budgets scaled to a minimum of 1 keep the barrier self-concordant;
+        # scaling the budgets only scales y, not the weights
+        b = np.ones((k, n)) if budgets is None else np.broadcast_to(np.asarray(budgets, dtype=float), (k, n))
+        if np.any(b <= 0):
+            raise ValueError("Risk budgets must be positive")
+        b = b / b.min(axis=1, keepdims=True)
+
+        diag = np.diagonal(cov, axis1=1, axis2=2)
+        if np.any(diag <= 0):
+            raise ValueError("Covariance matrices must have positive variances")
+
+        # Start from the given weights or inverse volatility, scaled to the
+        # minimum of f along that direction
+        if initial_weights is not None:
+            y = np.array(np.broadcast_to(np.asarray(initial_weights, dtype=float), (k, n)))
+            y[~(y > 0)] = 1.0 / np.sqrt(diag[~(y > 0)])
+        else:
+            y = 1.0 / np.sqrt(diag)
+        variance = np.einsum('ki,kij,kj->k', y, cov, y)
+        y *= np.sqrt(b.sum(axis=1) / variance)[:, None]
+
+        if self.method == 'newton':
+            y = self._newton(cov, b, y)
+        else:
+            y = self._coordinate_descent(cov, b, y, diag)
+        return y / y.sum(axis=1, keepdims=True)
+
+    def _converged(self, cov: np.ndarray, b: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Rows whose risk contributions match the budgets within tolerance"""
+        contributions = y * np.einsum('kij,kj->ki', cov, y)
+        return np.max(np.abs(contributions - b) / b, axis=1) <= self.tolerance
+
+    def _newton(self, cov: np.ndarray, b: np.ndarray, y: np.ndarray) -> np.ndarray:
+        active = np.arange(len(y))
+        self.iterations = 0
+        while self.iterations < self.max_iterations:
+            c, bb, ya = cov[active], b[active], y[active]
+            gradient = np.einsum('kij,kj->ki', c, ya) - bb / ya
+            hessian = c.copy()
+            hessian[:, np.arange(ya.shape[1]), np.arange(ya.shape[1])] += bb / ya ** 2
+            step = np.linalg.solve(hessian, gradient[..., None])[..., 0]
+
+            # Damped step: stays inside y > 0 for a self-concordant barrier
+            decrement = np.sqrt(np.maximum(np.einsum('ki,ki->k', gradient, step), 0.0))
+            scale = np.where(decrement < 0.25, 1.0, 1.0 / (1.0 + decrement))
+            y[active] = ya - scale[:, None] * step
+            self.iterations += 1
+
+            active = active[~self._converged(cov[active], b[active], y[active])]
+            if not len(active):
+                break
+        return y
+
+    def _coordinate_descent(self, cov: np.ndarray, b: np.ndarray, y: np.ndarray,
+                            diag: np.ndarray) -> np.ndarray:
+        self.iterations = 0
+        active = np.ones(len(y), dtype=bool)
+        while self.iterations < self.max_iterations:
+            for i in range(y.shape[1]):
+                # Minimize f over y_i: Σ_ii y_i² + c_i y_i - b_i = 0
+                c = np.einsum('kj,kj->k', cov[:, i, :], y) - diag[:, i] * y[:, i]
+                updated = (-c + np.sqrt(c * c + 4.0 * diag[:, i] * b[:, i])) / (2.0 * diag[:, i])
+                y[:, i] = np.where(active, updated, y[:, i])
+            self.iterations += 1
+
+            active &= ~self._converged(cov, b, y)
+            if not active.any():
+                break
+        return y
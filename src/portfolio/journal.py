@@ -0,0 +1,334 @@
+"""
+Portfolio Transaction Journal
+
+This module implements the append-only, columnar log of portfolio transactions.
+Every transaction gets a sequence number one higher than the previous one, so
+readers keep the last number they saw and fetch only what was added since.
+Old rows can be spilled to disk segments to bound memory in long sessions.
+"""
+
+from typing import Dict, List, Any, Optional, Iterator, Union
+import datetime
+import importlib.util
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+
+# Numeric transaction fields stored in float columns (NaN when absent)
+FLOAT_FIELDS = ('size', 'size_change', 'old_size', 'new_size', 'price',
+                'value', 'value_change', 'cash_effect', 'realized_pnl')
+
+# Transaction fields stored in dedicated columns; other details are kept as extras
+TYPED_FIELDS = ('sequence', 'timestamp', 'type', 'instrument', 'direction', 'position_id') + FLOAT_FIELDS
+
+
+class TransactionJournal:
+    """
+    Append-only columnar log of portfolio transactions
+
+    Transactions are stored in typed columns: int64 sequence numbers and
+    timestamps, int8 direction, float columns for sizes, prices, values and
+    P&L, and integer codes for the transaction type and instrument. Details
+    without a column are kept per transaction as extras.
+
+    The journal reads like the list of transaction dictionaries it replaces
+    (len, indexing and iteration over the rows held in memory), and
+    since(sequence) returns the transactions added after a reader's last
+    visit in time proportional to their number.
+
+    Parameters:
+    -----------
+    capacity : int
+        Initial number of rows allocated (doubles when full)
+    spill_dir : str, optional
+        Directory for spilled segments (default: keep every row in memory)
+    segment_rows : int
+        Rows per spilled segment; older rows are spilled once twice this
+        many are held in memory
+    spill_format : str, optional
+        Segment file format: 'parquet' (requires pyarrow or fastparquet) or
+        'npz' (default: 'parquet' when an engine is installed, else 'npz')
+
+    A segment that cannot be written is logged and its rows stay in memory;
+    recording never fails because of spilling.
+    """
+
+    def __init__(self, capacity: int = 1024, spill_dir: Optional[str] = None,
+                 segment_rows: int = 65536, spill_format: Optional[str] = None):
+        parquet_engine = any(importlib.util.find_spec(name) is not None for name in ('pyarrow', 'fastparquet'))
+        if spill_format is None:
+            spill_format = 'parquet' if parquet_engine else 'npz'
+        if spill_format not in ('parquet', 'npz'):
+            raise ValueError(f"Unsupported spill format: {spill_format}")
+        if spill_format == 'parquet' and not parquet_engine:
+            raise ImportError("Parquet spill format requires pyarrow or fastparquet; use spill_format='npz'")
+        self.logger = logging.getLogger(__name__)
+        self.spill_dir = spill_dir
+        self.segment_rows = segment_rows
+        self.spill_format = spill_format
+        self.segments: List[str] = []
+
+        self._size = 0
+        self._first_sequence = 0   # Sequence number of the first row in memory
+        self._types: List[str] = []
+        self._type_codes: Dict[str, int] = {}
+        self._instruments: List[str] = []
+        self._instrument_codes: Dict[str, int] = {}
+        self._extras: Dict[int, Dict[str, Any]] = {}
+        self._allocate(max(1, capacity))
+
+    def _allocate(self, capacity: int) -> None:
+        """Resize the columns to capacity rows, keeping the rows in memory"""
+        n = self._size
+        columns = {
+            'timestamp': np.empty(capacity, dtype='datetime64[us]'),
+            'type': np.empty(capacity, dtype=np.int16),
+            'instrument': np.empty(capacity, dtype=np.int32),
+            'direction': np.empty(capacity, dtype=np.int8),
+            'position_id': np.empty(capacity, dtype=object),
+        }
+        for name in FLOAT_FIELDS:
+            columns[name] = np.empty(capacity)
+        if n:
+            for name, column in columns.items():
+                column[:n] = self._columns[name][:n]
+        self._columns = columns
+        self._capacity = capacity
+
+    @staticmethod
+    def _code(value: Optional[str], codes: Dict[str, int], values: List[str]) -> int:
+        if value is None:
+            return -1
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(values)
+            values.append(value)
+        return code
+
+    @property
+    def next_sequence(self) -> int:
+        """Sequence number the next transaction will get"""
+        return self._first_sequence + self._size
+
+    @property
+    def first_sequence(self) -> int:
+        """Sequence number of the oldest transaction held in memory"""
+        return self._first_sequence
+
+    def record(self, transaction_type: str, details: Dict[str, Any],
+               timestamp: Optional[datetime.datetime] = None) -> int:
+        """
+        Add a transaction
+
+        Args:
+            transaction_type: Transaction type (e.g. 'close_position')
+            details: Transaction details
+            timestamp: Transaction time (defaults to now)
+
+        Returns:
+            Sequence number of the transaction
+        """
+        if self._size == self._capacity:
+            self._allocate(2 * self._capacity)
+        i = self._size
+        columns = self._columns
+
+        columns['timestamp'][i] = timestamp if timestamp is not None else datetime.datetime.now()
+        columns['type'][i] = self._code(transaction_type, self._type_codes, self._types)
+        columns['instrument'][i] = self._code(details.get('instrument'), self._instrument_codes, self._instruments)
+        direction = details.get('direction')
+        columns['direction'][i] = getattr(direction, 'value', direction) or 0
+        columns['position_id'][i] = details.get('position_id')
+        for name in FLOAT_FIELDS:
+            value = details.get(name)
+            columns[name][i] = value if value is not None else np.nan
+
+        extras = {key: value for key, value in details.items() if key not in TYPED_FIELDS}
+        sequence = self._first_sequence + i
+        if extras:
+            self._extras[sequence] = extras
+        self._size += 1
+
+        if self.spill_dir is not None and self._size >= 2 * self.segment_rows:
+            try:
+                self._spill(self.segment_rows)
+            except Exception as e:
+                # The journal is unchanged; the rows are retried at the next spill
+                self.logger.warning(f"Could not spill transactions to {self.spill_dir}: {str(e)}")
+        return sequence
+
+    def append(self, transaction: Dict[str, Any]) -> int:
+        """Add a transaction given as a dictionary with 'type' and optional 'timestamp'"""
+        details = {key: value for key, value in transaction.items() if key not in ('type', 'timestamp', 'sequence')}
+        return self.record(transaction.get('type'), details, transaction.get('timestamp'))
+
+    def columns(self, start_sequence: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Columns of the transactions in memory from a sequence number on, without copying
+
+        The type and instrument columns hold codes into type_names and
+        instrument_names (-1 when absent). The views are only valid until the
+        next transaction is recorded.
+        """
+        start = self._offset(start_sequence)
+        view = {name: column[start:self._size] for name, column in self._columns.items()}
+        view['sequence'] = np.arange(self._first_sequence + start, self.next_sequence)
+        return view
+
+    @property
+    def type_names(self) -> List[str]:
+        return list(self._types)
+
+    @property
+    def instrument_names(self) -> List[str]:
+        return list(self._instruments)
+
+    def type_code(self, transaction_type: str) -> int:
+        """Code of a transaction type in the type column (-1 if never recorded)"""
+        return self._type_codes.get(transaction_type, -1)
+
+    def since(self, sequence: int) -> List[Dict[str, Any]]:
+        """
+        Transactions with a sequence number of at least sequence
+
+        Transactions already spilled to disk are not included; use to_frame
+        with include_spilled to read them.
+        """
+        start = self._offset(sequence)
+        return [self._row(i) for i in range(start, self._size)]
+
+    def _offset(self, sequence: Optional[int]) -> int:
+        if sequence is None:
+            return 0
+        return min(max(sequence - self._first_sequence, 0), self._size)
+
+    def _row(self, i: int) -> Dict[str, Any]:
+        """Transaction dictionary of row i in memory"""
+        columns = self._columns
+        sequence = self._first_sequence + i
+        row = {
+            'sequence': sequence,
+            'timestamp': columns['timestamp'][i].astype(datetime.datetime),
+            'type': self._types[columns['type'][i]] if columns['type'][i] >= 0 else None
+        }
+        instrument = columns['instrument'][i]
+        if instrument >= 0:
+            row['instrument'] = self._instruments[instrument]
+        if columns['direction'][i]:
+            row['direction'] = int(columns['direction'][i])
+        for name in FLOAT_FIELDS:
+            value = columns[name][i]
+            if value == value:
+                row[name] = float(value)
+        if columns['position_id'][i] is not None:
+            row['position_id'] = columns['position_id'][i]
+        extras = self._extras.get(sequence)
+        if extras:
+            row.update(extras)
+        return row
+
+    def to_frame(self, start_sequence: Optional[int] = None, include_spilled: bool = False) -> pd.DataFrame:
+        """
+        Transactions as a DataFrame, one row per transaction
+
+        Args:
+            start_sequence: First sequence number to include
+            include_spilled: Whether to read spilled segments from disk too
+        """
+        columns = self.columns(start_sequence)
+        frame = pd.DataFrame({
+            'sequence': columns['sequence'],
+            'timestamp': columns['timestamp'],
+            'type': pd.Categorical.from_codes(columns['type'], categories=self._types),
+            'instrument': pd.Categorical.from_codes(columns['instrument'], categories=self._instruments),
+            'direction': columns['direction'],
+            'position_id': columns['position_id'],
+            **{name: columns[name] for name in FLOAT_FIELDS},
+            'extra': [json.dumps(self._extras[s], default=str) if s in self._extras else None
+                      for s in columns['sequence'].tolist()]
+        })
+        if include_spilled and self.segments:
+            spilled = [self._read_segment(path) for path in self.segments]
+            spilled = pd.concat(spilled, ignore_index=True)
+            if start_sequence is not None:
+                spilled = spilled[spilled['sequence'] >= start_sequence]
+            for name in ('type', 'instrument'):
+                frame[name] = frame[name].astype(object)
+            frame = pd.concat([spilled, frame], ignore_index=True)
+        return frame
+
+    def _spill(self, n_rows: int) -> None:
+        """Write the oldest n_rows rows to a segment file and drop them from memory"""
+        os.makedirs(self.spill_dir, exist_ok=True)
+        end_sequence = self._first_sequence + n_rows
+        frame = self.to_frame().iloc[:n_rows]
+        path = os.path.join(self.spill_dir, f"segment-{self._first_sequence:012d}.{self.spill_format}")
+        temporary = path + '.tmp'
+        try:
+            if self.spill_format == 'parquet':
+                frame.to_parquet(temporary, index=False)
+            else:
+                # Text columns as fixed-width strings, with '' for missing values
+                arrays = {}
+                for name in frame.columns:
+                    column = frame[name]
+                    if pd.api.types.is_numeric_dtype(column) or pd.api.types.is_datetime64_any_dtype(column):
+                        arrays[name] = column.to_numpy()
+                    else:
+                        arrays[name] = column.astype(object).where(column.notna(), '').to_numpy(dtype=str)
+                with open(temporary, 'wb') as f:
+                    np.savez(f, **arrays)
+            os.replace(temporary, path)
+        except Exception:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        self.segments.append(path)
+
+        # Shift the remaining rows to the front
+        remaining = self._size - n_rows
+        for column in self._columns.values():
+            column[:remaining] = column[n_rows:self._size]
+            if column.dtype == object:
+                column[remaining:self._size] = None
+        self._extras = {s: e for s, e in self._extras.items() if s >= end_sequence}
+        self._first_sequence = end_sequence
+        self._size = remaining
+
+    def _read_segment(self, path: str) -> pd.DataFrame:
+        if path.endswith('.parquet'):
+            frame = pd.read_parquet(path)
+        else:
+            with np.load(path) as segment:
+                frame = pd.DataFrame({name: segment[name] for name in segment.files})
+            for name in ('type', 'instrument', 'position_id', 'extra'):
+                frame[name] = frame[name].astype(object).where(frame[name] != '', None)
+        for name in ('type', 'instrument'):
+            frame[name] = frame[name].astype(object)
+        return frame
+
+    # List interface over the transactions in memory
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        if isinstance(key, slice):
+            return [self._row(i) for i in range(*key.indices(self._size))]
+        if key < 0:
+            key += self._size
+        if not 0 <= key < self._size:
+            raise IndexError("transaction index out of range")
+        return self._row(key)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self._size):
+            yield self._row(i)
+
+    def __repr__(self) -> str:
+        return (f"TransactionJournal(transactions={self.next_sequence}, in_memory={self._size}, "
+                f"segments={len(self.segments)})")
@@ -5,12 +5,17 @@ This module defines the core data models for the portfolio management system.
 These models are used across different components of the portfolio system.
 """
 
+from collections.abc import MutableMapping
 from dataclasses import dataclass, field
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, Iterator, List, Any, Optional, Union
 from enum import Enum
 import datetime
 import uuid
 
+import numpy as np
+
+from balance_breaker.src.portfolio.journal import TransactionJournal
+
 
 class AllocationAction(Enum):
     """Possible allocation actions"""
@@ -21,26 +26,297 @@ class AllocationAction(Enum):
     REBALANCE = "rebalance"   # Rebalance an existing position
 
 
-@dataclass
+# Position fields in PortfolioPosition argument order, with the type of the
+# PositionBook array that holds each (stop_loss is NaN when there is no stop)
+POSITION_FIELDS = {
+    'instrument': object,
+    'direction': np.int8,
+    'entry_price': np.float64,
+    'position_size': np.float64,
+    'position_id': object,
+    'stop_loss': np.float64,
+    'take_profit': object,
+    'entry_time': object,
+    'last_update_time': object,
+    'unrealized_pnl': np.float64,
+    'realized_pnl': np.float64,
+    'strategy_name': object,
+    'risk_amount': np.float64,
+    'risk_percent': np.float64,
+    'metadata': object,
+    'pip_value': np.float64
+}
+
+
+def _first_target(take_profit) -> float:
+    """First take profit level as a float (NaN if none)"""
+    if take_profit is None:
+        return np.nan
+    if isinstance(take_profit, (list, tuple)):
+        return float(take_profit[0]) if take_profit else np.nan
+    return float(take_profit)
+
+
 class PortfolioPosition:
     """
     Portfolio position that extends risk management position with portfolio metadata
+    
+    Once added to a Portfolio's PositionBook, a position is a view of its slot
+    in the book's arrays: reading or setting a field reads or sets the array
+    element. Before it is added and after it is removed it holds its own values.
     """
-    instrument: str
-    direction: int
-    entry_price: float
-    position_size: float
-    position_id: str = field(default_factory=lambda: str(uuid.uuid4()))
-    stop_loss: Optional[float] = None
-    take_profit: Optional[List[float]] = None
-    entry_time: Optional[datetime.datetime] = None
-    last_update_time: Optional[datetime.datetime] = None
-    unrealized_pnl: float = 0.0
-    realized_pnl: float = 0.0
-    strategy_name: Optional[str] = None
-    risk_amount: float = 0.0
-    risk_percent: float = 0.0
-    metadata: Dict[str, Any] = field(default_factory=dict)
+    __slots__ = ('_book', '_slot', '_values')
+    
+    def __init__(self, instrument: str, direction: int, entry_price: float, position_size: float,
+                 position_id: Optional[str] = None, stop_loss: Optional[float] = None,
+                 take_profit: Optional[List[float]] = None, entry_time: Optional[datetime.datetime] = None,
+                 last_update_time: Optional[datetime.datetime] = None, unrealized_pnl: float = 0.0,
+                 realized_pnl: float = 0.0, strategy_name: Optional[str] = None, risk_amount: float = 0.0,
+                 risk_percent: float = 0.0, metadata: Optional[Dict[str, Any]] = None, pip_value: float = 1.0):
+        self._book = None
+        self._slot = -1
+        self._values = {
+            'instrument': instrument,
+            'direction': direction,
+            'entry_price': entry_price,
+            'position_size': position_size,
+            'position_id': position_id if position_id is not None else str(uuid.uuid4()),
+            'stop_loss': stop_loss,
+            'take_profit': take_profit,
+            'entry_time': entry_time,
+            'last_update_time': last_update_time,
+            'unrealized_pnl': unrealized_pnl,
+            'realized_pnl': realized_pnl,
+            'strategy_name': strategy_name,
+            'risk_amount': risk_amount,
+            'risk_percent': risk_percent,
+            'metadata': metadata if metadata is not None else {},
+            'pip_value': pip_value
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Field values as a dictionary"""
+        if self._book is None:
+            return dict(self._values)
+        return {name: self._book._get(self._slot, name) for name in POSITION_FIELDS}
+    
+    def _detach(self) -> None:
+        """Keep the current values after leaving a book"""
+        self._values = self.to_dict()
+        self._book = None
+        self._slot = -1
+    
+    def __eq__(self, other):
+        if not isinstance(other, PortfolioPosition):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={value!r}" for name, value in self.to_dict().items())
+        return f"PortfolioPosition({fields})"
+
+
+def _position_field(name: str) -> property:
+    def get(self):
+        if self._book is None:
+            return self._values[name]
+        return self._book._get(self._slot, name)
+    
+    def set(self, value):
+        if self._book is None:
+            self._values[name] = value
+        else:
+            self._book._set(self._slot, name, value)
+    
+    return property(get, set)
+
+
+for _name in POSITION_FIELDS:
+    setattr(PortfolioPosition, _name, _position_field(_name))
+
+
+class PositionBook(MutableMapping):
+    """
+    Open positions by instrument, stored in parallel arrays
+    
+    Every position occupies a slot in one array per field (direction, entry
+    price, size, pip value, stop, target and the rest), so all positions are
+    marked to market with one array expression. Slots are found through
+    instrument and position id indexes, and the PortfolioPosition objects
+    handed out are views of their slot.
+    
+    Parameters:
+    -----------
+    positions : dict, optional
+        Initial positions by instrument
+    capacity : int
+        Initial number of slots (doubles when full)
+    """
+    
+    def __init__(self, positions: Optional[Dict[str, PortfolioPosition]] = None, capacity: int = 16):
+        self._capacity = 0
+        self._columns: Dict[str, np.ndarray] = {name: np.empty(0, dtype=dtype)
+                                                for name, dtype in POSITION_FIELDS.items()}
+        self.target = np.empty(0)
+        self.active = np.empty(0, dtype=bool)
+        self._views: List[Optional[PortfolioPosition]] = []
+        self._slots: Dict[str, int] = {}
+        self._ids: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._grow(max(1, capacity))
+        for instrument, position in (positions or {}).items():
+            self[instrument] = position
+    
+    def _grow(self, capacity: int) -> None:
+        """Extend the arrays to capacity slots"""
+        old = self._capacity
+        for name, column in self._columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype) if column.dtype != object else np.full(capacity, None)
+            grown[:old] = column
+            self._columns[name] = grown
+        target = np.full(capacity, np.nan)
+        target[:old] = self.target
+        self.target = target
+        active = np.zeros(capacity, dtype=bool)
+        active[:old] = self.active
+        self.active = active
+        self._views.extend([None] * (capacity - old))
+        # Reversed so the lowest free slot is reused first
+        self._free = list(range(capacity - 1, old - 1, -1)) + self._free
+        self._capacity = capacity
+    
+    def column(self, name: str) -> np.ndarray:
+        """Array of a field over all slots (see active for the occupied ones)"""
+        return self._columns[name]
+    
+    @property
+    def slots(self) -> np.ndarray:
+        """Occupied slots in instrument insertion order"""
+        return np.fromiter(self._slots.values(), dtype=np.int64, count=len(self._slots))
+    
+    def slot(self, instrument: str) -> int:
+        """Slot of an instrument's position"""
+        return self._slots[instrument]
+    
+    def get_by_id(self, position_id: str) -> Optional[PortfolioPosition]:
+        """Position with an id, or None"""
+        slot = self._ids.get(position_id)
+        return self._views[slot] if slot is not None else None
+    
+    def total(self, name: str) -> float:
+        """Sum of a numeric field over all positions"""
+        return float(self._columns[name][self.active].sum())
+    
+    def mark_to_market(self, prices: Dict[str, float],
+                       timestamp: Optional[datetime.datetime] = None) -> float:
+        """
+        Update unrealized P&L of the positions with a price.
+        
+        Args:
+            prices: Current price by instrument
+            timestamp: Time of the prices, recorded as the positions' last update
+            
+        Returns:
+            Total unrealized P&L of all positions
+        """
+        slots = []
+        marks = []
+        for instrument, price in prices.items():
+            slot = self._slots.get(instrument)
+            if slot is not None:
+                slots.append(slot)
+                marks.append(price)
+        if slots:
+            slots = np.array(slots)
+            columns = self._columns
+            columns['unrealized_pnl'][slots] = (
+                (np.array(marks, dtype=float) - columns['entry_price'][slots])
+                * columns['direction'][slots] * columns['position_size'][slots] * columns['pip_value'][slots]
+            )
+            if timestamp is not None:
+                columns['last_update_time'][slots] = timestamp
+        return self.total('unrealized_pnl')
+    
+    def _get(self, slot: int, name: str) -> Any:
+        value = self._columns[name][slot]
+        dtype = POSITION_FIELDS[name]
+        if dtype is object:
+            return value
+        if dtype is np.int8:
+            return int(value)
+        value = float(value)
+        if name == 'stop_loss' and value != value:
+            return None
+        return value
+    
+    def _set(self, slot: int, name: str, value: Any) -> None:
+        if name == 'instrument':
+            old = self._columns['instrument'][slot]
+            self._slots = {(value if key == old else key): s for key, s in self._slots.items()}
+        elif name == 'position_id':
+            self._ids.pop(self._columns['position_id'][slot], None)
+            self._ids[value] = slot
+        elif name == 'take_profit':
+            self.target[slot] = _first_target(value)
+        elif name == 'stop_loss' and value is None:
+            value = np.nan
+        self._columns[name][slot] = value
+    
+    # Mapping interface
+    
+    def __getitem__(self, instrument: str) -> PortfolioPosition:
+        return self._views[self._slots[instrument]]
+    
+    def __setitem__(self, instrument: str, position: PortfolioPosition) -> None:
+        if instrument in self._slots:
+            del self[instrument]
+        if position._book is not None:
+            position = PortfolioPosition(**position.to_dict())
+        if not self._free:
+            self._grow(2 * self._capacity)
+        slot = self._free.pop()
+        
+        values = position._values
+        for name in POSITION_FIELDS:
+            if name not in ('instrument', 'position_id'):
+                self._set(slot, name, values[name])
+        self._columns['instrument'][slot] = instrument
+        self._columns['position_id'][slot] = values['position_id']
+        self.active[slot] = True
+        self._slots[instrument] = slot
+        self._ids[values['position_id']] = slot
+        
+        position._book = self
+        position._slot = slot
+        position._values = None
+        self._views[slot] = position
+    
+    def __delitem__(self, instrument: str) -> None:
+        slot = self._slots.pop(instrument)
+        position = self._views[slot]
+        position._detach()
+        self._ids.pop(position.position_id, None)
+        
+        for name, column in self._columns.items():
+            column[slot] = None if column.dtype == object else 0
+        self.target[slot] = np.nan
+        self.active[slot] = False
+        self._views[slot] = None
+        self._free.append(slot)
+    
+    def __contains__(self, instrument) -> bool:
+        return instrument in self._slots
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._slots)
+    
+    def __len__(self) -> int:
+        return len(self._slots)
+    
+    def __repr__(self) -> str:
+        return f"PositionBook({dict(self.items())!r})"
     
 
 @dataclass
@@ -69,7 +345,7 @@ class Portfolio:
     """
     name: str
     base_currency: str
-    positions: Dict[str, PortfolioPosition] = field(default_factory=dict)
+    positions: PositionBook = field(default_factory=PositionBook)
     initial_capital: float = 100000.0
     current_equity: float = 100000.0
     cash: float = 100000.0
@@ -79,7 +355,16 @@ class Portfolio:
     creation_time: datetime.datetime = field(default_factory=datetime.datetime.now)
     last_update_time: datetime.datetime = field(default_factory=datetime.datetime.now)
     metadata: Dict[str, Any] = field(default_factory=dict)
-    transaction_history: List[Dict[str, Any]] = field(default_factory=list)
+    transaction_history: TransactionJournal = field(default_factory=TransactionJournal)
+    
+    def __post_init__(self):
+        if not isinstance(self.positions, PositionBook):
+            self.positions = PositionBook(self.positions)
+        if not isinstance(self.transaction_history, TransactionJournal):
+            journal = TransactionJournal()
+            for transaction in self.transaction_history:
+                journal.append(transaction)
+            self.transaction_history = journal
     
     @property
     def drawdown(self) -> float:
@@ -91,7 +376,7 @@ class Portfolio:
     @property
     def total_exposure(self) -> float:
         """Calculate total exposure as sum of all position risk percentages"""
-        return sum(position.risk_percent for position in self.positions.values())
+        return self.positions.total('risk_percent')
     
     @property
     def position_count(self) -> int:
@@ -100,7 +385,7 @@ class Portfolio:
     
     def update_equity(self) -> float:
         """Update current equity based on position PnL"""
-        self.unrealized_pnl = sum(position.unrealized_pnl for position in self.positions.values())
+        self.unrealized_pnl = self.positions.total('unrealized_pnl')
         self.current_equity = self.cash + self.unrealized_pnl
         
         # Update high water mark if needed
@@ -110,21 +395,13 @@ class Portfolio:
         self.last_update_time = datetime.datetime.now()
         return self.current_equity
     
-    def add_transaction(self, transaction_type: str, details: Dict[str, Any]) -> None:
-        """Add a transaction to the history"""
-        transaction = {
-            'timestamp': datetime.datetime.now(),
-            'type': transaction_type,
-            **details
-        }
-        self.transaction_history.append(transaction)
+    def add_transaction(self, transaction_type: str, details: Dict[str, Any]) -> int:
+        """Add a transaction to the history and return its sequence number"""
+        return self.transaction_history.record(transaction_type, details)
         
     def get_position_by_id(self, position_id: str) -> Optional[PortfolioPosition]:
         """Get position by ID"""
-        for position in self.positions.values():
-            if position.position_id == position_id:
-                return position
-        return None
+        return self.positions.get_by_id(position_id)
 
 
 @dataclass
@@ -545,18 +545,9 @@ class PortfolioOrchestrator(ParameterizedComponent):
             
             self.portfolio.last_update_time = timestamp
             
-            # Update each position's unrealized P&L
-            for instrument, position in self.portfolio.positions.items():
-                if instrument in current_prices:
-                    current_price = current_prices[instrument]
-                    
-                    # Calculate price change in position direction
-                    price_change = (current_price - position.entry_price) * position.direction
-                    
-                    # Very simplified P&L calculation - would need refinement in practice
-                    # to account for pip values, leverage, etc.
-                    position.unrealized_pnl = price_change * position.position_size
-                    position.last_update_time = timestamp
+            # Update all positions' unrealized P&L at once: price change in the
+            # position direction times size and pip value
+            self.portfolio.positions.mark_to_market(current_prices, timestamp)
             
             # Update portfolio equity
             self.portfolio.update_equity()
@@ -1026,13 +1017,16 @@ class PortfolioOrchestrator(ParameterizedComponent):
                 # All time
                 start_date = datetime.datetime.min
             
-            filtered_history = [tx for tx in history if tx['timestamp'] >= start_date]
+            # Filter the journal columns by time window
+            columns = history.columns()
+            recent = columns['timestamp'] >= np.datetime64(start_date, 'us')
             
-            if not filtered_history:
+            if not recent.any():
                 return PortfolioMetrics(time_window=time_window, start_date=start_date, end_date=now)
             
             # Calculate basic metrics
-            total_pnl = sum(tx.get('realized_pnl', 0) for tx in filtered_history if 'realized_pnl' in tx)
+            realized = columns['realized_pnl'][recent]
+            total_pnl = float(np.nansum(realized))
             total_pnl += self.portfolio.unrealized_pnl
             
             # Calculate total return
@@ -1040,17 +1034,19 @@ class PortfolioOrchestrator(ParameterizedComponent):
             total_return = total_pnl / starting_equity if starting_equity > 0 else 0
             
             # Count trades
-            closes = [tx for tx in filtered_history if tx['type'] == 'close_position']
-            win_count = sum(1 for tx in closes if tx.get('realized_pnl', 0) > 0)
-            loss_count = sum(1 for tx in closes if tx.get('realized_pnl', 0) <= 0)
+            closes = columns['type'][recent] == history.type_code('close_position')
+            close_pnl = np.nan_to_num(realized[closes])
+            wins = close_pnl > 0
+            win_count = int(wins.sum())
+            loss_count = len(close_pnl) - win_count
             
             # Calculate win rate
             total_trades = win_count + loss_count
             win_rate = win_count / total_trades if total_trades > 0 else 0
             
             # Calculate average profit/loss
-            win_pnl = sum(tx.get('realized_pnl', 0) for tx in closes if tx.get('realized_pnl', 0) > 0)
-            loss_pnl = sum(tx.get('realized_pnl', 0) for tx in closes if tx.get('realized_pnl', 0) <= 0)
+            win_pnl = float(close_pnl[wins].sum())
+            loss_pnl = float(close_pnl[~wins].sum())
             
             avg_profit = win_pnl / win_count if win_count > 0 else 0
             avg_loss = loss_pnl / loss_count if loss_count > 0 else 0
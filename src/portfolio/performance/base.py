@@ -6,7 +6,7 @@ that calculate and monitor portfolio performance metrics.
 """
 
 import logging
-from abc import abstractmethod
+from abc import ABC, abstractmethod
 from typing import Dict, List, Any, Optional, Union
 from datetime import datetime
 import pandas as pd
@@ -150,4 +150,44 @@ class PerformanceTracker(ParameterizedComponent, IPerformanceTracker):
         Returns:
             Series with equity values indexed by timestamp
         """
-        pass
\ No newline at end of file
+        pass
+
+
+class MetricsCalculator(ParameterizedComponent, ABC):
+    """
+    Base class for portfolio metrics calculators
+    
+    Metrics calculators compute performance metrics from an equity curve
+    and the trade history over the same period.
+    """
+    
+    def __init__(self, parameters: Dict[str, Any] = None):
+        """
+        Initialize with optional parameters
+        
+        Args:
+            parameters: Calculator parameters
+        """
+        super().__init__(parameters)
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.name = self.__class__.__name__
+    
+    @abstractmethod
+    def calculate(self, 
+                 equity_curve: pd.Series, 
+                 trade_history: List[Dict[str, Any]],
+                 risk_free_rate: float = 0.0,
+                 benchmark_returns: Optional[pd.Series] = None) -> Dict[str, float]:
+        """
+        Calculate performance metrics
+        
+        Args:
+            equity_curve: Series with equity values indexed by timestamp
+            trade_history: List of trade dictionaries
+            risk_free_rate: Risk-free rate for calculations (annual)
+            benchmark_returns: Optional benchmark returns series
+            
+        Returns:
+            Dictionary of calculated metrics
+        """
+        pass
@@ -0,0 +1,210 @@
+"""
+Delta-encoded position history
+
+This module implements PositionHistory, which records the positions of a
+portfolio at each tracked point but stores only the fields that changed
+since the previous point. With a capacity, changes older than the oldest
+retained point are folded into a base state, so memory and the cost per
+point stay constant however long the session runs.
+"""
+
+from typing import Dict, List, Any, Optional
+from datetime import datetime
+
+import numpy as np
+
+from balance_breaker.src.signals.metrics_store import MetricColumn
+
+
+# Position fields recorded at each point
+SNAPSHOT_FIELDS = ('direction', 'entry_price', 'position_size', 'unrealized_pnl',
+                   'realized_pnl', 'risk_percent', 'strategy_name')
+
+# Field code of the change that marks a closed position
+CLOSED = -1
+
+
+class PositionHistory:
+    """
+    Position snapshots stored as changes between points
+
+    Each change is one row of four parallel arrays (point, instrument code,
+    field code, value) in a circular log; strategy names are stored as codes.
+
+    Parameters:
+    -----------
+    capacity : int, optional
+        Number of most recent points kept (default: all)
+    """
+
+    def __init__(self, capacity: Optional[int] = None):
+        self.capacity = capacity
+        self.timestamps = MetricColumn(dtype='datetime64[us]', capacity=capacity)
+        self._points = 0
+
+        # Circular change log
+        self._log_point = np.empty(256, dtype=np.int64)
+        self._log_instrument = np.empty(256, dtype=np.int32)
+        self._log_field = np.empty(256, dtype=np.int8)
+        self._log_value = np.empty(256)
+        self._head = 0
+        self._count = 0
+
+        # Field values at the latest point, and before the oldest retained point
+        self._current: Dict[int, tuple] = {}
+        self._base: Dict[int, List[float]] = {}
+
+        self._instruments: List[str] = []
+        self._instrument_codes: Dict[str, int] = {}
+        self._strategies: List[str] = []
+        self._strategy_codes: Dict[str, int] = {}
+
+    @staticmethod
+    def _code(value: Optional[str], codes: Dict[str, int], values: List[str]) -> int:
+        if value is None:
+            return -1
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(values)
+            values.append(value)
+        return code
+
+    def record(self, timestamp: datetime, positions: Dict[str, Any]) -> None:
+        """
+        Record the positions at a point
+
+        Args:
+            timestamp: Time of the point
+            positions: Positions by instrument (PortfolioPosition objects)
+        """
+        point = self._points
+        seen = set()
+        for instrument, position in positions.items():
+            code = self._code(instrument, self._instrument_codes, self._instruments)
+            seen.add(code)
+            values = (position.direction, position.entry_price, position.position_size,
+                      position.unrealized_pnl, position.realized_pnl, position.risk_percent,
+                      self._code(position.strategy_name, self._strategy_codes, self._strategies))
+            previous = self._current.get(code)
+            for field, value in enumerate(values):
+                if previous is None or previous[field] != value:
+                    self._push(point, code, field, value)
+            self._current[code] = values
+
+        for code in [c for c in self._current if c not in seen]:
+            self._push(point, code, CLOSED, np.nan)
+            del self._current[code]
+
+        self.timestamps.append(timestamp)
+        self._points += 1
+        if self.capacity is not None:
+            self._absorb(self._points - self.capacity)
+
+    def _push(self, point: int, instrument: int, field: int, value: float) -> None:
+        """Append a change to the log"""
+        size = len(self._log_point)
+        if self._count == size:
+            # Unroll the circle into arrays twice the size
+            order = (self._head + np.arange(size)) % size
+            for name in ('_log_point', '_log_instrument', '_log_field', '_log_value'):
+                old = getattr(self, name)
+                grown = np.empty(2 * size, dtype=old.dtype)
+                grown[:size] = old[order]
+                setattr(self, name, grown)
+            self._head = 0
+            size *= 2
+        i = (self._head + self._count) % size
+        self._log_point[i] = point
+        self._log_instrument[i] = instrument
+        self._log_field[i] = field
+        self._log_value[i] = value
+        self._count += 1
+
+    def _absorb(self, before_point: int) -> None:
+        """Fold changes of points before before_point into the base state"""
+        size = len(self._log_point)
+        while self._count and self._log_point[self._head] < before_point:
+            i = self._head
+            self._apply(self._base, int(self._log_instrument[i]), int(self._log_field[i]), self._log_value[i])
+            self._head = (i + 1) % size
+            self._count -= 1
+
+    @staticmethod
+    def _apply(state: Dict[int, List[float]], instrument: int, field: int, value: float) -> None:
+        if field == CLOSED:
+            state.pop(instrument, None)
+        else:
+            state.setdefault(instrument, [np.nan] * len(SNAPSHOT_FIELDS))[field] = value
+
+    def snapshot(self, index: int = -1) -> Dict[str, Dict[str, Any]]:
+        """
+        Positions at a retained point
+
+        Args:
+            index: Position of the point among the retained points (negative
+                counts from the latest)
+
+        Returns:
+            Position field dictionaries by instrument
+        """
+        retained = len(self.timestamps)
+        if index < 0:
+            index += retained
+        if not 0 <= index < retained:
+            raise IndexError("position history index out of range")
+
+        if index == retained - 1:
+            state = {code: list(values) for code, values in self._current.items()}
+        else:
+            point = self._points - retained + index
+            state = {code: list(values) for code, values in self._base.items()}
+            size = len(self._log_point)
+            for k in range(self._count):
+                i = (self._head + k) % size
+                if self._log_point[i] > point:
+                    break
+                self._apply(state, int(self._log_instrument[i]), int(self._log_field[i]), self._log_value[i])
+        return {self._instruments[code]: self._decode(self._instruments[code], values)
+                for code, values in state.items()}
+
+    def _decode(self, instrument: str, values: List[float]) -> Dict[str, Any]:
+        strategy = int(values[-1]) if values[-1] == values[-1] else -1
+        return {
+            'instrument': instrument,
+            'direction': int(values[0]),
+            'entry_price': float(values[1]),
+            'position_size': float(values[2]),
+            'unrealized_pnl': float(values[3]),
+            'realized_pnl': float(values[4]),
+            'risk_percent': float(values[5]),
+            'strategy_name': self._strategies[strategy] if strategy >= 0 else None
+        }
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Every retained point as {'timestamp', 'positions'} dictionaries"""
+        timestamps = self.timestamps.values().astype(datetime)
+        first = self._points - len(timestamps)
+        state = {code: list(values) for code, values in self._base.items()}
+        size = len(self._log_point)
+        history = []
+        k = 0
+        for index, timestamp in enumerate(timestamps):
+            # Replay the changes of this point on the previous state
+            while k < self._count and self._log_point[(self._head + k) % size] <= first + index:
+                i = (self._head + k) % size
+                self._apply(state, int(self._log_instrument[i]), int(self._log_field[i]), self._log_value[i])
+                k += 1
+            history.append({
+                'timestamp': timestamp,
+                'positions': {self._instruments[code]: self._decode(self._instruments[code], values)
+                              for code, values in state.items()}
+            })
+        return history
+
+    @property
+    def change_count(self) -> int:
+        """Number of changes stored"""
+        return self._count
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
@@ -0,0 +1,382 @@
+"""
+Streaming performance metrics
+
+This module implements StreamingMetrics, which keeps the portfolio performance
+metrics up to date as equity points and closed trades arrive. Each time window
+holds running sums of returns, running peak and drawdown, and win/loss totals,
+so adding a point costs O(1) and reading the metrics never touches the history.
+Rolling windows, and every window when the history is capped, keep their
+points in a queue and subtract the ones that fall out of the window.
+"""
+
+from typing import Dict, Any, Optional, Tuple
+from collections import deque
+from datetime import datetime, timedelta
+import math
+
+
+# Length of each time window (None for the whole session)
+WINDOWS = {
+    'day': timedelta(days=1),
+    'week': timedelta(days=7),
+    'month': timedelta(days=30),  # Approximate month as 30 days
+    'year': timedelta(days=365),  # Approximate year as 365 days
+    'all': None
+}
+
+
+def _combine(a: Tuple[float, float, float], b: Tuple[float, float, float]) -> Tuple[float, float, float]:
+    """
+    Drawdown summary of two consecutive stretches of equity
+
+    A summary is (peak, low, max_drawdown). The deepest drawdown of the joined
+    stretch is either inside one of them or from the first one's peak to the
+    second one's low.
+    """
+    return (max(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2], 1.0 - b[1] / a[0] if a[0] > 0 else 0.0))
+
+
+class _DrawdownQueue:
+    """
+    Maximum drawdown of a sliding window of equity values
+
+    A queue built from two stacks: values are pushed on the back stack, which
+    keeps the summary of all its values, and popped from the front stack,
+    which keeps for each value the summary of it and the newer front values.
+    Each value moves between the stacks once, so push and pop are O(1)
+    amortized.
+    """
+
+    def __init__(self):
+        self._front = []   # (value, summary of it and newer front values), oldest last
+        self._back = []
+        self._back_summary = None
+
+    def push(self, value: float) -> None:
+        single = (value, value, 0.0)
+        self._back.append(value)
+        self._back_summary = single if self._back_summary is None else _combine(self._back_summary, single)
+
+    def pop(self) -> None:
+        if not self._front:
+            summary = None
+            for value in reversed(self._back):
+                single = (value, value, 0.0)
+                summary = single if summary is None else _combine(single, summary)
+                self._front.append((value, summary))
+            self._back = []
+            self._back_summary = None
+        self._front.pop()
+
+    def summary(self) -> Optional[Tuple[float, float, float]]:
+        """(peak, low, max_drawdown) of the values in the queue"""
+        if self._front and self._back_summary is not None:
+            return _combine(self._front[-1][1], self._back_summary)
+        if self._front:
+            return self._front[-1][1]
+        return self._back_summary
+
+
+class _Window:
+    """Running statistics of one time window"""
+
+    def __init__(self, length: Optional[timedelta], queued: bool):
+        self.length = length
+        self.queued = queued   # Points can leave the window
+        self.points = deque() if queued else None   # (timestamp, equity, return)
+        self.trades = deque() if queued else None   # (transaction index, timestamp, pnl)
+        self.drawdowns = _DrawdownQueue() if queued else None
+
+        # Power sums of returns, and of the negative ones
+        self.n = 0
+        self.s1 = self.s2 = self.s3 = self.s4 = 0.0
+        self.neg_n = 0
+        self.neg_s1 = self.neg_s2 = 0.0
+        self.pos_n = 0
+        self.pos_sum = 0.0
+
+        # Trades
+        self.trade_count = 0
+        self.win_count = 0
+        self.loss_count = 0
+        self.total_profit = 0.0
+        self.total_loss = 0.0
+
+        # Whole-session window state
+        self.count = 0
+        self.first_time = None
+        self.first_equity = None
+        self.peak = None
+        self.max_drawdown = 0.0
+        self.drawdown_start = None
+        self.max_drawdown_duration = 0
+
+    def add_return(self, r: float, sign: int = 1) -> None:
+        """Add (sign 1) or remove (sign -1) a return"""
+        self.n += sign
+        self.s1 += sign * r
+        self.s2 += sign * r * r
+        self.s3 += sign * r ** 3
+        self.s4 += sign * r ** 4
+        if r < 0:
+            self.neg_n += sign
+            self.neg_s1 += sign * r
+            self.neg_s2 += sign * r * r
+        elif r > 0:
+            self.pos_n += sign
+            self.pos_sum += sign * r
+
+        # Clear the rounding left by removals once a sum is empty
+        if self.n == 0:
+            self.s1 = self.s2 = self.s3 = self.s4 = 0.0
+        if self.neg_n == 0:
+            self.neg_s1 = self.neg_s2 = 0.0
+        if self.pos_n == 0:
+            self.pos_sum = 0.0
+
+    def add_trade(self, pnl: float, sign: int = 1) -> None:
+        """Add (sign 1) or remove (sign -1) a closed trade"""
+        self.trade_count += sign
+        if pnl > 0:
+            self.win_count += sign
+            self.total_profit += sign * pnl
+            if self.win_count == 0:
+                self.total_profit = 0.0
+        else:
+            self.loss_count += sign
+            self.total_loss += sign * pnl
+            if self.loss_count == 0:
+                self.total_loss = 0.0
+
+
+class StreamingMetrics:
+    """
+    Online portfolio performance metrics over fixed time windows
+
+    Each window covers the points a PortfolioTracker with the same capacity
+    retains for it: the points within the window's length, limited to the
+    last capacity points, and the closed trades among the last capacity
+    transactions (from the window's first point on, for rolling windows).
+    On those, metrics match BasicMetricsCalculator and
+    AdvancedMetricsCalculator, except for Value at Risk, which needs the
+    return distribution, and max_drawdown_duration of windows whose points
+    can leave them; those are not reported.
+
+    Parameters:
+    -----------
+    annualization_factor : int
+        Factor used to annualize returns (252 for daily data)
+    min_data_points : int
+        Minimum equity points for the advanced metrics (Sortino, Calmar, ...)
+    windows : tuple
+        Names of the windows to maintain (see WINDOWS)
+    capacity : int, optional
+        Number of most recent points and transactions covered (default: all)
+    """
+
+    def __init__(self, annualization_factor: int = 252, min_data_points: int = 20,
+                 windows: Tuple[str, ...] = ('day', 'week', 'month', 'all'),
+                 capacity: Optional[int] = None):
+        unknown = [name for name in windows if name not in WINDOWS]
+        if unknown:
+            raise ValueError(f"Unknown metrics windows: {unknown}")
+        self.annualization_factor = annualization_factor
+        self.min_data_points = min_data_points
+        self.capacity = capacity
+        self.windows: Dict[str, _Window] = {
+            name: _Window(WINDOWS[name], WINDOWS[name] is not None or capacity is not None)
+            for name in windows
+        }
+        self.last_time = None
+        self.last_equity = None
+        self.transaction_count = 0
+
+    def update(self, timestamp: datetime, equity: float) -> None:
+        """Add an equity point"""
+        previous = self.last_equity
+        r = equity / previous - 1.0 if previous else float('nan')
+        self.last_time = timestamp
+        self.last_equity = equity
+
+        for window in self.windows.values():
+            if not window.queued:
+                self._update_session(window, timestamp, equity, r)
+                continue
+
+            # The first point of a window has no return within it
+            if window.points and r == r:
+                window.add_return(r)
+            window.points.append((timestamp, equity, r))
+            window.drawdowns.push(equity)
+
+            start = timestamp - window.length if window.length is not None else None
+            while ((start is not None and window.points[0][0] < start)
+                   or (self.capacity is not None and len(window.points) > self.capacity)):
+                window.points.popleft()
+                window.drawdowns.pop()
+                # The new first point's return leaves the window
+                first_return = window.points[0][2]
+                if first_return == first_return:
+                    window.add_return(first_return, -1)
+            window.first_time = window.points[0][0]
+            window.first_equity = window.points[0][1]
+            self._evict_trades(window)
+
+    def _update_session(self, window: _Window, timestamp: datetime, equity: float, r: float) -> None:
+        if window.count and r == r:
+            window.add_return(r)
+        window.count += 1
+        if window.first_time is None:
+            window.first_time = timestamp
+            window.first_equity = equity
+
+        if window.peak is None or equity >= window.peak:
+            window.peak = equity
+            window.drawdown_start = None
+        else:
+            drawdown = 1.0 - equity / window.peak if window.peak > 0 else 0.0
+            window.max_drawdown = max(window.max_drawdown, drawdown)
+            if window.drawdown_start is None:
+                window.drawdown_start = timestamp
+            window.max_drawdown_duration = max(window.max_drawdown_duration,
+                                               (timestamp - window.drawdown_start).days)
+
+    def add_transaction(self, transaction: Dict[str, Any]) -> None:
+        """Add a portfolio transaction; closed positions count as trades"""
+        index = self.transaction_count
+        self.transaction_count += 1
+        if transaction.get('type') == 'close_position':
+            pnl = transaction.get('realized_pnl', 0)
+            for window in self.windows.values():
+                window.add_trade(pnl)
+                if window.trades is not None:
+                    window.trades.append((index, transaction['timestamp'], pnl))
+
+        for window in self.windows.values():
+            self._evict_trades(window)
+
+    def _evict_trades(self, window: _Window) -> None:
+        """Remove trades beyond the capacity or from before a rolling window's first point"""
+        if window.trades is None:
+            return
+        first_index = self.transaction_count - self.capacity if self.capacity is not None else 0
+        first_time = window.first_time if window.length is not None else None
+        while window.trades and (window.trades[0][0] < first_index
+                                 or (first_time is not None and window.trades[0][1] < first_time)):
+            window.add_trade(window.trades.popleft()[2], -1)
+
+    def metrics(self, time_window: str = 'all', risk_free_rate: float = 0.0) -> Dict[str, Any]:
+        """
+        Current metrics of a window
+
+        Args:
+            time_window: Window name
+            risk_free_rate: Annual risk-free rate for Sharpe and Sortino ratios
+
+        Returns:
+            Dictionary of metrics, keyed like the metrics calculators' results
+        """
+        window = self.windows[time_window]
+        if self.last_equity is None:
+            return {}
+
+        metrics = {}
+        initial, final = window.first_equity, self.last_equity
+        metrics['initial_equity'] = initial
+        metrics['final_equity'] = final
+        metrics['absolute_pnl'] = final - initial
+        metrics['total_return'] = final / initial - 1.0 if initial > 0 else 0.0
+        days = (self.last_time - window.first_time).days
+        if days > 0 and metrics['total_return'] > -1.0:
+            metrics['annualized_return'] = (1.0 + metrics['total_return']) ** (365.0 / days) - 1.0
+        else:
+            metrics['annualized_return'] = 0.0
+
+        # Trades
+        trades = window.trade_count
+        losses = window.loss_count
+        metrics['total_trades'] = trades
+        metrics['win_count'] = window.win_count
+        metrics['loss_count'] = losses
+        metrics['win_rate'] = window.win_count / trades if trades else 0.0
+        metrics['total_profit'] = window.total_profit
+        metrics['total_loss'] = window.total_loss
+        metrics['avg_profit'] = window.total_profit / window.win_count if window.win_count else 0.0
+        metrics['avg_loss'] = window.total_loss / losses if losses else 0.0
+        metrics['avg_trade'] = (window.total_profit + window.total_loss) / trades if trades else 0.0
+        if window.total_loss != 0:
+            metrics['profit_factor'] = abs(window.total_profit / window.total_loss)
+        else:
+            metrics['profit_factor'] = float('inf') if window.total_profit > 0 else 0.0
+        metrics['expectancy'] = (metrics['win_rate'] * metrics['avg_profit']
+                                 + (1 - metrics['win_rate']) * metrics['avg_loss']) if trades else 0.0
+        metrics['risk_adjusted_expectancy'] = (metrics['expectancy'] / abs(metrics['avg_loss'])
+                                               if metrics['avg_loss'] != 0 else 0.0)
+
+        # Drawdown
+        if not window.queued:
+            metrics['max_drawdown'] = window.max_drawdown
+            metrics['max_drawdown_duration'] = window.max_drawdown_duration
+            metrics['current_drawdown'] = 1.0 - final / window.peak if window.peak > 0 else 0.0
+        else:
+            peak, _, max_drawdown = window.drawdowns.summary()
+            metrics['max_drawdown'] = max_drawdown
+            metrics['current_drawdown'] = 1.0 - final / peak if peak > 0 else 0.0
+
+        # Return moments
+        n = window.n
+        af = self.annualization_factor
+        mean = window.s1 / n if n else 0.0
+        m2 = max(window.s2 / n - mean * mean, 0.0) if n else 0.0
+        std = math.sqrt(m2 * n / (n - 1)) if n > 1 else 0.0
+        if n > 1:
+            metrics['daily_return_mean'] = mean
+            metrics['daily_return_std'] = std
+            metrics['annualized_volatility'] = std * math.sqrt(af)
+            metrics['sharpe_ratio'] = ((metrics['annualized_return'] - risk_free_rate) / metrics['annualized_volatility']
+                                       if metrics['annualized_volatility'] > 0 else 0.0)
+        else:
+            metrics['daily_return_mean'] = 0.0
+            metrics['daily_return_std'] = 0.0
+            metrics['annualized_volatility'] = 0.0
+            metrics['sharpe_ratio'] = 0.0
+
+        points = window.count if not window.queued else len(window.points)
+        if points < self.min_data_points:
+            metrics.update({'sortino_ratio': 0.0, 'calmar_ratio': 0.0, 'omega_ratio': 0.0,
+                            'skewness': 0.0, 'kurtosis': 0.0})
+        else:
+            # Sortino ratio from the deviation of negative returns
+            if window.neg_n > 0:
+                k = window.neg_n
+                neg_var = (window.neg_s2 - window.neg_s1 ** 2 / k) / (k - 1) if k > 1 else 0.0
+                downside = math.sqrt(max(neg_var, 0.0)) * math.sqrt(af)
+                metrics['sortino_ratio'] = (mean * af - risk_free_rate) / downside if downside > 0 else 0.0
+            else:
+                metrics['sortino_ratio'] = float('inf')
+
+            # Calmar ratio
+            if metrics['max_drawdown'] > 0:
+                metrics['calmar_ratio'] = (((final / initial) ** (365.0 / days) - 1.0) / metrics['max_drawdown']
+                                           if days > 0 else 0.0)
+            else:
+                metrics['calmar_ratio'] = float('inf')
+
+            # Omega ratio with a zero threshold
+            negative_sum = -window.neg_s1
+            metrics['omega_ratio'] = window.pos_sum / negative_sum if window.neg_n > 0 and negative_sum > 0 else float('inf')
+
+            # Skewness and excess kurtosis, bias corrected as in pandas
+            if n > 3 and m2 > 0:
+                m3 = window.s3 / n - 3 * mean * window.s2 / n + 2 * mean ** 3
+                m4 = window.s4 / n - 4 * mean * window.s3 / n + 6 * mean ** 2 * window.s2 / n - 3 * mean ** 4
+                metrics['skewness'] = math.sqrt(n * (n - 1)) / (n - 2) * m3 / m2 ** 1.5
+                metrics['kurtosis'] = (n - 1) / ((n - 2) * (n - 3)) * ((n + 1) * (m4 / m2 ** 2 - 3) + 6)
+            else:
+                metrics['skewness'] = 0.0
+                metrics['kurtosis'] = 0.0
+
+        # Benchmark metrics need benchmark returns (see AdvancedMetricsCalculator)
+        metrics.update({'alpha': 0.0, 'beta': 0.0, 'tracking_error': 0.0,
+                        'information_ratio': 0.0, 'correlation': 0.0})
+        return metrics
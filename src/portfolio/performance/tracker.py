@@ -11,10 +11,14 @@ import pandas as pd
 import numpy as np
 import copy
 import json
+from collections import deque
 
+from balance_breaker.src.signals.metrics_store import MetricColumn, MetricsStore
 from balance_breaker.src.portfolio.models import Portfolio, PortfolioMetrics, PortfolioPosition
 from balance_breaker.src.portfolio.performance.base import PerformanceTracker
+from balance_breaker.src.portfolio.performance.history import PositionHistory
 from balance_breaker.src.portfolio.performance.metrics import BasicMetricsCalculator, AdvancedMetricsCalculator
+from balance_breaker.src.portfolio.performance.streaming import StreamingMetrics
 
 
 class PortfolioTracker(PerformanceTracker):
@@ -22,7 +26,11 @@ class PortfolioTracker(PerformanceTracker):
     Portfolio performance tracker implementation
     
     This tracker records portfolio state over time, calculates performance metrics,
-    and provides equity curves and trade analysis.
+    and provides equity curves and trade analysis. Equity is stored in typed
+    columns that become ring buffers when max_history_length is set, and
+    position snapshots store only the fields that changed since the last point.
+    Metrics for the standard time windows are maintained incrementally as
+    points are recorded, so reading them does not scan the history.
     
     Parameters:
     -----------
@@ -34,8 +42,16 @@ class PortfolioTracker(PerformanceTracker):
         Maximum number of history points to store (0 for unlimited)
     precision : int
         Decimal precision for calculations
+    streaming_metrics : bool
+        Whether to serve metrics without benchmark returns from the
+        incrementally updated state; Value at Risk and the drawdown duration
+        of windows that points leave are read from the retained history and
+        cached until the next update
     """
     
+    # Portfolio values recorded at each point
+    equity_columns = ('equity', 'cash', 'unrealized_pnl', 'realized_pnl', 'position_count')
+    
     def __init__(self, parameters: Dict[str, Any] = None):
         """
         Initialize with optional parameters
@@ -47,7 +63,8 @@ class PortfolioTracker(PerformanceTracker):
             'record_frequency': 'day',   # Record daily by default
             'store_positions': True,     # Store position details
             'max_history_length': 0,     # Unlimited history
-            'precision': 4               # 4 decimal places
+            'precision': 4,              # 4 decimal places
+            'streaming_metrics': True    # Incremental metrics
         }
         
         if parameters:
@@ -55,20 +72,30 @@ class PortfolioTracker(PerformanceTracker):
             
         super().__init__(default_params)
         
-        # Initialize history storage
-        self.equity_history = []   # List of (timestamp, equity) tuples
-        self.trade_history = []    # List of trade dictionaries
-        self.position_history = [] # List of (timestamp, positions) tuples if store_positions is True
+        # Initialize history storage; with a maximum length the oldest points
+        # are overwritten in place instead of trimmed
+        capacity = self.parameters['max_history_length'] or None
+        self.equity_times = MetricColumn(dtype='datetime64[us]', capacity=capacity)
+        self.equity_history = MetricsStore(self.equity_columns, capacity=capacity)
+        self.trade_history = deque(maxlen=capacity)          # Transaction dictionaries
+        self.position_history = PositionHistory(capacity)    # Used if store_positions is True
         self.metrics_cache = {}    # Cache for calculated metrics
+        self.transaction_sequence = 0  # Next transaction journal sequence number to read
         
         # Initialize metrics calculators
         self.basic_calculator = BasicMetricsCalculator()
         self.advanced_calculator = AdvancedMetricsCalculator()
+        self.streaming = StreamingMetrics(
+            annualization_factor=self.basic_calculator.parameters['annualization_factor'],
+            min_data_points=self.advanced_calculator.parameters['min_data_points'],
+            windows=('day', 'week', 'month', 'year', 'all'),
+            capacity=capacity
+        )
         
         # Last recorded time to manage recording frequency
         self.last_recorded_time = None
     
-    def update(self, portfolio: Portfolio, timestamp: datetime) -> None:
+    def _update_impl(self, portfolio: Portfolio, timestamp: datetime) -> None:
         """
         Update tracker with current portfolio state
         
@@ -81,60 +108,30 @@ class PortfolioTracker(PerformanceTracker):
             return
         
         # Update equity history
+        self.equity_times.append(timestamp)
         self.equity_history.append({
-            'timestamp': timestamp,
             'equity': portfolio.current_equity,
             'cash': portfolio.cash,
             'unrealized_pnl': portfolio.unrealized_pnl,
             'realized_pnl': portfolio.realized_pnl,
             'position_count': len(portfolio.positions)
         })
+        self.streaming.update(timestamp, portfolio.current_equity)
         
         # Store position details if enabled
         if self.parameters['store_positions']:
-            positions_snapshot = {}
-            for instrument, position in portfolio.positions.items():
-                positions_snapshot[instrument] = {
-                    'instrument': position.instrument,
-                    'direction': position.direction,
-                    'entry_price': position.entry_price,
-                    'position_size': position.position_size,
-                    'unrealized_pnl': position.unrealized_pnl,
-                    'realized_pnl': position.realized_pnl,
-                    'risk_percent': position.risk_percent,
-                    'strategy_name': position.strategy_name
-                }
-            
-            self.position_history.append({
-                'timestamp': timestamp,
-                'positions': positions_snapshot
-            })
+            self.position_history.record(timestamp, portfolio.positions)
         
-        # Add new trades to history
+        # Add transactions recorded since the last update
         if hasattr(portfolio, 'transaction_history'):
-            # Get only new transactions since last update
-            new_transactions = []
-            if self.trade_history:
-                last_ts = self.trade_history[-1]['timestamp'] if self.trade_history else None
-                new_transactions = [tx for tx in portfolio.transaction_history 
-                                  if last_ts is None or tx['timestamp'] > last_ts]
-            else:
-                new_transactions = portfolio.transaction_history
-            
-            # Add new transactions to history
-            self.trade_history.extend(new_transactions)
-        
-        # Limit history length if needed
-        max_length = self.parameters['max_history_length']
-        if max_length > 0:
-            if len(self.equity_history) > max_length:
-                self.equity_history = self.equity_history[-max_length:]
-            if len(self.trade_history) > max_length:
-                self.trade_history = self.trade_history[-max_length:]
-            if self.parameters['store_positions'] and len(self.position_history) > max_length:
-                self.position_history = self.position_history[-max_length:]
-        
-        # Invalidate metrics cache
+            journal = portfolio.transaction_history
+            transactions = journal.since(self.transaction_sequence)
+            self.trade_history.extend(transactions)
+            self.transaction_sequence = journal.next_sequence
+            for transaction in transactions:
+                self.streaming.add_transaction(transaction)
+        
+        # Invalidate metrics calculated from the history
         self.metrics_cache = {}
         
         # Update last recorded time
@@ -199,6 +196,11 @@ class PortfolioTracker(PerformanceTracker):
         """
         Calculate performance metrics for the specified time window
         
+        Without benchmark returns most metrics come from the incrementally
+        updated state in constant time; otherwise they are calculated from
+        the recorded history and cached until the next update. Both cover
+        the same retained points and trades.
+        
         Args:
             time_window: Time window for metrics ('day', 'week', 'month', 'year', 'all')
             risk_free_rate: Risk-free rate for Sharpe ratio calculation
@@ -207,11 +209,32 @@ class PortfolioTracker(PerformanceTracker):
         Returns:
             PortfolioMetrics object
         """
+        if (benchmark_returns is None and self.parameters['streaming_metrics']
+                and time_window in self.streaming.windows):
+            return self._streaming_metrics(time_window, risk_free_rate)
+        
         # Check cache first
         cache_key = f"{time_window}_{risk_free_rate}"
-        if cache_key in self.metrics_cache:
-            return self.metrics_cache[cache_key]
+        if cache_key not in self.metrics_cache:
+            self.metrics_cache[cache_key] = self._calculate_metrics_impl(
+                time_window, risk_free_rate, benchmark_returns)
+        return self.metrics_cache[cache_key]
+    
+    def _calculate_metrics_impl(self, 
+                                time_window: str = 'all', 
+                                risk_free_rate: float = 0.0,
+                                benchmark_returns: Optional[pd.Series] = None) -> PortfolioMetrics:
+        """
+        Calculate performance metrics from the recorded history
         
+        Args:
+            time_window: Time window for metrics ('day', 'week', 'month', 'year', 'all')
+            risk_free_rate: Risk-free rate for Sharpe ratio calculation
+            benchmark_returns: Optional benchmark returns for comparison
+            
+        Returns:
+            PortfolioMetrics object
+        """
         # Get filtered equity curve and trade history
         equity_curve = self.get_equity_curve(time_window)
         
@@ -242,10 +265,93 @@ class PortfolioTracker(PerformanceTracker):
         # Combine metrics
         combined_metrics = {**basic_metrics, **advanced_metrics}
         
-        # Create metrics object
-        start_date = equity_curve.index[0] if not equity_curve.empty else None
-        end_date = equity_curve.index[-1] if not equity_curve.empty else None
+        return self._create_metrics(combined_metrics, time_window,
+                                    equity_curve.index[0], equity_curve.index[-1])
+    
+    def _streaming_metrics(self, time_window: str, risk_free_rate: float = 0.0) -> PortfolioMetrics:
+        """
+        Metrics of a time window from the incrementally updated state
+        
+        Args:
+            time_window: Time window for metrics ('day', 'week', 'month', 'year', 'all')
+            risk_free_rate: Risk-free rate for Sharpe ratio calculation
+            
+        Returns:
+            PortfolioMetrics object
+        """
+        if self.streaming.last_time is None:
+            return PortfolioMetrics(time_window=time_window)
+        
+        metrics = self.streaming.metrics(time_window, risk_free_rate)
+        
+        # Metrics that need the window's points, calculated once per update
+        cache_key = f"{time_window}_history"
+        if cache_key not in self.metrics_cache:
+            self.metrics_cache[cache_key] = self._history_metrics(
+                time_window, self.streaming.windows[time_window].queued)
+        metrics.update(self.metrics_cache[cache_key])
         
+        return self._create_metrics(metrics, time_window,
+                                    self.streaming.windows[time_window].first_time,
+                                    self.streaming.last_time)
+    
+    def _history_metrics(self, time_window: str, drawdown_duration: bool) -> Dict[str, Any]:
+        """
+        Value at Risk, and optionally drawdown duration, from the retained history
+        
+        Args:
+            time_window: Time window ('day', 'week', 'month', 'year', 'all')
+            drawdown_duration: Whether to calculate max_drawdown_duration
+            
+        Returns:
+            Dictionary of metrics, calculated as by the metrics calculators
+        """
+        equity = self.get_equity_curve(time_window)
+        values = equity.to_numpy()
+        metrics = {}
+        
+        if len(values) < self.advanced_calculator.parameters['min_data_points']:
+            metrics['value_at_risk'] = 0.0
+            metrics['conditional_var'] = 0.0
+        else:
+            returns = values[1:] / values[:-1] - 1.0
+            returns = returns[~np.isnan(returns)]
+            value_at_risk = abs(np.quantile(returns, 1.0 - self.advanced_calculator.parameters['var_confidence']))
+            tail = returns[returns < -value_at_risk]
+            metrics['value_at_risk'] = value_at_risk
+            metrics['conditional_var'] = abs(tail.mean()) if len(tail) else value_at_risk
+        
+        if drawdown_duration:
+            # Longest run of points below the running peak, in days
+            in_drawdown = values < np.maximum.accumulate(values) if len(values) else values.astype(bool)
+            max_duration = 0
+            if in_drawdown.any():
+                times = equity.index.to_numpy()
+                starts = in_drawdown & ~np.concatenate(([False], in_drawdown[:-1]))
+                episodes = np.cumsum(starts)[in_drawdown]
+                drawdown_times = times[in_drawdown]
+                boundaries = np.flatnonzero(np.diff(episodes)) + 1
+                first = drawdown_times[np.concatenate(([0], boundaries))]
+                last = drawdown_times[np.concatenate((boundaries - 1, [len(drawdown_times) - 1]))]
+                max_duration = int(((last - first) // np.timedelta64(1, 'D')).max())
+            metrics['max_drawdown_duration'] = max_duration
+        
+        return metrics
+    
+    def _create_metrics(self, combined_metrics: Dict[str, Any], time_window: str,
+                        start_date: datetime, end_date: datetime) -> PortfolioMetrics:
+        """
+        Create a metrics object from a dictionary of calculated metrics
+        
+        Args:
+            combined_metrics: Calculated metrics
+            time_window: Time window of the metrics
+            start_date: First timestamp of the window
+            end_date: Last timestamp of the window
+            
+        Returns:
+            PortfolioMetrics object
+        """
         metrics = PortfolioMetrics(
             total_return=combined_metrics.get('total_return', 0.0),
             sharpe_ratio=combined_metrics.get('sharpe_ratio', 0.0),
@@ -266,9 +372,6 @@ class PortfolioTracker(PerformanceTracker):
                               if k not in PortfolioMetrics.__dataclass_fields__}
         )
         
-        # Cache metrics
-        self.metrics_cache[cache_key] = metrics
-        
         return metrics
     
     def get_equity_curve(self, time_window: str = 'all') -> pd.Series:
@@ -279,25 +382,36 @@ class PortfolioTracker(PerformanceTracker):
             time_window: Time window for equity curve ('day', 'week', 'month', 'year', 'all')
             
         Returns:
-            Series with equity values indexed by timestamp
+            Series with equity values indexed by timestamp, sharing memory
+            with the history (valid until the next update; copy to keep it)
         """
-        if not self.equity_history:
-            return pd.Series()
-        
-        # Convert equity history to DataFrame
-        df = pd.DataFrame(self.equity_history)
-        df.set_index('timestamp', inplace=True)
+        return self.get_equity_frame(time_window)['equity']
+    
+    def get_equity_frame(self, time_window: str = 'all') -> pd.DataFrame:
+        """
+        Get all recorded equity columns for the specified time window
         
-        # Filter by time window
-        if time_window != 'all':
-            end_date = df.index.max()
+        Args:
+            time_window: Time window ('day', 'week', 'month', 'year', 'all')
+            
+        Returns:
+            DataFrame of the equity columns indexed by timestamp, sharing
+            memory with the history (valid until the next update)
+        """
+        times = self.equity_times.values()
+        start = 0
+        if time_window != 'all' and len(times):
+            # Points are recorded in time order
+            end_date = times[-1].astype(datetime)
             start_date = self._calculate_start_date(end_date, time_window)
-            df = df[df.index >= start_date]
-        
-        # Extract equity series
-        equity_curve = df['equity']
+            start = int(np.searchsorted(times, np.datetime64(start_date, 'us')))
         
-        return equity_curve
+        index = pd.DatetimeIndex(times[start:], name='timestamp', copy=False)
+        return pd.DataFrame(
+            {name: pd.Series(column.values()[start:], index=index, name=name, copy=False)
+             for name, column in self.equity_history.items()},
+            copy=False
+        )
     
     def _calculate_start_date(self, end_date: datetime, time_window: str) -> datetime:
         """
@@ -337,7 +451,7 @@ class PortfolioTracker(PerformanceTracker):
             Filtered trade history
         """
         if not self.trade_history or time_window == 'all' or start_date is None:
-            return self.trade_history
+            return list(self.trade_history)
         
         # Filter trades by timestamp
         return [trade for trade in self.trade_history if trade['timestamp'] >= start_date]
@@ -361,7 +475,7 @@ class PortfolioTracker(PerformanceTracker):
             
             if format.lower() == 'csv':
                 # Export equity history as CSV
-                df = pd.DataFrame(self.equity_history)
+                df = self.get_equity_frame()
                 df.to_csv(file_path)
                 self.logger.info(f"Exported equity history to {file_path}")
                 return file_path
@@ -369,12 +483,12 @@ class PortfolioTracker(PerformanceTracker):
             elif format.lower() == 'json':
                 # Export all history as JSON
                 data = {
-                    'equity_history': self.equity_history,
-                    'trade_history': self.trade_history,
+                    'equity_history': self.get_equity_frame().reset_index().to_dict('records'),
+                    'trade_history': list(self.trade_history),
                 }
                 
                 if self.parameters['store_positions']:
-                    data['position_history'] = self.position_history
+                    data['position_history'] = self.position_history.to_list()
                 
                 with open(file_path, 'w') as f:
                     json.dump(data, f, default=self._json_serializer, indent=2)
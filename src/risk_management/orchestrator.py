@@ -78,7 +78,7 @@ class RiskManager:
             Complete trade parameters or None if trade rejected
         """
         # Normalize direction to int if it's not already
-        dir_value = direction.value if isinstance(direction, Direction) else direction
+        dir_value = getattr(direction, 'value', direction)
         
         # 1. Set risk amount
         risk_percent = self.config.get('risk_percent', self.default_risk)
@@ -1,8 +1,16 @@
 # src/signals/__init__.py
 from .cloud_system import EnhancedCloudSystem
+from .multi_pair import MultiPairCloudSystem
 from .indicators import calculate_indicators
+from .streaming import RingBuffer, RollingCovariance
+from .metrics_store import MetricsStore, MetricColumn
 
 __all__ = [
     'EnhancedCloudSystem',
-    'calculate_indicators'
+    'MultiPairCloudSystem',
+    'calculate_indicators',
+    'RingBuffer',
+    'RollingCovariance',
+    'MetricsStore',
+    'MetricColumn'
 ]
\ No newline at end of file
@@ -1,16 +1,66 @@
+from collections import deque
+
 import numpy as np
 import pandas as pd
+from scipy.signal import lfilter
+from scipy.spatial.distance import pdist, squareform
 from scipy.spatial.transform import Rotation as R
+from scipy.special import entr
+from scipy.stats import entropy
 from sklearn.decomposition import PCA
 from sklearn.linear_model import LinearRegression
 
+from .metrics_store import MetricsStore
+from .streaming import RingBuffer, RollingCovariance
+
 class EnhancedCloudSystem:
-    def __init__(self, num_points=300, pair="USDJPY", window_size=60):
+    # Column order of run_batch results
+    batch_columns = ['precession', 'instability', 'market_mood', 'avg_delta', 'cloud_entropy',
+                     'principal_axis_angle', 'rotational_energy', 'regime', 'lower_bound_probability',
+                     'vix_inflation_correlation', 'vix_rates_correlation', 'signal']
+    
+    # Steps whose clouds run_batch holds in memory at once
+    batch_chunk_steps = 2000
+    
+    # Metrics backends: sklearn PCA and full distance matrix, or closed form
+    metrics_backends = ('sklearn', 'fast')
+    
+    # Per-step metrics: float columns and the regime as a categorical
+    metric_columns = ('avg_delta', 'cloud_entropy', 'principal_axis_angle', 'rotational_energy',
+                      'vix_inflation_correlation', 'vix_rates_correlation', 'lower_bound_probability')
+    regimes = ('TARGET_EQUILIBRIUM', 'LOWER_BOUND_RISK')
+    
+    def __init__(self, num_points=300, pair="USDJPY", window_size=60, metrics_backend='sklearn',
+                 entropy_samples=None, metrics_capacity=None, random_state=None, cloud_block_steps=1):
         self.num_points = num_points
         self.scale = 0.20  # Rotation magnitude
         self.pair = pair  # Default pair
         self.window_size = window_size  # For trailing computations
         
+        # Metrics backend; 'fast' takes the principal axis from the 3x3
+        # covariance and the entropy from condensed distances, sampled over
+        # entropy_samples fixed point pairs if given (each histogram bin then
+        # has a standard error of about 0.5/sqrt(entropy_samples) or less)
+        if metrics_backend not in self.metrics_backends:
+            raise ValueError(f"Unknown metrics backend: {metrics_backend}")
+        self.metrics_backend = metrics_backend
+        self.entropy_samples = entropy_samples
+        self.entropy_pairs = _sample_point_pairs(num_points, entropy_samples)
+        
+        # Metrics are kept for every step, or for the last metrics_capacity
+        # steps (at least 6, the five-step derived metrics need a full window)
+        if metrics_capacity is not None and metrics_capacity < 6:
+            raise ValueError(f"metrics_capacity must be at least 6, got {metrics_capacity}")
+        self.metrics_capacity = metrics_capacity
+        
+        # Random stream: None keeps the global legacy stream (seeded in
+        # generate_cloud); otherwise a per-instance Generator seeded from
+        # random_state, with clouds drawn through cached Cholesky factors
+        # cloud_block_steps steps at a time
+        self.random_state = random_state
+        self.cloud_block_steps = max(1, int(cloud_block_steps))
+        self._init_random_streams()
+        
         # Currency pair to indicator mapping
         self.pair_to_codes = {
             "USDJPY": "JP",
@@ -26,11 +76,15 @@ class EnhancedCloudSystem:
         self.natural_rate = 0.5  # Initial estimate, will be updated
         
         # Historical data storage for computing correlations and estimating parameters
-        self.vix_history = []
-        self.inflation_exp_history = []
-        self.interest_rate_history = []
-        self.natural_rate_history = []
-        self.macro_history = []
+        self.vix_history = RingBuffer(window_size)
+        self.inflation_exp_history = RingBuffer(window_size)
+        self.interest_rate_history = RingBuffer(window_size)
+        self.natural_rate_history = RingBuffer(window_size)
+        self.macro_history = deque(maxlen=window_size)
+        
+        # Rolling statistics of paired changes, updated in O(1) per step
+        self.vix_inflation_stats = RollingCovariance(max(1, window_size - 1))
+        self.vix_rates_stats = RollingCovariance(max(1, window_size - 1))
         
         # Correlation storage
         self.vix_inflation_corr = 0.0
@@ -50,22 +104,15 @@ class EnhancedCloudSystem:
             self.current_points = self.initial_points.copy()
             self.prev_points = self.initial_points.copy()
         
-        # Metrics storage
-        self.metrics = {
-            'avg_delta': [],
-            'cloud_entropy': [],
-            'principal_axis_angle': [],
-            'rotational_energy': [],
-            'vix_inflation_correlation': [],
-            'vix_rates_correlation': [],
-            'regime': [],
-            'lower_bound_probability': []
-        }
+        # Metrics storage: typed columns, see metrics_frame()
+        self.metrics = MetricsStore(self.metric_columns, {'regime': self.regimes},
+                                    capacity=metrics_capacity)
     
     def generate_cloud(self):
         """Generate points based on a multivariate normal distribution
         representing the joint probability of the three economic dimensions"""
-        np.random.seed(42)  # For reproducibility
+        if self.rng is None:
+            np.random.seed(42)  # For reproducibility
         
         # Mean vector - centered on current estimates
         mean_vector = np.array([0.0, 0.0, 0.0])
@@ -79,11 +126,16 @@ class EnhancedCloudSystem:
         
         try:
             # Generate points from multivariate normal distribution
-            self.initial_points = np.random.multivariate_normal(mean_vector, covariance, self.num_points)
-            
-            # Add small noise for numerical stability
             noise = 0.01
-            self.initial_points += np.random.normal(0, noise, (self.num_points, 3))
+            if self.rng is None:
+                self.initial_points = np.random.multivariate_normal(mean_vector, covariance, self.num_points)
+                
+                # Add small noise for numerical stability
+                self.initial_points += np.random.normal(0, noise, (self.num_points, 3))
+            else:
+                self.initial_points = (self.rng.standard_normal((self.num_points, 3)) @ np.linalg.cholesky(covariance).T
+                                       + mean_vector)
+                self.initial_points += self.rng.normal(0, noise, (self.num_points, 3))
         except Exception as e:
             print(f"Error in cloud generation: {e}")
             # Fallback to simple random points
@@ -144,11 +196,68 @@ class EnhancedCloudSystem:
                 ])
             
             # Generate new points from this distribution
-            self.current_points = np.random.multivariate_normal(mean_vector, covariance, self.num_points)
+            if self.rng is None:
+                self.current_points = np.random.multivariate_normal(mean_vector, covariance, self.num_points)
+            else:
+                self.current_points = self._cloud_normals(1)[0] @ self._cloud_factor(regime, lower_bound_prob) + mean_vector
         except Exception as e:
             print(f"Error updating cloud distribution: {e}")
             # Keep existing distribution as fallback
             pass
+    
+    def _init_random_streams(self, step_shape=None):
+        """Set up the per-instance random streams, if random_state is given
+        
+        Clouds and the tiny perturbations of degenerate clouds use separate
+        child streams, so results do not depend on cloud_block_steps. Each
+        step takes standard normals of step_shape (default: one cloud).
+        """
+        self.rng = None
+        self._cloud_rng = None
+        self._noise_rng = None
+        if self.random_state is not None:
+            self.rng = np.random.default_rng(self.random_state)
+            self._cloud_rng, self._noise_rng = self.rng.spawn(2)
+        self._step_shape = (self.num_points, 3) if step_shape is None else tuple(step_shape)
+        self._normal_block = None
+        self._normal_index = 0
+        self._factor_cache = {}
+    
+    def _cloud_normals(self, n_steps):
+        """Standard normals for the next n_steps clouds, drawn from the cloud
+        stream at least cloud_block_steps steps at a time"""
+        parts = []
+        while n_steps > 0:
+            if self._normal_block is None or self._normal_index == len(self._normal_block):
+                self._normal_block = self._cloud_rng.standard_normal(
+                    (max(self.cloud_block_steps, n_steps),) + self._step_shape)
+                self._normal_index = 0
+            take = min(n_steps, len(self._normal_block) - self._normal_index)
+            parts.append(self._normal_block[self._normal_index:self._normal_index + take])
+            self._normal_index += take
+            n_steps -= take
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+    
+    def _cloud_factor(self, regime, lower_bound_prob):
+        """Transposed Cholesky factor of the cloud covariance
+        
+        The target equilibrium covariance and the lower bound covariance at
+        its sensitivity cap are fixed, so their factors are computed once.
+        """
+        lower_bound_risk = regime == "LOWER_BOUND_RISK"
+        fixed = not lower_bound_risk or lower_bound_prob * 1.5 >= 0.8
+        if fixed and regime in self._factor_cache:
+            return self._factor_cache[regime]
+        factor = _cholesky_factors(np.array([lower_bound_prob]), np.array([lower_bound_risk]))[0]
+        if fixed:
+            self._factor_cache[regime] = factor
+        return factor
+    
+    def _perturbation(self, shape):
+        """Tiny noise added to degenerate clouds before measuring them"""
+        if self.rng is None:
+            return np.random.normal(0, 1e-10, size=shape)
+        return self._noise_rng.normal(0, 1e-10, size=shape)
         
     def get_currency_code(self):
         """Get the appropriate currency code"""
@@ -167,8 +276,6 @@ class EnhancedCloudSystem:
         try:
             # Store macro history for trailing calculations
             self.macro_history.append(macro_data)
-            if len(self.macro_history) > self.window_size:
-                self.macro_history.pop(0)
             
             # Get currency code
             curr_code = self.get_currency_code()
@@ -192,8 +299,6 @@ class EnhancedCloudSystem:
             
             # Store for historical tracking
             self.natural_rate_history.append(self.natural_rate)
-            if len(self.natural_rate_history) > self.window_size:
-                self.natural_rate_history.pop(0)
                 
             return self.natural_rate
         except Exception as e:
@@ -239,60 +344,37 @@ class EnhancedCloudSystem:
     def calculate_correlations(self, macro_data):
         """Calculate trailing correlations between VIX and inflation/interest rates"""
         try:
-            # Store VIX data
-            vix = macro_data.get('VIX', None)
-            if vix is not None:
-                self.vix_history.append(vix)
-                if len(self.vix_history) > self.window_size:
-                    self.vix_history.pop(0)
-            
-            # Store inflation expectations
             curr_code = self.get_currency_code()
             inflation_key = f'US-{curr_code}_CPI_YOY'
+            yield_key = f'US-{curr_code}_10Y'
+            
+            vix = macro_data.get('VIX', None)
             inflation = macro_data.get(inflation_key, None)
+            rate = macro_data.get(yield_key, None)
+            
+            prev_vix = self.vix_history.last()
+            prev_inflation = self.inflation_exp_history.last()
+            prev_rate = self.interest_rate_history.last()
+            
+            # Store VIX, inflation expectations and interest rate data
+            if vix is not None:
+                self.vix_history.append(vix)
             if inflation is not None:
                 self.inflation_exp_history.append(inflation)
-                if len(self.inflation_exp_history) > self.window_size:
-                    self.inflation_exp_history.pop(0)
-            
-            # Store interest rate data
-            yield_key = f'US-{curr_code}_10Y'
-            rate = macro_data.get(yield_key, None)
             if rate is not None:
                 self.interest_rate_history.append(rate)
-                if len(self.interest_rate_history) > self.window_size:
-                    self.interest_rate_history.pop(0)
-            
-            # Calculate correlations if enough data points are available
-            vix_inflation_corr = np.nan
-            vix_rates_corr = np.nan
-            
-            # Need at least 3 points to calculate changes and then correlation
-            if len(self.vix_history) >= 3 and len(self.inflation_exp_history) >= 3:
-                # Calculate changes
-                vix_changes = np.diff(self.vix_history)
-                inflation_changes = np.diff(self.inflation_exp_history)
-                
-                # Ensure same length
-                min_len = min(len(vix_changes), len(inflation_changes))
-                
-                # Only calculate correlation if there's variation in both series
-                if min_len >= 2 and np.std(vix_changes[-min_len:]) > 0 and np.std(inflation_changes[-min_len:]) > 0:
-                    corr_matrix = np.corrcoef(vix_changes[-min_len:], inflation_changes[-min_len:])
-                    vix_inflation_corr = corr_matrix[0, 1]
-            
-            if len(self.vix_history) >= 3 and len(self.interest_rate_history) >= 3:
-                # Calculate changes
-                vix_changes = np.diff(self.vix_history)
-                rate_changes = np.diff(self.interest_rate_history)
-                
-                # Ensure same length
-                min_len = min(len(vix_changes), len(rate_changes))
-                
-                # Only calculate correlation if there's variation in both series
-                if min_len >= 2 and np.std(vix_changes[-min_len:]) > 0 and np.std(rate_changes[-min_len:]) > 0:
-                    corr_matrix = np.corrcoef(vix_changes[-min_len:], rate_changes[-min_len:])
-                    vix_rates_corr = corr_matrix[0, 1]
+            
+            # Changes enter the rolling statistics when both series have moved a step
+            if vix is not None and prev_vix is not None:
+                vix_change = vix - prev_vix
+                if inflation is not None and prev_inflation is not None:
+                    self.vix_inflation_stats.push(vix_change, inflation - prev_inflation)
+                if rate is not None and prev_rate is not None:
+                    self.vix_rates_stats.push(vix_change, rate - prev_rate)
+            
+            # Correlations need at least two changes with variation in both series
+            vix_inflation_corr = self.vix_inflation_stats.correlation()
+            vix_rates_corr = self.vix_rates_stats.correlation()
             
             # Update stored correlations if we got valid values
             if not np.isnan(vix_inflation_corr):
@@ -401,18 +483,20 @@ class EnhancedCloudSystem:
         """Calculate cloud metrics that detect regime changes,
         including correlations and regime indicators"""
         try:
-            from scipy.stats import entropy
-            from scipy.spatial.distance import pdist, squareform
+            fast = self.metrics_backend == 'fast'
             
             # 1. Average position delta
             delta = np.mean(np.linalg.norm(self.current_points - self.prev_points, axis=1))
             self.metrics['avg_delta'].append(delta)
             
             # 2. Cloud entropy (distribution of distances)
-            dist_matrix = squareform(pdist(self.current_points))
-            hist, _ = np.histogram(dist_matrix, bins=20, range=(0, 5))
-            hist = hist / np.sum(hist)
-            cloud_entropy = entropy(hist)
+            if fast:
+                cloud_entropy = _cloud_entropy(self.current_points[None], self.entropy_pairs)[0]
+            else:
+                dist_matrix = squareform(pdist(self.current_points))
+                hist, _ = np.histogram(dist_matrix, bins=20, range=(0, 5))
+                hist = hist / np.sum(hist)
+                cloud_entropy = entropy(hist)
             self.metrics['cloud_entropy'].append(cloud_entropy)
             
             # 3. Principal axis orientation
@@ -424,13 +508,11 @@ class EnhancedCloudSystem:
                 
             # When calculating PCA, add error handling
             try:
-                pca = PCA(n_components=3)
                 # Add a small epsilon to avoid division by zero
                 if np.allclose(np.var(data), 0):
                     # Add small random noise
-                    data += np.random.normal(0, 1e-10, size=data.shape)
-                pca.fit(data)
-                principal_axis = pca.components_[0]
+                    data += self._perturbation(data.shape)
+                principal_axis = self._principal_axis(data)
                 
                 # Calculate angle from reference axis [1,0,0]
                 ref_axis = np.array([1, 0, 0])
@@ -447,7 +529,11 @@ class EnhancedCloudSystem:
                     self.metrics['principal_axis_angle'].append(0.0)
             
             # 4. Rotational energy
-            if len(self.metrics['avg_delta']) > 1:
+            if len(self.metrics['avg_delta']) > 1 and fast:
+                angular_momentum = np.cross(self.current_points, self.current_points - self.prev_points)
+                rotational_energy = np.sum(angular_momentum**2, axis=1).mean()
+                self.metrics['rotational_energy'].append(rotational_energy)
+            elif len(self.metrics['avg_delta']) > 1:
                 rotational_energy = 0
                 for i in range(self.num_points):
                     # Calculate angular momentum-like quantity
@@ -492,13 +578,11 @@ class EnhancedCloudSystem:
                     diff_data = np.nan_to_num(diff_data, nan=0.0, posinf=0.0, neginf=0.0)
                 
                 try:
-                    recent_pca = PCA(n_components=3)
                     # Add a small epsilon to avoid division by zero
                     if np.allclose(np.var(diff_data), 0):
                         # Add small random noise
-                        diff_data += np.random.normal(0, 1e-10, size=diff_data.shape)
-                    recent_pca.fit(diff_data)
-                    flow_direction = recent_pca.components_[0]
+                        diff_data += self._perturbation(diff_data.shape)
+                    flow_direction = self._principal_axis(diff_data)
                     
                     # Project onto macro axes
                     monetary_axis = np.array([1, 0, 0])  # X axis
@@ -554,6 +638,14 @@ class EnhancedCloudSystem:
                 'vix_rates_correlation': 0
             }
     
+    def _principal_axis(self, data):
+        """First principal component of a point set with the configured backend"""
+        if self.metrics_backend == 'fast':
+            return _principal_axes(data[None])[0]
+        pca = PCA(n_components=3)
+        pca.fit(data)
+        return pca.components_[0]
+    
     def generate_signal(self, metrics, threshold_precession=0.15, threshold_instability=1.5):
         """Generate trading signal based on cloud metrics and regime"""
         try:
@@ -640,6 +732,255 @@ class EnhancedCloudSystem:
             }
             return default_metrics
     
+    def run_batch(self, macro_df, pair=None):
+        """Process a whole macro history at once.
+        
+        Equivalent to calling run_step for every row of macro_df in order: the
+        same random draws are consumed and the system ends in the same state,
+        but each stage is computed with array operations across all timestamps.
+        Missing values are forward-filled first (leading gaps take the run_step
+        defaults), since run_step would carry NaN through its histories.
+        
+        Returns a DataFrame indexed like macro_df with the run_step metrics,
+        principal_axis_angle and rotational_energy as columns.
+        """
+        try:
+            if pair is not None:
+                self.pair = pair
+            
+            n_steps = len(macro_df)
+            if n_steps == 0:
+                return pd.DataFrame(columns=self.batch_columns, index=macro_df.index)
+            
+            curr_code = self.get_currency_code()
+            is_inverted = self.is_inverted_pair()
+            force_multiplier = -1.0 if is_inverted else 1.0
+            
+            yield_2y_key = f'US-{curr_code}_2Y'
+            yield_10y_key = f'US-{curr_code}_10Y'
+            inflation_key = f'US-{curr_code}_CPI_YOY'
+            
+            yield_2y = self._batch_column(macro_df, yield_2y_key, 0)
+            yield_10y = self._batch_column(macro_df, yield_10y_key, 0)
+            inflation = self._batch_column(macro_df, inflation_key, 0)
+            vix = self._batch_column(macro_df, 'VIX', 20)
+            
+            # 1. Natural rate: the EMA recursion as a first-order filter
+            natural_rate_estimate = yield_10y - inflation/2
+            initial_rate = self.natural_rate if self.natural_rate is not None else natural_rate_estimate[0]
+            natural_rate, _ = lfilter([0.05], [1.0, -0.95], natural_rate_estimate, zi=[0.95 * initial_rate])
+            
+            # Regime after each step's natural rate update
+            lower_bound_prob = 1 / (1 + np.exp(2 * (natural_rate - self.lower_bound)))
+            lower_bound_risk = ~(lower_bound_prob < (self.psi - 1) / self.psi)
+            
+            # 2. Trailing correlations of changes
+            vix_values = vix if 'VIX' in macro_df.columns else None
+            inflation_values = inflation if inflation_key in macro_df.columns else None
+            rate_values = yield_10y if yield_10y_key in macro_df.columns else None
+            vix_inflation_corr = self._batch_correlation(
+                self.vix_history, vix_values, self.inflation_exp_history, inflation_values,
+                self.vix_inflation_corr, n_steps)
+            vix_rates_corr = self._batch_correlation(
+                self.vix_history, vix_values, self.interest_rate_history, rate_values,
+                self.vix_rates_corr, n_steps)
+            
+            # 3. Distribution of each step's fresh cloud
+            risk_factor = -1.0 * np.tanh((vix - 20) / 15.0)
+            if curr_code == "JP" and not is_inverted:
+                risk_factor *= -1.0
+            means = np.column_stack([
+                np.tanh((0.5 * (yield_2y * force_multiplier) + 0.5 * (yield_10y * force_multiplier)) / 2.0),
+                np.tanh((inflation * force_multiplier) / 3.0),
+                risk_factor
+            ])
+            
+            if self.rng is None:
+                factors = _covariance_factors(lower_bound_prob, lower_bound_risk)
+            else:
+                factors = _cholesky_factors(lower_bound_prob, lower_bound_risk)
+            
+            # 4. Rotation forces
+            risk_force_multiplier = force_multiplier
+            if curr_code == "JP" and not is_inverted:
+                risk_force_multiplier = -1.0 * force_multiplier
+            force_x = np.tanh((0.5 * yield_2y + 0.5 * yield_10y) / 2.0) * force_multiplier
+            force_y = np.tanh(inflation / 3.0) * force_multiplier
+            force_z = -1.0 * np.tanh((vix - 20) / 15.0) * risk_force_multiplier
+            
+            amplified = lower_bound_risk & (vix > 20) & (vix_inflation_corr < -0.1)
+            uncertainty_impact = np.where(amplified, 1.0 + 0.5 * np.abs(vix_inflation_corr), 1.0)
+            force_x = force_x * uncertainty_impact
+            force_y = force_y * uncertainty_impact
+            
+            # 5. Composed rotation matrices (Z * Y * X)
+            rotations_t = _rotation_transposes(force_x, force_y, force_z, self.scale)
+            
+            # 6. Draw, rotate and measure the clouds in chunks of steps
+            prior_steps = len(self.metrics['avg_delta'])
+            step_count = prior_steps + np.arange(1, n_steps + 1)
+            avg_delta = np.empty(n_steps)
+            cloud_entropy = np.empty(n_steps)
+            principal_axis_angle = np.empty(n_steps)
+            rotational_energy = np.empty(n_steps)
+            market_mood = np.empty(n_steps)
+            
+            for start in range(0, n_steps, self.batch_chunk_steps):
+                stop = min(start + self.batch_chunk_steps, n_steps)
+                normals = self._cloud_normals(stop - start) if self.rng is not None else None
+                points, rotated, cloud_noise, flow_noise = _draw_clouds(
+                    factors[start:stop], means[start:stop], rotations_t[start:stop],
+                    step_count[start:stop] > 5, self.num_points, normals, self._noise_rng)
+                (avg_delta[start:stop], cloud_entropy[start:stop], principal_axis_angle[start:stop],
+                 rotational_energy[start:stop], market_mood[start:stop]) = _cloud_metrics(
+                    points, rotated, step_count[start:stop] == 1, step_count[start:stop] > 5,
+                    cloud_noise, flow_noise, self.entropy_pairs)
+            
+            self.prev_points = points[-1].copy()
+            self.current_points = rotated[-1].copy()
+            
+            # 7. Five-step derived metrics, continuing from the stored history
+            history = min(prior_steps, 4)
+            angles = np.concatenate([self.metrics['principal_axis_angle'][prior_steps - history:], principal_axis_angle])
+            energies = np.concatenate([self.metrics['rotational_energy'][prior_steps - history:], rotational_energy])
+            deltas = np.concatenate([self.metrics['avg_delta'][prior_steps - history:], avg_delta])
+            derived = step_count > 5
+            
+            precession = np.zeros(n_steps)
+            instability = np.zeros(n_steps)
+            if derived.any():
+                angle_windows = np.lib.stride_tricks.sliding_window_view(angles, 5)
+                energy_windows = np.lib.stride_tricks.sliding_window_view(energies, 5)
+                delta_windows = np.lib.stride_tricks.sliding_window_view(deltas, 5)
+                # Windows ending at each derived step
+                rows = np.flatnonzero(derived) + history - 4
+                precession[derived], instability[derived] = _derived_metrics(
+                    angle_windows[rows], energy_windows[rows], delta_windows[rows])
+            
+            regime = np.where(lower_bound_risk, "LOWER_BOUND_RISK", "TARGET_EQUILIBRIUM").astype(object)
+            
+            # Leave the system where the step loop would have
+            window = self.window_size
+            self.natural_rate = natural_rate[-1]
+            self.natural_rate_history.extend(natural_rate[-window:])
+            self.macro_history.extend(macro_df.iloc[-window:].to_dict('records'))
+            if vix_values is not None:
+                self.vix_history.extend(vix_values[-window:])
+            if inflation_values is not None:
+                self.inflation_exp_history.extend(inflation_values[-window:])
+            if rate_values is not None:
+                self.interest_rate_history.extend(rate_values[-window:])
+            self._rebuild_correlation_stats()
+            self.vix_inflation_corr = vix_inflation_corr[-1]
+            self.vix_rates_corr = vix_rates_corr[-1]
+            
+            columns = {
+                'avg_delta': avg_delta,
+                'cloud_entropy': cloud_entropy,
+                'principal_axis_angle': principal_axis_angle,
+                'rotational_energy': rotational_energy,
+                'vix_inflation_correlation': vix_inflation_corr,
+                'vix_rates_correlation': vix_rates_corr,
+                'regime': regime,
+                'lower_bound_probability': lower_bound_prob
+            }
+            for key, values in columns.items():
+                self.metrics[key].extend(values)
+            
+            results = pd.DataFrame({
+                'precession': precession,
+                'instability': instability,
+                'market_mood': market_mood,
+                **columns
+            }, index=macro_df.index)
+            results['signal'] = self.generate_batch_signals(results)
+            return results[self.batch_columns]
+        except Exception as e:
+            print(f"Error in run_batch: {e}")
+            # Return basic metrics as fallback
+            defaults = {
+                'precession': 0,
+                'instability': 0,
+                'market_mood': 0,
+                'avg_delta': 0,
+                'cloud_entropy': 0,
+                'principal_axis_angle': 0,
+                'rotational_energy': 0,
+                'regime': "TARGET_EQUILIBRIUM",
+                'lower_bound_probability': 0.1,
+                'vix_inflation_correlation': 0,
+                'vix_rates_correlation': 0,
+                'signal': "NEUTRAL"
+            }
+            return pd.DataFrame(defaults, index=macro_df.index)[self.batch_columns]
+    
+    def generate_batch_signals(self, metrics, threshold_precession=0.15, threshold_instability=1.5):
+        """Vectorized generate_signal over a run_batch metrics frame, so
+        thresholds can be swept without recomputing the cloud"""
+        signals = _select_signals(metrics['precession'].to_numpy(), metrics['market_mood'].to_numpy(),
+                                  metrics['instability'].to_numpy(), threshold_precession, threshold_instability)
+        return pd.Series(signals, index=metrics.index)
+    
+    def _rebuild_correlation_stats(self):
+        """Reload the rolling change statistics from the value histories,
+        pairing the most recent changes of each series"""
+        vix_changes = np.diff(self.vix_history.to_array())
+        for stats, history in ((self.vix_inflation_stats, self.inflation_exp_history),
+                               (self.vix_rates_stats, self.interest_rate_history)):
+            stats.clear()
+            changes = np.diff(history.to_array())
+            min_len = min(len(vix_changes), len(changes), stats.window)
+            for x, y in zip(vix_changes[len(vix_changes) - min_len:], changes[len(changes) - min_len:]):
+                stats.push(x, y)
+    
+    def _batch_column(self, macro_df, key, default):
+        """Column of macro_df as floats, or the run_step default if absent"""
+        if key not in macro_df.columns:
+            return np.full(len(macro_df), float(default))
+        return macro_df[key].astype(float).ffill().fillna(default).to_numpy()
+    
+    def _batch_correlation(self, history_a, values_a, history_b, values_b, previous, n_steps):
+        """Correlation of changes that calculate_correlations holds after each
+        step; values are None for series the batch does not extend"""
+        steps = np.arange(1, n_steps + 1)
+        
+        def layout(history, values):
+            series = np.asarray(list(history) + (list(values) if values is not None else []), dtype=float)
+            end = len(history) + (steps if values is not None else 0) + np.zeros(n_steps, dtype=int)
+            return np.diff(series), end, np.minimum(end, self.window_size)
+        
+        changes_a, end_a, length_a = layout(history_a, values_a)
+        changes_b, end_b, length_b = layout(history_b, values_b)
+        min_len = np.minimum(length_a, length_b) - 1
+        valid = (length_a >= 3) & (length_b >= 3)
+        
+        corr = np.full(n_steps, np.nan)
+        # Group steps by window length so each group is one 2-D array
+        for size in np.unique(min_len[valid]):
+            rows = np.flatnonzero(valid & (min_len == size))
+            offsets = np.arange(size)
+            x = changes_a[(end_a[rows] - 1 - size)[:, None] + offsets]
+            y = changes_b[(end_b[rows] - 1 - size)[:, None] + offsets]
+            
+            varied = (np.std(x, axis=1) > 0) & (np.std(y, axis=1) > 0)
+            x = x[varied] - x[varied].mean(axis=1, keepdims=True)
+            y = y[varied] - y[varied].mean(axis=1, keepdims=True)
+            cov_xy = np.einsum('ij,ij->i', x, y) / (size - 1)
+            std_x = np.sqrt(np.einsum('ij,ij->i', x, x) / (size - 1))
+            std_y = np.sqrt(np.einsum('ij,ij->i', y, y) / (size - 1))
+            corr[rows[varied]] = np.clip(cov_xy / std_x / std_y, -1.0, 1.0)
+        
+        # Steps without a valid correlation keep the previous value
+        return pd.Series(corr).ffill().fillna(previous).to_numpy()
+    
+    def metrics_frame(self):
+        """Stored metrics as a DataFrame with a categorical regime column
+        
+        The columns share memory with the metrics store, so the frame must be
+        copied if it is kept while the system keeps running.
+        """
+        return self.metrics.to_frame()
+    
     def reset(self):
         """Reset the system to initial state"""
         try:
@@ -647,15 +988,16 @@ class EnhancedCloudSystem:
             self.prev_points = self.initial_points.copy()
             
             # Clear metrics
-            for key in self.metrics:
-                self.metrics[key] = []
+            self.metrics.clear()
             
             # Clear histories
-            self.vix_history = []
-            self.inflation_exp_history = []
-            self.interest_rate_history = []
-            self.natural_rate_history = []
-            self.macro_history = []
+            self.vix_history.clear()
+            self.inflation_exp_history.clear()
+            self.interest_rate_history.clear()
+            self.natural_rate_history.clear()
+            self.macro_history.clear()
+            self.vix_inflation_stats.clear()
+            self.vix_rates_stats.clear()
             
             # Reset natural rate
             self.natural_rate = 0.5
@@ -666,4 +1008,275 @@ class EnhancedCloudSystem:
         except Exception as e:
             print(f"Error resetting: {e}")
             # Reinitialize if reset fails
-            self.__init__(self.num_points, self.pair, self.window_size)
\ No newline at end of file
+            self.__init__(self.num_points, self.pair, self.window_size, self.metrics_backend,
+                          self.entropy_samples, self.metrics_capacity, self.random_state,
+                          self.cloud_block_steps)
+
+
+def _regime_covariances(lower_bound_prob, lower_bound_risk):
+    """update_cloud_distribution's covariance at each entry"""
+    covariance = np.tile(np.array([
+        [1.0, 0.1, -0.1],
+        [0.1, 1.0, -0.1],
+        [-0.1, -0.1, 1.0]
+    ]), (len(lower_bound_prob), 1, 1))
+    sensitivity = np.minimum(0.8, lower_bound_prob[lower_bound_risk] * 1.5)
+    for i, j, weight in ((0, 1, 0.3), (0, 2, -0.4), (1, 2, -0.3)):
+        covariance[lower_bound_risk, i, j] = weight * sensitivity
+        covariance[lower_bound_risk, j, i] = weight * sensitivity
+    return covariance
+
+
+def _covariance_factors(lower_bound_prob, lower_bound_risk):
+    """Factors np.random.multivariate_normal applies to standard normals for
+    update_cloud_distribution's covariance at each entry"""
+    # Same factorization as np.random.multivariate_normal
+    _, singular_values, v = np.linalg.svd(_regime_covariances(lower_bound_prob, lower_bound_risk))
+    return np.sqrt(singular_values)[:, :, None] * v
+
+
+def _cholesky_factors(lower_bound_prob, lower_bound_risk):
+    """Transposed Cholesky factors of update_cloud_distribution's covariance
+    at each entry, to multiply standard normal rows from the right"""
+    return np.swapaxes(np.linalg.cholesky(_regime_covariances(lower_bound_prob, lower_bound_risk)), 1, 2)
+
+
+def _rotation_transposes(force_x, force_y, force_z, scale):
+    """Transposed Z * Y * X rotation matrices of stacked forces, to multiply
+    point arrays from the right"""
+    zeros = np.zeros(len(force_x))
+    mat_x = R.from_rotvec(np.column_stack([force_x * scale, zeros, zeros])).as_matrix()
+    mat_y = R.from_rotvec(np.column_stack([zeros, force_y * scale, zeros])).as_matrix()
+    mat_z = R.from_rotvec(np.column_stack([zeros, zeros, force_z * scale])).as_matrix()
+    return np.swapaxes(mat_z @ mat_y @ mat_x, 1, 2)
+
+
+def _draw_clouds(factors, means, rotations_t, flow_checked, num_points, normals=None, noise_rng=None):
+    """Draw and rotate a stack of clouds from the global random stream in the
+    order a sequence of run_step calls would.
+    
+    calculate_metrics perturbs degenerate clouds with extra draws, so drawing
+    stops at such a cloud, takes its perturbations and resumes after it.
+    Given the clouds' standard normals, the clouds are built from them and the
+    perturbations are drawn from noise_rng instead.
+    Returns the drawn and rotated points and the perturbations by position.
+    """
+    n_clouds = len(factors)
+    cloud_noise, flow_noise = {}, {}
+    
+    if normals is not None:
+        points = normals @ factors + means[:, None, :]
+        rotated = points @ rotations_t
+        flat_cloud = np.abs(np.var(rotated, axis=(1, 2))) <= 1e-8
+        flat_flow = flow_checked & (np.abs(np.var(rotated - points, axis=(1, 2))) <= 1e-8)
+        for i in np.flatnonzero(flat_cloud | flat_flow):
+            if flat_cloud[i]:
+                cloud_noise[i] = noise_rng.normal(0, 1e-10, size=(num_points, 3))
+            if flat_flow[i]:
+                flow_noise[i] = noise_rng.normal(0, 1e-10, size=(num_points, 3))
+        return points, rotated, cloud_noise, flow_noise
+    
+    points = np.empty((n_clouds, num_points, 3))
+    rotated = np.empty((n_clouds, num_points, 3))
+    
+    start, span = 0, n_clouds
+    while start < n_clouds:
+        stop = min(start + span, n_clouds)
+        rng_state = np.random.get_state()
+        draws = np.random.standard_normal((stop - start, num_points, 3))
+        block = draws @ factors[start:stop] + means[start:stop, None, :]
+        block_rotated = block @ rotations_t[start:stop]
+        
+        flat_cloud = np.abs(np.var(block_rotated, axis=(1, 2))) <= 1e-8
+        flat_flow = flow_checked[start:stop] & (np.abs(np.var(block_rotated - block, axis=(1, 2))) <= 1e-8)
+        flagged = np.flatnonzero(flat_cloud | flat_flow)
+        if len(flagged):
+            first = flagged[0]
+            stop = start + first + 1
+            np.random.set_state(rng_state)
+            np.random.standard_normal((first + 1, num_points, 3))
+            if flat_cloud[first]:
+                cloud_noise[first + start] = np.random.normal(0, 1e-10, size=(num_points, 3))
+            if flat_flow[first]:
+                flow_noise[first + start] = np.random.normal(0, 1e-10, size=(num_points, 3))
+            # Degenerate clouds tend to come in runs; redraw in small spans
+            span = 1
+        else:
+            span *= 2
+        
+        points[start:stop] = block[:stop - start]
+        rotated[start:stop] = block_rotated[:stop - start]
+        start = stop
+    
+    return points, rotated, cloud_noise, flow_noise
+
+
+def _cloud_metrics(points, rotated, first_step, flowing, cloud_noise, flow_noise, entropy_pairs=None):
+    """calculate_metrics for a stack of clouds drawn by _draw_clouds
+    
+    first_step marks clouds with no previous step (zero rotational energy) and
+    flowing those with enough history for a market mood. Returns arrays of
+    avg_delta, cloud_entropy, principal_axis_angle, rotational_energy and
+    market_mood.
+    """
+    flow = rotated - points
+    avg_delta = np.linalg.norm(flow, axis=2).mean(axis=1)
+    cloud_entropy = _cloud_entropy(rotated, entropy_pairs)
+    
+    cloud = rotated
+    if cloud_noise:
+        cloud = rotated.copy()
+        for i, noise in cloud_noise.items():
+            cloud[i] += noise
+    principal_axis = _principal_axes(cloud)
+    cos_angle = principal_axis[:, 0] / np.linalg.norm(principal_axis, axis=1)
+    principal_axis_angle = np.arccos(np.clip(cos_angle, -1.0, 1.0))
+    
+    angular_momentum = np.cross(rotated, flow)
+    rotational_energy = np.sum(angular_momentum**2, axis=2).mean(axis=1)
+    rotational_energy[first_step] = 0
+    
+    market_mood = np.zeros(len(points))
+    rows = np.flatnonzero(flowing)
+    if len(rows):
+        flow_data = flow[rows]
+        for i, noise in flow_noise.items():
+            flow_data[np.searchsorted(rows, i)] += noise
+        flow_direction = _principal_axes(flow_data)
+        market_mood[rows] = flow_direction[:, 0] * 0.4 + flow_direction[:, 1] * 0.3 + flow_direction[:, 2] * 0.3
+    
+    return avg_delta, cloud_entropy, principal_axis_angle, rotational_energy, market_mood
+
+
+def compare_metric_backends(macro_df=None, pair="USDJPY", n_steps=250, entropy_samples=None, num_points=300,
+                            nan_every=None):
+    """Check that the fast metrics backend agrees with the sklearn one.
+    
+    Runs run_step over the same macro rows with both backends from the same
+    random state (synthetic random-walk macro data if macro_df is None).
+    With nan_every, VIX is missing in every nan_every-th row, which leaves
+    points with NaN coordinates in the cloud.
+    Returns a DataFrame with the largest absolute difference of each metric
+    and, for signals and regimes, the fraction of steps that differ.
+    """
+    if macro_df is None:
+        rng = np.random.default_rng(1)
+        code = EnhancedCloudSystem(num_points=num_points, pair=pair).get_currency_code()
+        walk = lambda start, step: start + np.cumsum(rng.normal(0, step, n_steps))
+        macro_df = pd.DataFrame({
+            f'US-{code}_2Y': walk(0.5, 0.05),
+            f'US-{code}_10Y': walk(-0.2, 0.05),
+            f'US-{code}_CPI_YOY': walk(0.3, 0.05),
+            'VIX': np.abs(walk(20, 0.8))
+        })
+    if nan_every:
+        macro_df = macro_df.copy()
+        macro_df.loc[macro_df.index[::nan_every], 'VIX'] = np.nan
+    rows = macro_df.to_dict('records')
+    
+    rng_state = np.random.get_state()
+    results = {}
+    for backend in ('sklearn', 'fast'):
+        system = EnhancedCloudSystem(num_points=num_points, pair=pair, metrics_backend=backend,
+                                     entropy_samples=entropy_samples if backend == 'fast' else None)
+        steps = pd.DataFrame([system.run_step(row, pair) for row in rows])
+        stored = system.metrics_frame()
+        steps['principal_axis_angle'] = stored['principal_axis_angle'].to_numpy()
+        steps['rotational_energy'] = stored['rotational_energy'].to_numpy()
+        results[backend] = steps
+    np.random.set_state(rng_state)
+    
+    reference, fast = results['sklearn'], results['fast']
+    agreement = {}
+    for column in reference.columns:
+        if not pd.api.types.is_numeric_dtype(reference[column]):
+            agreement[column] = {'max_abs_diff': np.nan,
+                                 'mismatch_rate': float((reference[column] != fast[column]).mean())}
+        else:
+            diff = np.abs(reference[column].astype(float) - fast[column].astype(float))
+            agreement[column] = {'max_abs_diff': float(diff.max()), 'mismatch_rate': np.nan}
+    return pd.DataFrame(agreement).T
+
+
+def _sample_point_pairs(num_points, n_samples):
+    """Fixed random sample of distinct point pairs, or None for all pairs"""
+    n_pairs = num_points * (num_points - 1) // 2
+    if n_samples is None or n_samples >= n_pairs:
+        return None
+    rows, cols = np.triu_indices(num_points, k=1)
+    chosen = np.random.default_rng(0).choice(n_pairs, size=n_samples, replace=False)
+    return rows[chosen], cols[chosen]
+
+
+def _cloud_entropy(clouds, pairs=None):
+    """Entropy of the pairwise distance histogram of each cloud in a stack,
+    as calculate_metrics computes it from the full distance matrix.
+    
+    With pairs (row and column indices of sampled point pairs) the pair
+    histogram is estimated from those distances only.
+    """
+    num_points = clouds.shape[1]
+    n_pairs = num_points * (num_points - 1) // 2
+    counts = np.empty((len(clouds), 20), dtype=float)
+    for i, cloud in enumerate(clouds):
+        # 20 bins of width 0.25 over [0, 5]; distances of exactly 5 fall
+        # in the last bin, larger ones in an overflow bin that is dropped
+        if pairs is None:
+            scaled = pdist(cloud)
+        else:
+            diff = cloud[pairs[0]] - cloud[pairs[1]]
+            scaled = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+        # Distances from points with missing coordinates are left out, as
+        # np.histogram does
+        scaled = scaled[np.isfinite(scaled)] * 4.0
+        on_edge = np.count_nonzero(scaled == 20.0)
+        np.minimum(scaled, 20.0, out=scaled)
+        binned = np.bincount(scaled.astype(np.intp), minlength=21)
+        counts[i] = binned[:20]
+        counts[i, 19] += on_edge
+    
+    # The full matrix counts each pair twice plus the zero diagonal
+    if pairs is not None:
+        counts *= n_pairs / len(pairs[0])
+    counts *= 2
+    counts[:, 0] += num_points
+    hist = counts / counts.sum(axis=1, keepdims=True)
+    hist = hist / hist.sum(axis=1, keepdims=True)
+    return entr(hist).sum(axis=1)
+
+
+def _principal_axes(clouds):
+    """First principal component of each cloud in a stack, with the sign
+    convention of sklearn's PCA (largest component positive)"""
+    n_samples = clouds.shape[1]
+    mean = clouds.mean(axis=1)
+    covariance = np.swapaxes(clouds, 1, 2) @ clouds
+    covariance -= n_samples * mean[:, :, None] * mean[:, None, :]
+    covariance /= n_samples - 1
+    _, vectors = np.linalg.eigh(covariance)
+    
+    axis = vectors[:, :, -1]
+    largest = np.argmax(np.abs(axis), axis=1)
+    return axis * np.sign(axis[np.arange(len(axis)), largest])[:, None]
+
+
+def _derived_metrics(angle_windows, energy_windows, delta_windows):
+    """Precession and instability from rows of the last five angles,
+    rotational energies and average deltas"""
+    precession = np.gradient(angle_windows, axis=1).mean(axis=1)
+    instability = energy_windows.mean(axis=1) / (delta_windows.mean(axis=1) + 1e-6)
+    return precession, instability
+
+
+def _select_signals(precession, market_mood, instability, threshold_precession=0.15, threshold_instability=1.5):
+    """generate_signal's rules over arrays of metrics"""
+    strong = instability > threshold_instability
+    active = (precession != 0) & (np.abs(precession) > threshold_precession)
+    conditions = [
+        active & (market_mood > 0.05) & strong,
+        active & (market_mood > 0.05),
+        active & (market_mood < -0.05) & strong,
+        active & (market_mood < -0.05)
+    ]
+    choices = ["STRONG_BUY", "BUY", "STRONG_SELL", "SELL"]
+    return np.select(conditions, choices, default="NEUTRAL")
@@ -0,0 +1,232 @@
+"""
+Metrics Store - Columnar per-step metric storage
+
+Each metric is a typed NumPy column instead of a list of boxed values.
+Columns grow by doubling, or keep a fixed number of recent rows in ring
+mode. Ring columns write every value twice (at its slot and one capacity
+later) so the retained rows are always one contiguous slice, and to_frame()
+can wrap the columns without copying them. Categorical metrics such as the
+regime are stored as int8 codes.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class MetricColumn:
+    """
+    Typed column of per-step values with a list-like interface
+
+    Parameters:
+    -----------
+    dtype : numpy dtype
+        Value type for numeric columns (default: float64)
+    categories : list, optional
+        Allowed values of a categorical column, stored as int8 codes
+    shape : tuple
+        Shape of each value, e.g. (n_pairs,) for one value per pair (default: scalar)
+    capacity : int, optional
+        Keep only the most recent capacity values (default: grow without limit)
+    """
+
+    def __init__(self, dtype=np.float64, categories: Optional[Sequence[str]] = None,
+                 shape: Tuple[int, ...] = (), capacity: Optional[int] = None):
+        self.categories = list(categories) if categories is not None else None
+        self._codes = {c: i for i, c in enumerate(self.categories or [])}
+        self.dtype = np.dtype(np.int8 if self.categories is not None else dtype)
+        self.shape = tuple(shape)
+        self.capacity = capacity
+        self._size = 0
+        self._write = 0
+        allocated = 2 * capacity if capacity is not None else 256
+        self._data = np.empty((allocated,) + self.shape, dtype=self.dtype)
+
+    def _encode(self, values: Any) -> np.ndarray:
+        """Convert values to stored form (category codes for categoricals)"""
+        if self.categories is None:
+            return np.asarray(values, dtype=self.dtype)
+        if isinstance(values, str):
+            if values not in self._codes:
+                raise ValueError(f"Value {values!r} outside categories {self.categories}")
+            return np.asarray(self._codes[values], dtype=self.dtype)
+        values = np.asarray(values, dtype=object)
+        codes = np.full(values.shape, -1, dtype=self.dtype)
+        for code, category in enumerate(self.categories):
+            codes[values == category] = code
+        if (codes < 0).any():
+            raise ValueError(f"Values outside categories {self.categories}")
+        return codes
+
+    def append(self, value: Any) -> None:
+        """Add one value"""
+        value = self._encode(value)
+        if self.capacity is None:
+            if self._size == len(self._data):
+                grown = np.empty((2 * len(self._data),) + self.shape, dtype=self.dtype)
+                grown[:self._size] = self._data[:self._size]
+                self._data = grown
+            self._data[self._size] = value
+            self._size += 1
+        else:
+            self._data[self._write] = value
+            self._data[self._write + self.capacity] = value
+            self._write = (self._write + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def extend(self, values: Iterable[Any]) -> None:
+        """Add several values in order"""
+        values = self._encode(values if isinstance(values, np.ndarray) else list(values))
+        n = len(values)
+        if n == 0:
+            return
+        if self.capacity is None:
+            if self._size + n > len(self._data):
+                allocated = len(self._data)
+                while allocated < self._size + n:
+                    allocated *= 2
+                grown = np.empty((allocated,) + self.shape, dtype=self.dtype)
+                grown[:self._size] = self._data[:self._size]
+                self._data = grown
+            self._data[self._size:self._size + n] = values
+            self._size += n
+        else:
+            if n > self.capacity:
+                # Only the last capacity values are kept
+                self._write = (self._write + n - self.capacity) % self.capacity
+                values = values[-self.capacity:]
+                n = self.capacity
+            slots = (self._write + np.arange(n)) % self.capacity
+            self._data[slots] = values
+            self._data[slots + self.capacity] = values
+            self._write = (self._write + n) % self.capacity
+            self._size = min(self._size + n, self.capacity)
+
+    def values(self) -> np.ndarray:
+        """View of the stored values, oldest first (codes for categoricals)"""
+        if self.capacity is None:
+            return self._data[:self._size]
+        end = self._write + self.capacity
+        return self._data[end - self._size:end]
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Category values of stored codes"""
+        return np.asarray(self.categories, dtype=object)[codes]
+
+    def to_series(self, index: Optional[pd.Index] = None, name: Optional[str] = None,
+                  column: Optional[int] = None) -> pd.Series:
+        """Values as a Series that shares the stored memory
+
+        Args:
+            index: Index for the series (default: range)
+            name: Series name
+            column: Element of each value to select, for non-scalar columns
+        """
+        values = self.values()
+        if column is not None:
+            values = values[:, column]
+        if self.categories is not None:
+            values = pd.Categorical.from_codes(values, categories=self.categories)
+        return pd.Series(values, index=index, name=name, copy=False)
+
+    def clear(self) -> None:
+        """Remove all values"""
+        self._size = 0
+        self._write = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+    def tolist(self) -> List[Any]:
+        values = self.values()
+        return (self.decode(values) if self.categories is not None else values).tolist()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, key):
+        values = self.values()[key]
+        if self.categories is None:
+            return values
+        return self.decode(values)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.tolist())
+
+    def __repr__(self) -> str:
+        return f"MetricColumn(len={self._size}, dtype={self.dtype}, capacity={self.capacity})"
+
+
+class MetricsStore:
+    """
+    Set of metric columns with a shared layout
+
+    Parameters:
+    -----------
+    numeric : list
+        Names of float columns
+    categorical : dict, optional
+        Categories of each categorical column by name
+    shape : tuple
+        Shape of each value, e.g. (n_pairs,) (default: scalar)
+    capacity : int, optional
+        Keep only the most recent capacity rows (default: grow without limit)
+    """
+
+    def __init__(self, numeric: Sequence[str], categorical: Optional[Dict[str, Sequence[str]]] = None,
+                 shape: Tuple[int, ...] = (), capacity: Optional[int] = None):
+        self.capacity = capacity
+        self.shape = tuple(shape)
+        self._columns: Dict[str, MetricColumn] = {}
+        for name in numeric:
+            self._columns[name] = MetricColumn(shape=shape, capacity=capacity)
+        for name, categories in (categorical or {}).items():
+            self._columns[name] = MetricColumn(categories=categories, shape=shape, capacity=capacity)
+
+    def __getitem__(self, name: str) -> MetricColumn:
+        return self._columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._columns
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    def keys(self):
+        return self._columns.keys()
+
+    def items(self):
+        return self._columns.items()
+
+    def append(self, values: Dict[str, Any]) -> None:
+        """Add one row given as a dictionary of column values"""
+        for name, value in values.items():
+            self._columns[name].append(value)
+
+    def clear(self) -> None:
+        """Remove all rows"""
+        for column in self._columns.values():
+            column.clear()
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self._columns.values())
+
+    def to_frame(self, index: Optional[pd.Index] = None, column: Optional[int] = None) -> pd.DataFrame:
+        """Columns as a DataFrame that shares the stored memory
+
+        The frame is only valid until the next append; copy it to keep it.
+
+        Args:
+            index: Index for the rows (default: range)
+            column: Element of each value to select, for non-scalar stores
+        """
+        return pd.DataFrame(
+            {name: col.to_series(index=index, column=column) for name, col in self._columns.items()},
+            copy=False
+        )
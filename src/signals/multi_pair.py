@@ -0,0 +1,297 @@
+"""
+Multi-Pair Cloud System - Evolves the clouds of several currency pairs together
+
+The point clouds of all pairs are held in one (pairs, points, 3) array. Each
+macro update computes every pair's natural rate, regime, distribution and
+rotation forces as arrays over pairs, draws all fresh clouds in one call,
+applies the rotations as a batched matrix product and measures the clouds
+together. Advancing the pairs this way gives the same results as stepping one
+EnhancedCloudSystem per pair, in pair order, on every update.
+
+With random_state set, the clouds are drawn from one per-instance Generator
+through cached Cholesky factors, as in EnhancedCloudSystem's Generator mode.
+The pairs share that stream in pair order, so a single pair matches an
+EnhancedCloudSystem with the same random_state.
+"""
+
+from collections import deque
+
+import numpy as np
+
+from .cloud_system import (
+    EnhancedCloudSystem, _covariance_factors, _rotation_transposes, _draw_clouds,
+    _cloud_metrics, _derived_metrics, _select_signals
+)
+from .metrics_store import MetricsStore
+from .streaming import RingBuffer, RollingCovariance
+
+
+class MultiPairCloudSystem:
+    """
+    Cloud system for several currency pairs driven by the same macro data
+
+    Parameters:
+    -----------
+    pairs : list, optional
+        Currency pairs to evolve (default: all pairs with indicator codes)
+    num_points : int
+        Points per pair cloud (default: 300)
+    window_size : int
+        Window for trailing computations (default: 60)
+    metrics_capacity : int, optional
+        Keep the metrics of only the most recent steps (default: all steps)
+    random_state : int or numpy.random.SeedSequence, optional
+        Seed of a per-instance random stream (default: global legacy stream)
+    cloud_block_steps : int
+        Steps of cloud normals drawn at a time with random_state (default: 1)
+    """
+
+    # Random stream handling is shared with the single-pair system
+    _init_random_streams = EnhancedCloudSystem._init_random_streams
+    _cloud_normals = EnhancedCloudSystem._cloud_normals
+    _cloud_factor = EnhancedCloudSystem._cloud_factor
+
+    def __init__(self, pairs=None, num_points=300, window_size=60, metrics_capacity=None,
+                 random_state=None, cloud_block_steps=1):
+        # A single-pair system provides the model parameters and the initial
+        # cloud, drawn the same way for every pair
+        template = EnhancedCloudSystem(num_points=num_points, window_size=window_size,
+                                       metrics_capacity=metrics_capacity, random_state=random_state)
+        self.pair_to_codes = dict(template.pair_to_codes)
+        self.pairs = list(pairs) if pairs is not None else list(self.pair_to_codes)
+        self.num_points = num_points
+        self.window_size = window_size
+        self.metrics_capacity = metrics_capacity
+        self.scale = template.scale
+        self.psi = template.psi
+        self.lower_bound = template.lower_bound
+        self.initial_natural_rate = template.natural_rate
+        self.initial_points = template.initial_points.copy()
+
+        n_pairs = len(self.pairs)
+
+        # Each step draws the clouds of all pairs from the cloud stream
+        self.random_state = random_state
+        self.cloud_block_steps = max(1, int(cloud_block_steps))
+        self._init_random_streams((n_pairs, num_points, 3))
+        self.codes = [self.pair_to_codes.get(pair, "JP") for pair in self.pairs]
+        is_inverted = np.array([pair in ["AUDUSD", "EURUSD", "GBPUSD"] for pair in self.pairs])
+        safe_haven = np.array([code == "JP" for code in self.codes]) & ~is_inverted
+        self.force_multiplier = np.where(is_inverted, -1.0, 1.0)
+        self.risk_force_multiplier = np.where(safe_haven, -1.0 * self.force_multiplier, self.force_multiplier)
+        self.risk_factor_sign = np.where(safe_haven, -1.0, 1.0)
+
+        self.yield_2y_keys = [f'US-{code}_2Y' for code in self.codes]
+        self.yield_10y_keys = [f'US-{code}_10Y' for code in self.codes]
+        self.inflation_keys = [f'US-{code}_CPI_YOY' for code in self.codes]
+
+        self.natural_rate = np.full(n_pairs, self.initial_natural_rate)
+        self.natural_rate_history = deque(maxlen=window_size)
+        self.vix_history = RingBuffer(window_size)
+        self.inflation_exp_history = [RingBuffer(window_size) for _ in self.pairs]
+        self.interest_rate_history = [RingBuffer(window_size) for _ in self.pairs]
+        self.vix_inflation_stats = [RollingCovariance(max(1, window_size - 1)) for _ in self.pairs]
+        self.vix_rates_stats = [RollingCovariance(max(1, window_size - 1)) for _ in self.pairs]
+        self.vix_inflation_corr = np.zeros(n_pairs)
+        self.vix_rates_corr = np.zeros(n_pairs)
+
+        self.current_points = np.tile(self.initial_points, (n_pairs, 1, 1))
+        self.prev_points = self.current_points.copy()
+
+        # Metrics storage: one row of values over pairs per step
+        self.metrics = MetricsStore(template.metric_columns, {'regime': template.regimes},
+                                    shape=(n_pairs,), capacity=metrics_capacity)
+
+    def _pair_values(self, macro_data, keys, default):
+        """Values of a per-pair indicator as an array over pairs"""
+        return np.array([macro_data.get(key, default) for key in keys], dtype=float)
+
+    def estimate_natural_rate(self, macro_data):
+        """Update every pair's natural rate estimate"""
+        yield_10y = self._pair_values(macro_data, self.yield_10y_keys, 0)
+        inflation = self._pair_values(macro_data, self.inflation_keys, 0)
+        self.natural_rate = 0.95 * self.natural_rate + 0.05 * (yield_10y - inflation/2)
+        self.natural_rate_history.append(self.natural_rate)
+        return self.natural_rate
+
+    def calculate_lower_bound_probability(self):
+        """Probability of the lower bound binding for every pair"""
+        if not self.natural_rate_history:
+            return np.full(len(self.pairs), 0.1)
+        return 1 / (1 + np.exp(2 * (self.natural_rate - self.lower_bound)))
+
+    def detect_market_regime(self):
+        """Whether each pair is in the lower bound risk regime"""
+        return ~(self.calculate_lower_bound_probability() < (self.psi - 1) / self.psi)
+
+    def calculate_correlations(self, macro_data):
+        """Update trailing VIX correlations of every pair"""
+        vix = macro_data.get('VIX', None)
+        prev_vix = self.vix_history.last()
+        if vix is not None:
+            self.vix_history.append(vix)
+
+        for i in range(len(self.pairs)):
+            for key, history, stats, corr in (
+                    (self.inflation_keys[i], self.inflation_exp_history[i],
+                     self.vix_inflation_stats[i], self.vix_inflation_corr),
+                    (self.yield_10y_keys[i], self.interest_rate_history[i],
+                     self.vix_rates_stats[i], self.vix_rates_corr)):
+                value = macro_data.get(key, None)
+                prev_value = history.last()
+                if value is not None:
+                    history.append(value)
+                if vix is not None and prev_vix is not None and value is not None and prev_value is not None:
+                    stats.push(vix - prev_vix, value - prev_value)
+
+                # Keep the previous correlation until a valid one is available
+                value_corr = stats.correlation()
+                if not np.isnan(value_corr):
+                    corr[i] = value_corr
+
+        return self.vix_inflation_corr, self.vix_rates_corr
+
+    def map_macro_to_forces(self, macro_data, lower_bound_risk):
+        """Rotation forces of every pair as arrays over pairs"""
+        yield_2y = self._pair_values(macro_data, self.yield_2y_keys, 0)
+        yield_10y = self._pair_values(macro_data, self.yield_10y_keys, 0)
+        inflation = self._pair_values(macro_data, self.inflation_keys, 0)
+        vix = macro_data.get('VIX', 20)
+
+        force_x = np.tanh((0.5 * yield_2y + 0.5 * yield_10y) / 2.0) * self.force_multiplier
+        force_y = np.tanh(inflation / 3.0) * self.force_multiplier
+        force_z = -1.0 * np.tanh((vix - 20) / 15.0) * self.risk_force_multiplier
+
+        # Uncertainty has a stronger effect in the lower bound regime
+        amplified = lower_bound_risk & (vix > 20) & (self.vix_inflation_corr < -0.1)
+        uncertainty_impact = np.where(amplified, 1.0 + 0.5 * np.abs(self.vix_inflation_corr), 1.0)
+        return force_x * uncertainty_impact, force_y * uncertainty_impact, force_z
+
+    def run_step(self, macro_data):
+        """Advance every pair with one macro update
+
+        Returns a dictionary of run_step metrics (with signal) by pair.
+        """
+        try:
+            # 1. Natural rates and 2. correlations
+            self.estimate_natural_rate(macro_data)
+            self.calculate_correlations(macro_data)
+
+            lower_bound_prob = self.calculate_lower_bound_probability()
+            lower_bound_risk = self.detect_market_regime()
+
+            # 3. Distributions of the fresh clouds
+            yield_2y = self._pair_values(macro_data, self.yield_2y_keys, 0) * self.force_multiplier
+            yield_10y = self._pair_values(macro_data, self.yield_10y_keys, 0) * self.force_multiplier
+            inflation = self._pair_values(macro_data, self.inflation_keys, 0) * self.force_multiplier
+            vix = macro_data.get('VIX', 20)
+            means = np.column_stack([
+                np.tanh((0.5 * yield_2y + 0.5 * yield_10y) / 2.0),
+                np.tanh(inflation / 3.0),
+                -1.0 * np.tanh((vix - 20) / 15.0) * self.risk_factor_sign
+            ])
+            regime = np.where(lower_bound_risk, "LOWER_BOUND_RISK", "TARGET_EQUILIBRIUM")
+            if self.rng is None:
+                factors = _covariance_factors(lower_bound_prob, lower_bound_risk)
+                normals = None
+            else:
+                factors = np.stack([self._cloud_factor(pair_regime, pair_prob)
+                                    for pair_regime, pair_prob in zip(regime, lower_bound_prob)])
+                normals = self._cloud_normals(1)[0]
+
+            # 4. Forces and 5. rotations for all pairs at once
+            force_x, force_y, force_z = self.map_macro_to_forces(macro_data, lower_bound_risk)
+            rotations_t = _rotation_transposes(force_x, force_y, force_z, self.scale)
+
+            step = len(self.metrics['avg_delta']) + 1
+            n_pairs = len(self.pairs)
+            flowing = np.full(n_pairs, step > 5)
+            self.prev_points, self.current_points, cloud_noise, flow_noise = _draw_clouds(
+                factors, means, rotations_t, flowing, self.num_points, normals, self._noise_rng)
+
+            # 6. Metrics
+            avg_delta, cloud_entropy, principal_axis_angle, rotational_energy, market_mood = _cloud_metrics(
+                self.prev_points, self.current_points, np.full(n_pairs, step == 1), flowing,
+                cloud_noise, flow_noise)
+
+            step_metrics = {
+                'avg_delta': avg_delta,
+                'cloud_entropy': cloud_entropy,
+                'principal_axis_angle': principal_axis_angle,
+                'rotational_energy': rotational_energy,
+                'vix_inflation_correlation': self.vix_inflation_corr.copy(),
+                'vix_rates_correlation': self.vix_rates_corr.copy(),
+                'regime': regime,
+                'lower_bound_probability': lower_bound_prob
+            }
+            self.metrics.append(step_metrics)
+
+            if step > 5:
+                precession, instability = _derived_metrics(
+                    self.metrics['principal_axis_angle'][-5:].T,
+                    self.metrics['rotational_energy'][-5:].T,
+                    self.metrics['avg_delta'][-5:].T)
+            else:
+                precession = instability = np.zeros(n_pairs)
+
+            # 7. Signals
+            signals = _select_signals(precession, market_mood, instability)
+
+            return {
+                pair: {
+                    'precession': precession[i],
+                    'instability': instability[i],
+                    'market_mood': market_mood[i],
+                    'avg_delta': avg_delta[i],
+                    'cloud_entropy': cloud_entropy[i],
+                    'regime': str(regime[i]),
+                    'lower_bound_probability': lower_bound_prob[i],
+                    'vix_inflation_correlation': self.vix_inflation_corr[i],
+                    'vix_rates_correlation': self.vix_rates_corr[i],
+                    'signal': str(signals[i])
+                }
+                for i, pair in enumerate(self.pairs)
+            }
+        except Exception as e:
+            print(f"Error in multi-pair run_step: {e}")
+            # Return basic metrics for every pair as fallback
+            return {
+                pair: {
+                    'precession': 0,
+                    'instability': 0,
+                    'market_mood': 0,
+                    'avg_delta': 0,
+                    'cloud_entropy': 0,
+                    'regime': "TARGET_EQUILIBRIUM",
+                    'lower_bound_probability': 0.1,
+                    'vix_inflation_correlation': 0,
+                    'vix_rates_correlation': 0,
+                    'signal': "NEUTRAL"
+                }
+                for pair in self.pairs
+            }
+
+    def get_pair_metrics(self, pair):
+        """Metric history of one pair as a dictionary of lists"""
+        i = self.pairs.index(pair)
+        return {key: column[:, i].tolist() for key, column in self.metrics.items()}
+
+    def metrics_frame(self, pair):
+        """Metric history of one pair as a DataFrame sharing the stored memory"""
+        return self.metrics.to_frame(column=self.pairs.index(pair))
+
+    def reset(self):
+        """Reset every pair to the initial state"""
+        self.current_points = np.tile(self.initial_points, (len(self.pairs), 1, 1))
+        self.prev_points = self.current_points.copy()
+        self.metrics.clear()
+
+        self.natural_rate = np.full(len(self.pairs), self.initial_natural_rate)
+        self.natural_rate_history.clear()
+        self.vix_history.clear()
+        for buffers in (self.inflation_exp_history, self.interest_rate_history,
+                        self.vix_inflation_stats, self.vix_rates_stats):
+            for buffer in buffers:
+                buffer.clear()
+        self.vix_inflation_corr = np.zeros(len(self.pairs))
+        self.vix_rates_corr = np.zeros(len(self.pairs))
@@ -0,0 +1,233 @@
+"""
+Streaming Statistics - Fixed-window rolling statistics with O(1) updates
+
+RingBuffer keeps the last N values in a preallocated array. RollingCovariance
+keeps means, variances and the covariance of paired values over the last N
+pairs, adding the new pair and removing the evicted one on every push instead
+of recomputing over the window. Accumulated rounding is bounded by
+recomputing the moments from the buffers once per window of pushes.
+"""
+
+from typing import Iterator, Iterable, Optional
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Preallocated fixed-capacity buffer of floats
+
+    Parameters:
+    -----------
+    capacity : int
+        Number of values kept; appending to a full buffer evicts the oldest
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1, got {capacity}")
+        self.capacity = capacity
+        self._data = np.empty(capacity, dtype=float)
+        self._start = 0
+        self._size = 0
+
+    def append(self, value: float) -> Optional[float]:
+        """Add a value
+
+        Returns:
+            The evicted value if the buffer was full, otherwise None
+        """
+        evicted = None
+        if self._size == self.capacity:
+            evicted = float(self._data[self._start])
+            self._data[self._start] = value
+            self._start = (self._start + 1) % self.capacity
+        else:
+            self._data[(self._start + self._size) % self.capacity] = value
+            self._size += 1
+        return evicted
+
+    def extend(self, values: Iterable[float]) -> None:
+        """Add values in order"""
+        for value in values:
+            self.append(value)
+
+    def last(self) -> Optional[float]:
+        """Most recent value, or None if empty"""
+        if self._size == 0:
+            return None
+        return float(self._data[(self._start + self._size - 1) % self.capacity])
+
+    def to_array(self) -> np.ndarray:
+        """Copy of the values, oldest first"""
+        end = self._start + self._size
+        if end <= self.capacity:
+            return self._data[self._start:end].copy()
+        return np.concatenate([self._data[self._start:], self._data[:end - self.capacity]])
+
+    def clear(self) -> None:
+        """Remove all values"""
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self.to_array().tolist())
+
+    def __getitem__(self, index: int) -> float:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("RingBuffer index out of range")
+        return float(self._data[(self._start + index) % self.capacity])
+
+    def __repr__(self) -> str:
+        return f"RingBuffer(capacity={self.capacity}, values={self.to_array().tolist()})"
+
+
+class RollingCovariance:
+    """
+    Rolling means, variances, covariance and correlation of paired values
+
+    Pairs containing NaN are held in the window but excluded from the
+    moments; while one is in the window the correlation is undefined.
+
+    Parameters:
+    -----------
+    window : int
+        Number of most recent pairs the statistics cover
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._x = RingBuffer(window)
+        self._y = RingBuffer(window)
+        self._reset_moments()
+        self._nan_count = 0
+        # Adjacent unequal values in each window; zero means the series is
+        # exactly constant, which rounding in the moments cannot show
+        self._changes_x = 0
+        self._changes_y = 0
+        self._pushes_since_sync = 0
+
+    def _reset_moments(self) -> None:
+        self._n = 0
+        self._mean_x = 0.0
+        self._mean_y = 0.0
+        self._m2_x = 0.0
+        self._m2_y = 0.0
+        self._c_xy = 0.0
+
+    def push(self, x: float, y: float) -> None:
+        """Add a pair, evicting the oldest one when the window is full"""
+        x, y = float(x), float(y)
+        if len(self._x) == self.window:
+            old_x, old_y = self._x[0], self._y[0]
+            if len(self._x) > 1:
+                self._changes_x -= self._x[1] != old_x
+                self._changes_y -= self._y[1] != old_y
+            if np.isnan(old_x) or np.isnan(old_y):
+                self._nan_count -= 1
+            else:
+                self._remove(old_x, old_y)
+
+        if len(self._x) > 0:
+            self._changes_x += self._x.last() != x
+            self._changes_y += self._y.last() != y
+        self._x.append(x)
+        self._y.append(y)
+        if np.isnan(x) or np.isnan(y):
+            self._nan_count += 1
+        else:
+            self._add(x, y)
+
+        self._pushes_since_sync += 1
+        if self._pushes_since_sync >= self.window:
+            self._sync()
+
+    def _add(self, x: float, y: float) -> None:
+        self._n += 1
+        dx = x - self._mean_x
+        self._mean_x += dx / self._n
+        dy = y - self._mean_y
+        self._mean_y += dy / self._n
+        self._m2_x += dx * (x - self._mean_x)
+        self._m2_y += dy * (y - self._mean_y)
+        self._c_xy += dx * (y - self._mean_y)
+
+    def _remove(self, x: float, y: float) -> None:
+        self._n -= 1
+        if self._n == 0:
+            self._reset_moments()
+            return
+        dx = x - self._mean_x
+        self._mean_x -= dx / self._n
+        dy = y - self._mean_y
+        self._mean_y -= dy / self._n
+        self._m2_x -= dx * (x - self._mean_x)
+        self._m2_y -= dy * (y - self._mean_y)
+        self._c_xy -= dx * (y - self._mean_y)
+
+    def _sync(self) -> None:
+        """Recompute the moments from the window to drop accumulated rounding"""
+        x, y = self._x.to_array(), self._y.to_array()
+        finite = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[finite], y[finite]
+        self._reset_moments()
+        self._n = len(x)
+        if self._n:
+            self._mean_x = float(x.mean())
+            self._mean_y = float(y.mean())
+            dx, dy = x - self._mean_x, y - self._mean_y
+            self._m2_x = float(dx @ dx)
+            self._m2_y = float(dy @ dy)
+            self._c_xy = float(dx @ dy)
+        self._pushes_since_sync = 0
+
+    def __len__(self) -> int:
+        return len(self._x)
+
+    @property
+    def mean_x(self) -> float:
+        return self._mean_x if self._n else np.nan
+
+    @property
+    def mean_y(self) -> float:
+        return self._mean_y if self._n else np.nan
+
+    def variance_x(self, ddof: int = 1) -> float:
+        """Variance of x over the window"""
+        return self._m2_x / (self._n - ddof) if self._n > ddof else np.nan
+
+    def variance_y(self, ddof: int = 1) -> float:
+        """Variance of y over the window"""
+        return self._m2_y / (self._n - ddof) if self._n > ddof else np.nan
+
+    def covariance(self, ddof: int = 1) -> float:
+        """Covariance of x and y over the window"""
+        return self._c_xy / (self._n - ddof) if self._n > ddof else np.nan
+
+    def correlation(self) -> float:
+        """Pearson correlation over the window
+
+        Returns:
+            Correlation clipped to [-1, 1], or NaN with fewer than two pairs,
+            a NaN in the window, or a constant series
+        """
+        if (self._n < 2 or self._nan_count or not self._changes_x or not self._changes_y
+                or self._m2_x <= 0 or self._m2_y <= 0):
+            return np.nan
+        corr = self._c_xy / np.sqrt(self._m2_x * self._m2_y)
+        return float(min(1.0, max(-1.0, corr)))
+
+    def clear(self) -> None:
+        """Remove all pairs"""
+        self._x.clear()
+        self._y.clear()
+        self._reset_moments()
+        self._nan_count = 0
+        self._changes_x = 0
+        self._changes_y = 0
+        self._pushes_since_sync = 0
@@ -1,4 +1,7 @@
 # src/strategy/balance_breaker.py
+import numpy as np
+import pandas as pd
+
 from balance_breaker.src.strategy.base import Strategy
 from balance_breaker.src.signals.cloud_system import EnhancedCloudSystem
 
@@ -8,6 +11,12 @@ class BalanceBreakerStrategy(Strategy):
     Uses macroeconomic flow to generate signals.
     """
     
+    # Signal values, ordered from most bearish to most bullish
+    signal_categories = ["STRONG_SELL", "SELL", "NEUTRAL", "BUY", "STRONG_BUY"]
+    
+    # Columns of market data that are not macro indicators
+    price_columns = ['open', 'high', 'low', 'close', 'volume', 'pair', 'pip_factor']
+    
     def __init__(self, parameters=None, signal_generator=None, risk_manager=None):
         """
         Initialize the Balance Breaker strategy.
@@ -64,7 +73,7 @@ class BalanceBreakerStrategy(Strategy):
         
         # Extract macro data from current data
         macro_data = {k: v for k, v in current_data.items() 
-                     if k not in ['open', 'high', 'low', 'close', 'volume', 'pair', 'pip_factor']}
+                     if k not in self.price_columns}
         
         # Run cloud system step
         metrics = self.signal_generator.run_step(macro_data, pair)
@@ -141,6 +150,72 @@ class BalanceBreakerStrategy(Strategy):
         
         return signal, metrics
     
+    def generate_signals(self, frame):
+        """
+        Generate trading signals for a whole frame at once.
+        
+        Applies the same rules as _generate_signal_with_params to every row
+        with array operations. A frame of cloud system metrics (such as a
+        run_batch result) is classified directly; a frame of market data is
+        first run through the signal generator's run_batch, like
+        generate_signal runs run_step on each bar.
+        
+        Parameters:
+        -----------
+        frame : pd.DataFrame
+            Metrics with precession, market_mood and instability columns and
+            optionally regime and vix_inflation_correlation, or market data
+            with macro indicator columns
+            
+        Returns:
+        --------
+        pd.Series
+            Categorical signals indexed like frame
+        """
+        if 'precession' not in frame.columns:
+            pair = frame['pair'].iloc[0] if 'pair' in frame.columns and len(frame) else 'USDJPY'
+            macro_df = frame.drop(columns=[c for c in self.price_columns if c in frame.columns])
+            frame = self.signal_generator.run_batch(macro_df, pair)
+        
+        def column(name):
+            if name in frame.columns:
+                return frame[name].to_numpy(dtype=float, na_value=np.nan)
+            return np.zeros(len(frame))
+        
+        precession = column('precession')
+        market_mood = column('market_mood')
+        instability = column('instability')
+        
+        # Regime-dependent thresholds
+        precession_threshold = np.full(len(frame), float(self.parameters['target_eq_precession_threshold']))
+        mood_threshold = np.full(len(frame), float(self.parameters['target_eq_mood_threshold']))
+        instability_threshold = 1.5
+        if 'regime' in frame.columns:
+            lower_bound = (frame['regime'] == "LOWER_BOUND_RISK").to_numpy(dtype=bool, na_value=False)
+            precession_threshold[lower_bound] = self.parameters['lower_bound_precession_threshold']
+            mood_threshold[lower_bound] = self.parameters['lower_bound_mood_threshold']
+            
+            # Strong negative VIX-inflation correlation amplifies signals
+            if 'vix_inflation_correlation' in frame.columns:
+                amplified = lower_bound & (column('vix_inflation_correlation')
+                                           < self.parameters['vix_inflation_corr_threshold'])
+                precession_threshold[amplified] *= 0.8
+                mood_threshold[amplified] *= 0.8
+        
+        # Signals need enough data (non-zero precession) and significant precession
+        active = (precession != 0) & (np.abs(precession) > precession_threshold)
+        bullish = active & (market_mood > mood_threshold)
+        bearish = active & (market_mood < -mood_threshold)
+        unstable = instability > instability_threshold
+        signals = np.select(
+            [bullish & unstable, bullish, bearish & unstable, bearish],
+            ["STRONG_BUY", "BUY", "STRONG_SELL", "SELL"],
+            default="NEUTRAL"
+        )
+        
+        return pd.Series(pd.Categorical(signals, categories=self.signal_categories),
+                         index=frame.index, name='signal')
+    
     def reset(self):
         """Reset the strategy to its initial state"""
         super().reset()  # Call parent reset method